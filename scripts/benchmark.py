@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+XAE-Frame Performance Benchmark
+Times the end-to-end pipeline stages on synthetic data at several scales.
+
+Stages:
+    ingest      Chunked synthetic generation to parquet (DataDownloader)
+    features    Aggregate + categorical feature engineering
+    train       LightGBM training with the domain config hyperparameters
+    predict     Batch throughput and single-request p50/p99 latency
+    explain     TreeSHAP batch throughput and single-request p50/p99 latency
+    drift       Per-feature KS tests, training vs. held-out window
+    fairness    Demographic parity / disparate impact / equal opportunity
+
+Each scale runs in a fresh process, so the reported peak RSS
+(``ru_maxrss``) belongs to that scale alone. Stage timings come from an
+untraced pass; ``peak_traced_mb`` (the tracemalloc peak of Python and NumPy
+allocations) is measured by running the stage a second time under tracing,
+which ``--no-trace-memory`` skips.
+
+Usage:
+    python scripts/benchmark.py run --scales 10000,100000,1000000
+    python scripts/benchmark.py run --stages train,predict,explain --output bench.json
+    python scripts/benchmark.py compare data/benchmarks/baseline.json bench.json --threshold 0.10
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add repository root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.feature_engineering import AggregateFeatureEngine
+from src.utils.config import get_setting, load_config
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+STAGES = ["ingest", "features", "train", "predict", "explain", "drift", "fairness"]
+
+DEFAULT_OUTPUT_DIR = Path("data/benchmarks")
+
+# Metrics compared by ``compare``; higher is worse for all of them
+REGRESSION_METRICS = ["seconds", "p50_ms", "p99_ms", "peak_rss_mb", "peak_traced_mb"]
+
+FEATURES = [
+    "transaction_amount", "account_balance", "customer_age",
+    "transaction_type", "merchant_category", "gender",
+    "customer_txn_count", "customer_avg_amount", "customer_active_days",
+]
+TARGET = "is_fraud"
+
+
+class PipelineBenchmark:
+    """
+    Run the pipeline stages once on a synthetic dataset of a given size.
+
+    Example:
+        results = PipelineBenchmark(config, n_rows=100_000).run()
+        results["predict"]["p99_ms"]
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        n_rows: int,
+        stages: Optional[List[str]] = None,
+        latency_samples: int = 200,
+        predict_batch: int = 10_000,
+        shap_rows: int = 1_000,
+        seed: int = 42,
+        trace_memory: bool = True,
+    ):
+        """
+        Initialize benchmark.
+
+        Args:
+            config: Domain configuration (model hyperparameters, thresholds)
+            n_rows: Synthetic rows to generate
+            stages: Stages to report (earlier stages still run if later ones need them)
+            latency_samples: Single-row requests timed for p50/p99
+            predict_batch: Rows per batch in the batch prediction stage
+            shap_rows: Rows explained in the batch TreeSHAP stage
+            seed: Seed for data generation and sampling
+            trace_memory: Rerun every stage under tracemalloc for ``peak_traced_mb``
+        """
+        self.config = config
+        self.n_rows = n_rows
+        self.stages = stages or STAGES
+        self.latency_samples = latency_samples
+        self.predict_batch = predict_batch
+        self.shap_rows = shap_rows
+        self.seed = seed
+        self.trace_memory = trace_memory
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run all stages and return per-stage metrics."""
+        with tempfile.TemporaryDirectory(prefix="xae-bench-") as tmp:
+            path = self._ingest(Path(tmp))
+            X, y, groups = self._features(path)
+
+            split = int(len(X) * get_setting(self.config, "dataset.train_ratio", 0.7))
+            X_train, X_test = X.iloc[:split], X.iloc[split:]
+            y_train, y_test = y[:split], y[split:]
+            groups_test = groups[split:]
+
+            needs_model = {"train", "predict", "explain", "fairness"} & set(self.stages)
+            if needs_model:
+                booster = self._train(X_train, y_train)
+                scores = self._predict(booster, X_test)
+                if "explain" in self.stages:
+                    self._explain(booster, X_test)
+                if "fairness" in self.stages:
+                    self._fairness(scores, y_test, groups_test)
+            if "drift" in self.stages:
+                self._drift(X_train, X_test)
+
+        return {stage: self.results[stage] for stage in STAGES if stage in self.results and stage in self.stages}
+
+    # STAGES
+
+    def _ingest(self, data_dir: Path) -> Path:
+        from download_data import DataDownloader
+
+        downloader = DataDownloader(
+            data_dir=str(data_dir), seed=self.seed, partitioned=False,
+            synthetic_rows=self.n_rows, use_cache=False,
+        )
+        path = data_dir / "synthetic_finance_data.parquet"
+        self._measure("ingest", self.n_rows, lambda: downloader._generate_synthetic("finance", path))
+        return path
+
+    def _features(self, path: Path) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        return self._measure("features", self.n_rows, lambda: self._build_features(path))
+
+    def _build_features(self, path: Path) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        frame = pd.read_parquet(path)
+        engine = AggregateFeatureEngine(
+            user_col="customer_id", item_col="merchant_category",
+            rating_col="transaction_amount", timestamp_col="timestamp",
+        ).fit(frame)
+        customer = engine.user_features().reindex(frame["customer_id"].to_numpy())
+
+        X = pd.DataFrame({
+            "transaction_amount": frame["transaction_amount"].to_numpy(np.float32),
+            "account_balance": frame["account_balance"].to_numpy(np.float32),
+            "customer_age": frame["customer_age"].to_numpy(np.float32),
+            "transaction_type": frame["transaction_type"].cat.codes.to_numpy(np.float32),
+            "merchant_category": frame["merchant_category"].cat.codes.to_numpy(np.float32),
+            "gender": frame["gender"].cat.codes.to_numpy(np.float32),
+            "customer_txn_count": customer["user_review_count"].to_numpy(np.float32),
+            "customer_avg_amount": customer["user_avg_rating"].to_numpy(np.float32),
+            "customer_active_days": customer["user_activity_days"].to_numpy(np.float32),
+        })[FEATURES]
+        y = frame[TARGET].to_numpy(np.float32)
+        groups = frame["gender"].astype(str).to_numpy()
+        return X, y, groups
+
+    def _train(self, X: pd.DataFrame, y: np.ndarray):
+        import lightgbm as lgb
+
+        params = dict(get_setting(self.config, "model.lightgbm", {}))
+        num_boost_round = params.pop("n_estimators", 100)
+        params.update({"objective": "binary", "metric": "auc", "verbose": -1})
+        return self._measure(
+            "train", len(X), lambda: lgb.train(params, lgb.Dataset(X, label=y), num_boost_round=num_boost_round)
+        )
+
+    def _predict(self, booster, X: pd.DataFrame) -> np.ndarray:
+        values = X.to_numpy()
+        scores = self._measure("predict", len(X), lambda: np.concatenate([
+            booster.predict(values[start:start + self.predict_batch])
+            for start in range(0, len(values), self.predict_batch)
+        ]))
+        self.results["predict"].update(
+            _latency(lambda row: booster.predict(row), values, self.latency_samples, self.seed)
+        )
+        return scores
+
+    def _explain(self, booster, X: pd.DataFrame) -> None:
+        import shap
+
+        explainer = shap.TreeExplainer(booster)
+        values = X.to_numpy()[: self.shap_rows]
+        self._measure("explain", len(values), lambda: explainer.shap_values(values))
+        self.results["explain"].update(
+            _latency(explainer.shap_values, values, min(self.latency_samples, len(values)), self.seed)
+        )
+
+    def _drift(self, reference: pd.DataFrame, current: pd.DataFrame) -> None:
+        from scipy.stats import ks_2samp
+
+        threshold = get_setting(self.config, "adaptive.drift_detection.drift_threshold", 0.05)
+        p_values = self._measure("drift", len(reference) + len(current), lambda: {
+            column: ks_2samp(reference[column].to_numpy(), current[column].to_numpy()).pvalue
+            for column in reference.columns
+        })
+        self.results["drift"]["drifted_features"] = int(sum(p < threshold for p in p_values.values()))
+
+    def _fairness(self, scores: np.ndarray, y: np.ndarray, groups: np.ndarray) -> None:
+        metrics = self._measure("fairness", len(scores), lambda: _fairness_metrics(scores, y, groups))
+        self.results["fairness"].update(metrics)
+
+    # MEASUREMENT
+
+    def _measure(self, stage: str, rows: int, func: Callable[[], Any]) -> Any:
+        """
+        Record wall time, throughput, peak RSS and traced peak of a stage.
+
+        ``func`` is timed without tracemalloc (tracing slows allocation-heavy
+        code several-fold); the traced peak comes from a second, untimed run.
+
+        Returns:
+            Result of the timed run
+        """
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        self.results[stage] = {
+            "rows": rows,
+            "seconds": round(seconds, 6),
+            "rows_per_s": round(rows / seconds, 1) if seconds > 0 else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+        if self.trace_memory:
+            tracemalloc.start()
+            try:
+                func()
+                _, traced_peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.results[stage]["peak_traced_mb"] = round(traced_peak / 2**20, 1)
+        logger.info(f"  {stage:<9} {seconds:8.3f}s  {rows / max(seconds, 1e-9):>14,.0f} rows/s")
+        return result
+
+
+def _fairness_metrics(scores: np.ndarray, y: np.ndarray, groups: np.ndarray) -> Dict[str, float]:
+    predicted = scores >= np.quantile(scores, 0.99)  # flag the top 1% as fraud
+    selection, tpr = {}, {}
+    for group in np.unique(groups):
+        mask = groups == group
+        selection[group] = predicted[mask].mean()
+        positives = mask & (y == 1)
+        tpr[group] = predicted[positives].mean() if positives.any() else np.nan
+    rates = np.array(list(selection.values()))
+    return {
+        "demographic_parity_difference": float(rates.max() - rates.min()),
+        "disparate_impact": float(rates.min() / rates.max()) if rates.max() > 0 else 1.0,
+        "equal_opportunity_difference": float(np.nanmax(list(tpr.values())) - np.nanmin(list(tpr.values()))),
+    }
+
+
+def _latency(func, values: np.ndarray, samples: int, seed: int) -> Dict[str, float]:
+    """p50/p99 latency of single-row calls on randomly chosen rows."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(values), samples)
+    func(values[rows[:1]])  # warm-up
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        func(values[row:row + 1])
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _run_scale(config: Dict[str, Any], n_rows: int, options: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    logger.info(f"Benchmarking {n_rows:,} rows...")
+    return PipelineBenchmark(config, n_rows, **options).run()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# COMMANDS
+
+def run_benchmarks(
+    config_name: str,
+    scales: List[int],
+    output_path: Optional[Path] = None,
+    **options: Any,
+) -> Path:
+    """
+    Benchmark each scale in a fresh process and write the results as JSON.
+
+    Returns:
+        Path of the results file
+    """
+    config = load_config(config_name)
+    context = multiprocessing.get_context("spawn")
+
+    results = {}
+    for n_rows in scales:
+        # One process per scale so ru_maxrss is not inherited from smaller runs
+        with context.Pool(1) as pool:
+            results[str(n_rows)] = pool.apply(_run_scale, (config, n_rows, options))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "config": config_name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": options,
+        },
+        "results": results,
+    }
+
+    if output_path is None:
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output_path = DEFAULT_OUTPUT_DIR / f"benchmark_{stamp}.json"
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    logger.info(f"✓ Benchmark results written to {output_path}")
+    return output_path
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.10,
+) -> List[Dict[str, Any]]:
+    """
+    Compare two result files metric by metric.
+
+    Returns:
+        One row per (scale, stage, metric) present in both runs, with
+        ``regression`` set where ``current`` is worse by more than ``threshold``
+    """
+    rows = []
+    for scale, stages in current["results"].items():
+        for stage, metrics in stages.items():
+            before = baseline["results"].get(scale, {}).get(stage)
+            if before is None:
+                continue
+            for metric in REGRESSION_METRICS:
+                old, new = before.get(metric), metrics.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                rows.append({
+                    "scale": scale, "stage": stage, "metric": metric,
+                    "baseline": old, "current": new, "change": change,
+                    "regression": change > threshold,
+                })
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the XAE-Frame pipeline",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark and write JSON results")
+    run.add_argument("--config", type=str, default="e_commerce", help="Domain config name or path")
+    run.add_argument("--scales", type=str, default="10000,100000",
+                     help="Comma-separated synthetic row counts")
+    run.add_argument("--stages", type=str, default=",".join(STAGES),
+                     help=f"Comma-separated stages ({', '.join(STAGES)})")
+    run.add_argument("--latency-samples", type=int, default=200,
+                     help="Single-row requests timed for p50/p99 latency")
+    run.add_argument("--predict-batch", type=int, default=10_000, help="Rows per prediction batch")
+    run.add_argument("--shap-rows", type=int, default=1_000, help="Rows explained in the TreeSHAP stage")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--no-trace-memory", action="store_true",
+                     help="Skip the tracemalloc pass (no peak_traced_mb, half the run time)")
+    run.add_argument("--output", type=str, default=None, help="Results file (default: data/benchmarks/)")
+
+    compare = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare.add_argument("baseline", type=str)
+    compare.add_argument("current", type=str)
+    compare.add_argument("--threshold", type=float, default=0.10,
+                         help="Relative increase counted as a regression (0.10 = 10%%)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+        run_benchmarks(
+            args.config,
+            [int(s) for s in args.scales.split(",")],
+            output_path=Path(args.output) if args.output else None,
+            stages=stages,
+            latency_samples=args.latency_samples,
+            predict_batch=args.predict_batch,
+            shap_rows=args.shap_rows,
+            seed=args.seed,
+            trace_memory=not args.no_trace_memory,
+        )
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    with open(args.current, "r") as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold)
+    regressions = [r for r in rows if r["regression"]]
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(f"{r['scale']:>10} {r['stage']:<9} {r['metric']:<15} "
+              f"{r['baseline']:>12.4f} -> {r['current']:>12.4f} ({r['change']:+7.1%}) {flag}")
+
+    if regressions:
+        logger.error(f"✗ {len(regressions)} regressions beyond {args.threshold:.0%}")
+        return 1
+    logger.info(f"✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -7,18 +7,35 @@ Usage:
     python scripts/download_data.py --dataset amazon_reviews --category Electronics
     python scripts/download_data.py --dataset finance --sample-size 10000
     python scripts/download_data.py --all
+    python scripts/download_data.py --dataset all --jobs 4
+    python scripts/download_data.py --dataset amazon_reviews --source-dir /mnt/amazon_2023
 """
 
 import argparse
 import logging
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from datasets import load_dataset
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
+# Add repository root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.cache import DatasetCache
+from src.data.id_encoding import update_vocabularies
+from src.data.partitioned import is_partitioned, write_partitioned
+from src.data.synthetic import SyntheticDataGenerator, SyntheticSpec
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,27 +43,94 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+HF_AMAZON_DATASET = "McAuley-Lab/Amazon-Reviews-2023"
+
 
 class DataDownloader:
     """Download and prepare datasets for XAE-Frame."""
     
-    def __init__(self, data_dir: str = "data/raw"):
-        """Initialize downloader with data directory."""
+    def __init__(
+        self,
+        data_dir: str = "data/raw",
+        source_dir: Optional[str] = None,
+        batch_size: int = 50_000,
+        row_group_size: int = 100_000,
+        seed: int = 42,
+        partitioned: bool = True,
+        synthetic_rows: int = 10_000,
+        synthetic_chunk_size: int = 1_000_000,
+        synthetic_jobs: int = 1,
+        use_cache: bool = True
+    ):
+        """
+        Initialize downloader with data directory.
+        
+        Args:
+            data_dir: Directory where the output parquet files are written
+            source_dir: Local directory standing in for the HuggingFace source
+                        (one ``raw_review_{category}`` / ``raw_meta_{category}``
+                        entry per config, as parquet or JSONL). None = HuggingFace
+            batch_size: Number of rows pulled from the source per record batch
+            row_group_size: Maximum rows per parquet row group in the output
+            seed: Random seed for sampling
+            partitioned: Also write the hive-partitioned copy under
+                         ``{data_dir}/partitioned`` (domain/category/month)
+            synthetic_rows: Rows per synthetic finance/insurance dataset
+            synthetic_chunk_size: Rows per independently seeded generator chunk
+            synthetic_jobs: Worker processes used to generate chunks
+            use_cache: Reuse results recorded in ``{data_dir}/manifest.json``
+                       instead of downloading/generating again
+        """
+        # Kept so worker processes can rebuild an equivalent downloader
+        self._init_kwargs = dict(
+            data_dir=data_dir,
+            source_dir=source_dir,
+            batch_size=batch_size,
+            row_group_size=row_group_size,
+            seed=seed,
+            partitioned=partitioned,
+            synthetic_rows=synthetic_rows,
+            synthetic_chunk_size=synthetic_chunk_size,
+            synthetic_jobs=synthetic_jobs,
+            use_cache=use_cache,
+        )
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.source_dir = Path(source_dir) if source_dir else None
+        self.batch_size = batch_size
+        self.row_group_size = row_group_size
+        self.seed = seed
+        self.partitioned = partitioned
+        self.partition_root = self.data_dir / "partitioned"
+        self.synthetic_rows = synthetic_rows
+        self.synthetic_chunk_size = synthetic_chunk_size
+        self.synthetic_jobs = synthetic_jobs
+        self.use_cache = use_cache
+        self.cache = DatasetCache(self.data_dir)
         logger.info(f"Data directory: {self.data_dir.absolute()}")
+        if self.source_dir is not None:
+            logger.info(f"Offline source directory: {self.source_dir.absolute()}")
     
     def download_amazon_reviews(
         self, 
         category: str = "All_Beauty",
-        sample_size: Optional[int] = None
-    ):
+        sample_size: Optional[int] = None,
+        include_metadata: bool = True
+    ) -> Path:
         """
         Download Amazon Reviews 2023 dataset.
         
+        The split is streamed as Arrow record batches and written row group by
+        row group, so peak memory is bounded by ``batch_size`` (or by
+        ``sample_size`` when sampling) rather than by the category size.
+        
         Args:
             category: Product category (e.g., Electronics, Books, All_Beauty)
             sample_size: Number of samples to download (None = full dataset)
+            include_metadata: Also download the product metadata for the category
+        
+        Returns:
+            Path of the written parquet file
         
         Available categories:
             - All_Beauty, Toys_and_Games, Cell_Phones_and_Accessories
@@ -57,36 +141,33 @@ class DataDownloader:
         logger.info(f"Downloading Amazon Reviews 2023 - {category}...")
         
         try:
-            # Load dataset from HuggingFace
-            dataset = load_dataset(
-                "McAuley-Lab/Amazon-Reviews-2023",
-                f"raw_review_{category}",
-                split="full",
-                trust_remote_code=True
-            )
-            
-            # Convert to pandas
-            df = dataset.to_pandas()
+            output_path = self.data_dir / f"amazon_reviews_{category}.parquet"
+            entry = self._cached_stream(f"raw_review_{category}", output_path, sample_size)
+            n_seen, n_written = entry["source_rows"], entry["rows"]
+            columns = [field.split(":")[0] for field in entry["schema"]]
             
-            logger.info(f"Full dataset size: {len(df):,} reviews")
+            logger.info(f"Full dataset size: {n_seen:,} reviews")
+            if n_written < n_seen:
+                logger.info(f"Sampled to {n_written:,} reviews")
             
-            # Sample if requested
-            if sample_size and sample_size < len(df):
-                df = df.sample(n=sample_size, random_state=42)
-                logger.info(f"Sampled to {sample_size:,} reviews")
+            logger.info(f"✓ Saved to {output_path}")
+            logger.info(f"  Columns: {columns}")
+            logger.info(f"  Shape: ({n_written}, {len(columns)})")
             
-            # Save to parquet (more efficient than CSV)
-            output_path = self.data_dir / f"amazon_reviews_{category}.parquet"
-            df.to_parquet(output_path, index=False)
+            self._write_partitioned(output_path, "e_commerce", category, entry["sha256"])
             
-            logger.info(f"✓ Saved to {output_path}")
-            logger.info(f"  Columns: {list(df.columns)}")
-            logger.info(f"  Shape: {df.shape}")
+            # Stable int32 codes for the ID columns (see src/data/id_encoding.py)
+            update_vocabularies(
+                output_path,
+                {"user_id": "user_id", "parent_asin": "item_id"},
+                vocab_dir=self.data_dir / "vocab"
+            )
             
             # Download metadata separately
-            self._download_amazon_metadata(category, sample_size)
+            if include_metadata:
+                self._download_amazon_metadata(category, sample_size)
             
-            return df
+            return output_path
             
         except Exception as e:
             logger.error(f"Failed to download Amazon Reviews: {e}")
@@ -101,26 +182,240 @@ class DataDownloader:
         logger.info(f"Downloading product metadata for {category}...")
         
         try:
-            dataset = load_dataset(
-                "McAuley-Lab/Amazon-Reviews-2023",
-                f"raw_meta_{category}",
-                split="full",
-                trust_remote_code=True
-            )
-            
-            df = dataset.to_pandas()
-            
-            if sample_size and sample_size < len(df):
-                df = df.sample(n=min(sample_size, len(df)), random_state=42)
-            
             output_path = self.data_dir / f"amazon_metadata_{category}.parquet"
-            df.to_parquet(output_path, index=False)
+            self._cached_stream(f"raw_meta_{category}", output_path, sample_size)
             
             logger.info(f"✓ Saved metadata to {output_path}")
             
         except Exception as e:
             logger.warning(f"Could not download metadata: {e}")
     
+    def _cached_stream(
+        self,
+        config_name: str,
+        output_path: Path,
+        sample_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a source config to parquet unless the manifest already has it.
+        
+        Returns:
+            Manifest entry of the (possibly cached) output
+        """
+        inputs = self._source_inputs(config_name, sample_size)
+        entry = self.cache.restore(inputs, output_path) if self.use_cache else None
+        if entry is not None:
+            return entry
+        
+        with self.cache.staging(output_path) as tmp_path:
+            n_seen, n_written, _ = self._stream_to_parquet(config_name, tmp_path, sample_size)
+            # A sample that kept every row is the full dataset in source order
+            aliases = [self._source_inputs(config_name, None)] if sample_size and n_written == n_seen else []
+            return self.cache.commit(inputs, tmp_path, output_path, aliases=aliases, source_rows=n_seen)
+    
+    def _source_inputs(self, config_name: str, sample_size: Optional[int]) -> Dict[str, Any]:
+        """Inputs that determine the content of a streamed output."""
+        if self.source_dir is not None:
+            source = f"local:{self.source_dir.resolve()}"
+        else:
+            source = f"hf:{HF_AMAZON_DATASET}"
+        return dict(
+            source=source,
+            config=config_name,
+            sample_size=sample_size or None,
+            seed=self.seed if sample_size else None,
+        )
+    
+    def _stream_to_parquet(
+        self,
+        config_name: str,
+        output_path: Path,
+        sample_size: Optional[int] = None
+    ) -> Tuple[int, int, pa.Schema]:
+        """
+        Stream a source config into a parquet file in a single pass.
+        
+        Without sampling every batch is written as it arrives. With sampling a
+        bottom-k reservoir (uniform random key per row, keep the ``sample_size``
+        smallest) is maintained instead, so the sample is uniform without
+        replacement and only ``sample_size`` rows are ever held.
+        
+        Returns:
+            Tuple of (rows seen in the source, rows written, output schema)
+        """
+        batches = self._iter_source_batches(config_name)
+        writer = None
+        n_seen = n_written = 0
+        
+        try:
+            if not sample_size:
+                for batch in tqdm(batches, desc=config_name, unit="batch"):
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, batch.schema)
+                    batch = self._conform(batch, writer.schema)
+                    writer.write_table(batch, row_group_size=self.row_group_size)
+                    n_seen += batch.num_rows
+                n_written = n_seen
+            else:
+                sample, n_seen = self._reservoir_sample(batches, sample_size, config_name)
+                if sample is not None:
+                    writer = pq.ParquetWriter(output_path, sample.schema)
+                    writer.write_table(sample, row_group_size=self.row_group_size)
+                    n_written = sample.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        if writer is None:
+            raise ValueError(f"Source {config_name} returned no rows")
+        
+        return n_seen, n_written, writer.schema
+    
+    def _reservoir_sample(
+        self,
+        batches: Iterator[pa.Table],
+        sample_size: int,
+        desc: str = "sampling"
+    ) -> Tuple[Optional[pa.Table], int]:
+        """Uniformly sample ``sample_size`` rows from a stream of batches."""
+        rng = np.random.default_rng(self.seed)
+        reservoir = None
+        keys = np.empty(0)
+        n_seen = 0
+        
+        for batch in tqdm(batches, desc=desc, unit="batch"):
+            batch_keys = rng.random(batch.num_rows)
+            n_seen += batch.num_rows
+            
+            if reservoir is None:
+                reservoir, keys = batch, batch_keys
+            else:
+                schema = self._unify_schemas([reservoir.schema, batch.schema])
+                reservoir = self._conform(reservoir, schema)
+                batch = self._conform(batch, schema)
+                if reservoir.num_rows >= sample_size:
+                    # Only rows that beat the current k-th key can enter
+                    accepted = np.flatnonzero(batch_keys < keys.max())
+                    if len(accepted) == 0:
+                        continue
+                    batch, batch_keys = batch.take(accepted), batch_keys[accepted]
+                reservoir = pa.concat_tables([reservoir, batch])
+                keys = np.concatenate([keys, batch_keys])
+            
+            if reservoir.num_rows > sample_size:
+                keep = np.argpartition(keys, sample_size - 1)[:sample_size]
+                keep.sort()  # preserve source order within the sample
+                reservoir, keys = reservoir.take(keep), keys[keep]
+        
+        if reservoir is not None:
+            reservoir = reservoir.combine_chunks()
+        
+        return reservoir, n_seen
+    
+    def _iter_source_batches(self, config_name: str) -> Iterator[pa.Table]:
+        """Yield a source config as Arrow tables of at most ``batch_size`` rows."""
+        # A cached full copy serves every sample size without touching the source
+        full = self.cache.get(self._source_inputs(config_name, None)) if self.use_cache else None
+        if full is not None:
+            logger.info(f"Sampling {config_name} from cached full copy ({full['sha256'][:12]})")
+            cached = pq.ParquetFile(self.cache.object_path(full["sha256"]))
+            for batch in cached.iter_batches(batch_size=self.batch_size):
+                yield pa.Table.from_batches([batch])
+            return
+        
+        if self.source_dir is not None:
+            yield from self._iter_local_batches(config_name)
+            return
+        
+        dataset = load_dataset(
+            HF_AMAZON_DATASET,
+            config_name,
+            split="full",
+            streaming=True,
+            trust_remote_code=True
+        )
+        schema = dataset.features.arrow_schema if dataset.features else None
+        
+        for batch in dataset.iter(batch_size=self.batch_size):
+            yield pa.Table.from_pydict(batch, schema=schema)
+    
+    def _iter_local_batches(self, config_name: str) -> Iterator[pa.Table]:
+        """Yield batches from ``source_dir/config_name`` (a file or a directory)."""
+        root = self.source_dir / config_name
+        if root.is_dir():
+            files = sorted(
+                f for f in root.rglob("*")
+                if f.suffix in (".parquet", ".jsonl", ".json")
+            )
+        else:
+            files = [
+                root.with_suffix(suffix) for suffix in (".parquet", ".jsonl", ".json")
+                if root.with_suffix(suffix).exists()
+            ][:1]
+        
+        if not files:
+            raise FileNotFoundError(f"No parquet/JSONL files for {config_name} in {self.source_dir}")
+        
+        # One schema for the whole stream: a column that is empty (null-typed) in the
+        # first batch, such as ``images``, takes its type from the batches that have values
+        schemas = []
+        for path in files:
+            if path.suffix == ".parquet":
+                schemas.append(pq.read_schema(path))
+            else:
+                schemas.extend(batch.schema for batch in self._iter_json_batches(path))
+        schema = self._unify_schemas(schemas)
+        for path in files:
+            if path.suffix == ".parquet":
+                batches = (
+                    pa.Table.from_batches([batch])
+                    for batch in pq.ParquetFile(path).iter_batches(batch_size=self.batch_size)
+                )
+            else:
+                batches = self._iter_json_batches(path)
+            for batch in batches:
+                yield self._conform(batch, schema)
+    
+    def _iter_json_batches(self, path: Path) -> Iterator[pa.Table]:
+        """Yield a JSONL file as Arrow tables with the values as written (no date/dtype inference)."""
+        chunks = pd.read_json(path, lines=True, chunksize=self.batch_size, convert_dates=False, dtype=False)
+        for chunk in chunks:
+            yield pa.Table.from_pandas(chunk, preserve_index=False)
+    
+    @staticmethod
+    def _unify_schemas(schemas: List[pa.Schema]) -> pa.Schema:
+        """Merge batch schemas, promoting null and narrower types to the type seen with values."""
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    
+    def _write_partitioned(
+        self,
+        output_path: Path,
+        domain: str,
+        category: str,
+        sha256: Optional[str] = None
+    ):
+        """Re-partition a written parquet file by domain/category/month."""
+        if not self.partitioned:
+            return
+        if self.use_cache and sha256 and is_partitioned(domain, category, sha256, root=self.partition_root):
+            logger.info(f"✓ Partitions for {domain}/{category} are up to date, skipping")
+            return
+        write_partitioned(
+            output_path, domain, category, root=self.partition_root, source_sha256=sha256
+        )
+    
+    @staticmethod
+    def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+        """Cast a batch to the stream's schema; columns it lacks are filled with nulls."""
+        if table.schema.equals(schema):
+            return table
+        columns = [
+            table.column(f.name).cast(f.type) if f.name in table.column_names
+            else pa.nulls(table.num_rows, f.type)
+            for f in schema
+        ]
+        return pa.table(columns, schema=schema)
+    
     def download_finance_dataset(self, dataset_name: str = "credit_card_fraud"):
         """
         Download finance-related datasets.
@@ -152,30 +447,18 @@ class DataDownloader:
         logger.info("Generating synthetic credit card transaction data for demo...")
         self._generate_synthetic_finance_data()
     
-    def _generate_synthetic_finance_data(self, n_samples: int = 10000):
+    def _generate_synthetic_finance_data(self, n_samples: Optional[int] = None):
         """Generate synthetic finance data for prototyping."""
-        import numpy as np
-        
-        np.random.seed(42)
-        
-        df = pd.DataFrame({
-            'transaction_id': range(n_samples),
-            'customer_id': np.random.randint(1000, 5000, n_samples),
-            'transaction_amount': np.random.lognormal(4, 1.5, n_samples),
-            'transaction_type': np.random.choice(['purchase', 'withdrawal', 'transfer'], n_samples),
-            'merchant_category': np.random.choice(['retail', 'food', 'travel', 'entertainment'], n_samples),
-            'is_fraud': np.random.choice([0, 1], n_samples, p=[0.998, 0.002]),
-            'customer_age': np.random.randint(18, 80, n_samples),
-            'account_balance': np.random.lognormal(8, 2, n_samples),
-            'timestamp': pd.date_range('2023-01-01', periods=n_samples, freq='5min')
-        })
-        
         output_path = self.data_dir / "synthetic_finance_data.parquet"
-        df.to_parquet(output_path, index=False)
+        entry = self._generate_synthetic("finance", output_path, n_samples)
+        n_rows = entry["rows"]
         
+        self._write_partitioned(output_path, "finance", "credit_card_fraud", entry["sha256"])
+        
+        is_fraud = pq.read_table(output_path, columns=["is_fraud"]).column("is_fraud")
         logger.info(f"✓ Generated synthetic finance data: {output_path}")
-        logger.info(f"  Shape: {df.shape}")
-        logger.info(f"  Fraud rate: {df['is_fraud'].mean():.2%}")
+        logger.info(f"  Rows: {n_rows:,}")
+        logger.info(f"  Fraud rate: {pc.mean(is_fraud).as_py():.2%}")
     
     def download_insurance_dataset(self, dataset_name: str = "safe_driver"):
         """
@@ -198,51 +481,149 @@ class DataDownloader:
         logger.info("Generating synthetic insurance data for demo...")
         self._generate_synthetic_insurance_data()
     
-    def _generate_synthetic_insurance_data(self, n_samples: int = 10000):
+    def _generate_synthetic_insurance_data(self, n_samples: Optional[int] = None):
         """Generate synthetic insurance data for prototyping."""
-        import numpy as np
-        
-        np.random.seed(42)
-        
-        df = pd.DataFrame({
-            'policy_id': range(n_samples),
-            'customer_id': np.random.randint(1000, 5000, n_samples),
-            'age': np.random.randint(18, 80, n_samples),
-            'gender': np.random.choice(['M', 'F'], n_samples),
-            'vehicle_age': np.random.choice(['<1 Year', '1-2 Years', '>2 Years'], n_samples),
-            'vehicle_damage': np.random.choice(['Yes', 'No'], n_samples, p=[0.3, 0.7]),
-            'annual_premium': np.random.lognormal(8, 0.8, n_samples),
-            'policy_sales_channel': np.random.randint(1, 160, n_samples),
-            'vintage': np.random.randint(10, 300, n_samples),
-            'risk_score': np.random.uniform(0, 1, n_samples),
-            'claim_amount': np.where(
-                np.random.random(n_samples) < 0.1,
-                np.random.lognormal(7, 1, n_samples),
-                0
-            )
-        })
-        
         output_path = self.data_dir / "synthetic_insurance_data.parquet"
-        df.to_parquet(output_path, index=False)
+        entry = self._generate_synthetic("insurance", output_path, n_samples)
+        n_rows = entry["rows"]
+        
+        self._write_partitioned(output_path, "insurance", "safe_driver", entry["sha256"])
         
+        claims = pq.read_table(output_path, columns=["claim_amount"]).column("claim_amount")
+        claim_rate = pc.mean(pc.greater(claims, 0).cast(pa.float64())).as_py()
         logger.info(f"✓ Generated synthetic insurance data: {output_path}")
-        logger.info(f"  Shape: {df.shape}")
-        logger.info(f"  Claim rate: {(df['claim_amount'] > 0).mean():.2%}")
+        logger.info(f"  Rows: {n_rows:,}")
+        logger.info(f"  Claim rate: {claim_rate:.2%}")
     
-    def download_all(self, sample_size: Optional[int] = 10000):
-        """Download all datasets with sampling for quick start."""
+    def _generate_synthetic(
+        self,
+        domain: str,
+        output_path: Path,
+        n_samples: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a chunked synthetic dataset (see ``src/data/synthetic.py``) to parquet.
+        
+        Returns:
+            Manifest entry of the (possibly cached) output
+        """
+        spec = SyntheticSpec(
+            domain=domain,
+            n_rows=n_samples or self.synthetic_rows,
+            chunk_size=self.synthetic_chunk_size,
+            seed=self.seed
+        )
+        inputs = spec.cache_inputs()
+        entry = self.cache.restore(inputs, output_path) if self.use_cache else None
+        if entry is not None:
+            return entry
+        
+        with self.cache.staging(output_path) as tmp_path:
+            SyntheticDataGenerator(spec).write_parquet(tmp_path, jobs=self.synthetic_jobs)
+            return self.cache.commit(inputs, tmp_path, output_path)
+    
+    def download_all(self, sample_size: Optional[int] = 10000, jobs: int = 1):
+        """
+        Download all datasets with sampling for quick start.
+        
+        Args:
+            sample_size: Number of samples per Amazon dataset
+            jobs: Number of concurrent tasks. With jobs > 1 the Amazon
+                  reviews/metadata downloads (I/O bound) run on threads and the
+                  synthetic finance/insurance generators (CPU bound) run in a
+                  process pool.
+        """
         logger.info("Downloading all datasets (sampled)...")
         
-        # E-commerce (primary demo)
-        self.download_amazon_reviews(category="All_Beauty", sample_size=sample_size)
+        # (name, executor kind, method, kwargs)
+        tasks = [
+            # E-commerce (primary demo)
+            ("amazon_reviews", "thread", "download_amazon_reviews",
+             dict(category="All_Beauty", sample_size=sample_size, include_metadata=False)),
+            ("amazon_metadata", "thread", "_download_amazon_metadata",
+             dict(category="All_Beauty", sample_size=sample_size)),
+            # Finance (demo with synthetic data)
+            ("finance", "process", "download_finance_dataset",
+             dict(dataset_name="credit_card_fraud")),
+            # Insurance (demo with synthetic data)
+            ("insurance", "process", "download_insurance_dataset",
+             dict(dataset_name="safe_driver")),
+        ]
         
-        # Finance (demo with synthetic data)
-        self.download_finance_dataset("credit_card_fraud")
+        start = time.perf_counter()
+        timings = self._run_tasks(tasks, jobs)
+        total = time.perf_counter() - start
         
-        # Insurance (demo with synthetic data)
-        self.download_insurance_dataset("safe_driver")
+        logger.info("Task summary (wall-clock):")
+        for name, (seconds, error) in timings.items():
+            status = "ok" if error is None else f"FAILED ({error})"
+            logger.info(f"  {name:<18} {seconds:8.1f}s  {status}")
+        logger.info(f"  {'total':<18} {total:8.1f}s  (jobs={jobs})")
+        
+        failed = [name for name, (_, error) in timings.items() if error is not None]
+        if failed:
+            raise RuntimeError(f"Download tasks failed: {', '.join(failed)}")
         
         logger.info("✓ All datasets downloaded!")
+    
+    def _run_tasks(
+        self,
+        tasks: List[Tuple[str, str, str, Dict[str, Any]]],
+        jobs: int
+    ) -> Dict[str, Tuple[float, Optional[str]]]:
+        """Run download tasks, returning {name: (seconds, error or None)}."""
+        timings: Dict[str, Tuple[float, Optional[str]]] = {}
+        
+        if jobs <= 1:
+            for i, (name, _, method, kwargs) in enumerate(tasks, 1):
+                logger.info(f"[{i}/{len(tasks)}] Starting {name}...")
+                timings[name] = _timed_call(getattr(self, method), kwargs)
+            return timings
+        
+        n_process = sum(kind == "process" for _, kind, _, _ in tasks)
+        n_thread = len(tasks) - n_process
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, n_thread))) as threads, \
+                ProcessPoolExecutor(max_workers=max(1, min(jobs, n_process))) as processes:
+            futures = {}
+            for name, kind, method, kwargs in tasks:
+                if kind == "process":
+                    future = processes.submit(_run_task, self._init_kwargs, method, kwargs)
+                else:
+                    future = threads.submit(_timed_call, getattr(self, method), kwargs)
+                futures[future] = name
+                logger.info(f"Started {name} ({kind})")
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                timings[name] = future.result()
+                seconds, error = timings[name]
+                status = "done" if error is None else "failed"
+                logger.info(f"[{done}/{len(tasks)}] {name} {status} in {seconds:.1f}s")
+        
+        return {name: timings[name] for name, _, _, _ in tasks}
+
+
+def _timed_call(func, kwargs: Dict[str, Any]) -> Tuple[float, Optional[str]]:
+    """Call ``func(**kwargs)``, returning (seconds, error message or None)."""
+    start = time.perf_counter()
+    try:
+        func(**kwargs)
+        error = None
+    except Exception as e:
+        logger.error(f"{getattr(func, '__name__', func)} failed: {e}")
+        error = str(e)
+    return time.perf_counter() - start, error
+
+
+def _run_task(
+    init_kwargs: Dict[str, Any],
+    method: str,
+    kwargs: Dict[str, Any]
+) -> Tuple[float, Optional[str]]:
+    """Process-pool entry point: rebuild the downloader and run one task."""
+    downloader = DataDownloader(**init_kwargs)
+    return _timed_call(getattr(downloader, method), kwargs)
 
 
 def main():
@@ -281,10 +662,65 @@ def main():
         help="Directory to save data"
     )
     
+    parser.add_argument(
+        "--source-dir",
+        type=str,
+        default=None,
+        help="Local parquet/JSONL directory to read instead of HuggingFace (offline mode)"
+    )
+    
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50_000,
+        help="Rows per streamed record batch (bounds peak memory)"
+    )
+    
+    parser.add_argument(
+        "--no-partition",
+        action="store_true",
+        help="Skip writing the hive-partitioned copy under <data-dir>/partitioned"
+    )
+    
+    parser.add_argument(
+        "--synthetic-rows",
+        type=int,
+        default=10_000,
+        help="Rows per synthetic finance/insurance dataset (generated in bounded memory)"
+    )
+    
+    parser.add_argument(
+        "--synthetic-jobs",
+        type=int,
+        default=1,
+        help="Worker processes for chunked synthetic generation"
+    )
+    
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the manifest cache and download/generate everything again"
+    )
+    
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Concurrent tasks for --dataset all (threads for downloads, processes for generation)"
+    )
+    
     args = parser.parse_args()
     
     # Create downloader
-    downloader = DataDownloader(data_dir=args.data_dir)
+    downloader = DataDownloader(
+        data_dir=args.data_dir,
+        source_dir=args.source_dir,
+        batch_size=args.batch_size,
+        partitioned=not args.no_partition,
+        synthetic_rows=args.synthetic_rows,
+        synthetic_jobs=args.synthetic_jobs,
+        use_cache=not args.force
+    )
     
     # Download requested dataset(s)
     try:
@@ -298,7 +734,7 @@ def main():
         elif args.dataset == "insurance":
             downloader.download_insurance_dataset()
         elif args.dataset == "all":
-            downloader.download_all(sample_size=args.sample_size or 10000)
+            downloader.download_all(sample_size=args.sample_size or 10000, jobs=args.jobs)
         
         logger.info("✓ Download complete!")
         
@@ -7,29 +7,37 @@ Usage:
     python scripts/init_db.py
 """
 
+import json
 import os
+import re
 import sys
 from pathlib import Path
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import (
-    create_engine,
     Column,
+    Index,
     Integer,
+    MetaData,
+    PrimaryKeyConstraint,
     String,
     Float,
     DateTime,
     Boolean,
     JSON,
+    LargeBinary,
     Text,
     text,
 )
 from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
+from src.utils.db import create_pooled_engine, database_url as resolve_database_url
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +45,20 @@ logger = logging.getLogger(__name__)
 # Base class for models
 Base = declarative_base()
 
+# High-volume tables range-partitioned by month on PostgreSQL -> partition key
+PARTITIONED_TABLES = {
+    "predictions": "timestamp",
+    "user_interactions": "timestamp",
+    "drift_alerts": "detected_at",
+}
+
+# Retention (README: 90-day hot storage, 7-year cold archive)
+HOT_RETENTION_DAYS = 90
+COLD_RETENTION_YEARS = 7
+ARCHIVE_DIR = Path("data/archive")
+# {partition}.parquet or {partition}.{n}.parquet, e.g. predictions_y2025m03.1.parquet
+ARCHIVE_NAME = re.compile(r"_y(?P<year>\d{4})m(?P<month>\d{2})(\.\d+)?\.parquet$")
+
 
 # DATABASE MODELS
 
@@ -62,12 +84,16 @@ class Model(Base):
     mlflow_run_id = Column(String(255))
     
     # Configuration
-    config = Column(JSON)  # Store full config as JSON
+    config = Column(JSON)  # Store full config as JSON (incl. "feature_schema", see src/utils/vector_codec.py)
 
 
 class Prediction(Base):
     """Prediction logs"""
     __tablename__ = "predictions"
+    __table_args__ = (
+        Index("ix_predictions_model_id_timestamp", "model_id", "timestamp"),
+        Index("ix_predictions_user_id_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True)
     model_id = Column(Integer, nullable=False)
@@ -79,16 +105,23 @@ class Prediction(Base):
     confidence = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow)
     
-    # Features used
+    # Features used (legacy JSON; new rows use features_blob)
     features = Column(JSON)
     
-    # Explanation (SHAP values)
+    # Explanation (SHAP values; legacy JSON, new rows use explanation_blob)
     explanation = Column(JSON) # Store SHAP values/feature contributions for XAI transparency
+    
+    # Packed little-endian float32 vectors in the order of the model's feature schema
+    features_blob = Column(LargeBinary)
+    explanation_blob = Column(LargeBinary)
 
 
 class DriftAlert(Base):
     """Drift detection alerts"""
     __tablename__ = "drift_alerts"
+    __table_args__ = (
+        Index("ix_drift_alerts_model_id_detected_at", "model_id", "detected_at"),
+    )
     
     id = Column(Integer, primary_key=True)
     model_id = Column(Integer, nullable=False)
@@ -111,6 +144,9 @@ class DriftAlert(Base):
 class FairnessMetric(Base):
     """Fairness monitoring metrics"""
     __tablename__ = "fairness_metrics"
+    __table_args__ = (
+        Index("ix_fairness_metrics_model_id_measured_at", "model_id", "measured_at"),
+    )
     
     id = Column(Integer, primary_key=True)
     model_id = Column(Integer, nullable=False)
@@ -133,6 +169,11 @@ class FairnessMetric(Base):
 class UserInteraction(Base):
     """User interaction logs for feedback loop"""
     __tablename__ = "user_interactions"
+    __table_args__ = (
+        Index("ix_user_interactions_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_user_interactions_session_id", "session_id"),
+        Index("ix_user_interactions_timestamp", "timestamp"),  # retraining window scans
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255), nullable=False)
@@ -158,6 +199,9 @@ class UserInteraction(Base):
 class BusinessMetric(Base):
     """Business impact metrics"""
     __tablename__ = "business_metrics"
+    __table_args__ = (
+        Index("ix_business_metrics_model_id_metric_name_measured_at", "model_id", "metric_name", "measured_at"),
+    )
     
     id = Column(Integer, primary_key=True)
     model_id = Column(Integer, nullable=False)
@@ -206,31 +250,324 @@ class ComplianceReport(Base):
     pdf_path = Column(String(500))
 
 
+# PARTITIONING & RETENTION (PostgreSQL)
+
+def partitioned_metadata() -> MetaData:
+    """
+    PostgreSQL variants of the high-volume tables, range-partitioned by month.
+
+    A partitioned table's primary key must contain the partition key, so the
+    copies use ``(id, <timestamp>)``. The ORM keeps mapping the original
+    tables (identity by ``id``), which matches the same physical table.
+    """
+    metadata = MetaData()
+    for table_name, key in PARTITIONED_TABLES.items():
+        table = Base.metadata.tables[table_name].to_metadata(metadata)
+        table.c[key].nullable = False
+        table.c[key].primary_key = True
+        table.c.id.autoincrement = True
+        table.append_constraint(PrimaryKeyConstraint("id", key, name=f"{table_name}_pkey"))
+        table.dialect_options["postgresql"]["partition_by"] = f"RANGE ({key})"
+    return metadata
+
+
+def _month_start(moment: datetime, offset: int = 0) -> datetime:
+    month = moment.year * 12 + moment.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: datetime) -> str:
+    """Name of a monthly partition, e.g. ``predictions_y2025m03``."""
+    return f"{table_name}_y{month.year:04d}m{month.month:02d}"
+
+
+def ensure_partitions(
+    engine,
+    months_ahead: int = 3,
+    months_back: int = 0,
+    now: datetime = None,
+    tables=None,
+    parent_suffix: str = "",
+):
+    """
+    Create monthly partitions from ``months_back`` before to ``months_ahead``
+    after the current month, plus a DEFAULT partition per table.
+
+    Idempotent; run it from a daily job (or at startup) so future months
+    always exist before the first row arrives. No-op outside PostgreSQL.
+    ``parent_suffix`` attaches the partitions to a renamed parent (used by
+    online table rebuilds, see ``scripts/migrate.py``).
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    now = now or datetime.utcnow()
+    created = []
+    with engine.begin() as connection:
+        partitioned = {row[0] for row in connection.execute(text(
+            "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON p.partrelid = c.oid"
+        ))}
+        for table_name in tables or PARTITIONED_TABLES:
+            parent = f"{table_name}{parent_suffix}"
+            if parent not in partitioned:
+                # Created before partitioning was introduced; see scripts/migrate.py
+                logger.warning(f"Table {parent} is not partitioned; run scripts/migrate.py upgrade")
+                continue
+            for offset in range(-months_back, months_ahead + 1):
+                start, end = _month_start(now, offset), _month_start(now, offset + 1)
+                name = partition_name(table_name, start)
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+                ))
+                created.append(name)
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {parent} DEFAULT"
+            ))
+    logger.info(f"Partitions ensured through {_month_start(now, months_ahead):%Y-%m}")
+    return created
+
+
+def _monthly(names, table_name: str):
+    """The monthly partition names of ``table_name`` among ``names`` as (name, month start), oldest first."""
+    partitions = []
+    prefix = f"{table_name}_y"
+    for name in names:
+        if name.startswith(prefix) and len(name) == len(prefix) + 7:  # yYYYYmMM
+            partitions.append((name, datetime(int(name[-7:-3]), int(name[-2:]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def list_partitions(engine, table_name: str):
+    """Monthly partitions of ``table_name`` as (name, month start), oldest first."""
+    query = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table_name"
+    )
+    with engine.connect() as connection:
+        names = [row[0] for row in connection.execute(query, {"table_name": table_name})]
+    return _monthly(names, table_name)
+
+
+def _detached_partitions(engine, table_name: str):
+    """Monthly tables of ``table_name`` detached by an archive run that stopped before dropping them."""
+    query = text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+        "AND pg_table_is_visible(oid) AND starts_with(relname, :prefix)"
+    )
+    with engine.connect() as connection:
+        names = [row[0] for row in connection.execute(query, {"prefix": f"{table_name}_y"})]
+    return _monthly(names, table_name)
+
+
+def drain_default_partition(engine, table_name: str):
+    """
+    Move the rows of ``{table}_default`` into monthly partitions.
+
+    Rows land in the DEFAULT partition when their month had no partition yet
+    (late or back-dated writes). Each month found there gets a table filled
+    from the DEFAULT partition and attached as its monthly partition, so the
+    rows are archived with their month and ``ensure_partitions`` can create
+    that month later. The DEFAULT partition is locked for the move.
+
+    Returns:
+        Names of the partitions created
+    """
+    key = PARTITIONED_TABLES[table_name]
+    default = f"{table_name}_default"
+    columns = ", ".join(column.name for column in Base.metadata.tables[table_name].columns)
+    created = []
+    with engine.begin() as connection:
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": default}).scalar() is None:
+            return created
+        connection.execute(text(f"LOCK TABLE {default} IN ACCESS EXCLUSIVE MODE"))
+        months = connection.execute(text(f"SELECT DISTINCT date_trunc('month', {key}) FROM {default}")).scalars()
+        for start in sorted(months):
+            end = _month_start(start, 1)
+            name = partition_name(table_name, start)
+            connection.execute(text(
+                f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            connection.execute(text(
+                f"WITH moved AS (DELETE FROM {default} WHERE {key} >= :start AND {key} < :end RETURNING {columns}) "
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+            ), {"start": start, "end": end})
+            connection.execute(text(
+                f"ALTER TABLE {table_name} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            ))
+            created.append(name)
+    if created:
+        logger.info(f"Moved rows of {default} into {len(created)} monthly partitions")
+    return created
+
+
+def archive_schema(table_name: str):
+    """
+    Fixed Arrow schema of an archived partition, derived from the table definition.
+
+    JSON columns are stored as JSON text: psycopg2 returns them as dicts whose
+    inferred struct types differ from chunk to chunk (and are null in chunks
+    without values), so they cannot share one parquet schema.
+    """
+    import pyarrow as pa
+
+    types = [
+        (JSON, pa.string()),
+        (LargeBinary, pa.binary()),
+        (Boolean, pa.bool_()),
+        (Integer, pa.int64()),
+        (Float, pa.float64()),
+        (DateTime, pa.timestamp("us")),
+        (String, pa.string()),
+    ]
+    fields = []
+    for column in Base.metadata.tables[table_name].columns:
+        arrow_type = next((t for sql_type, t in types if isinstance(column.type, sql_type)), pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _archive_batch(chunk, table_name: str, schema):
+    """One chunk of ``SELECT *`` rows as an Arrow table of ``schema`` (JSON columns as text)."""
+    import pyarrow as pa
+
+    chunk = chunk.copy()
+    for column in Base.metadata.tables[table_name].columns:
+        if column.name not in chunk.columns:
+            chunk[column.name] = None
+        elif isinstance(column.type, JSON):
+            chunk[column.name] = chunk[column.name].map(
+                lambda value: None if value is None else json.dumps(value, default=str)
+            )
+    return pa.Table.from_pandas(chunk[schema.names], schema=schema, preserve_index=False)
+
+
+def archive_partitions(
+    engine,
+    hot_days: int = HOT_RETENTION_DAYS,
+    archive_dir: Path = ARCHIVE_DIR,
+    chunksize: int = 100_000,
+    now: datetime = None,
+):
+    """
+    Move partitions older than the hot window to parquet, then drop them.
+
+    A partition is archived once its whole month lies before ``now - hot_days``.
+    Rows of the DEFAULT partition are first moved into monthly partitions
+    (``drain_default_partition``) so they are archived too. Each partition is
+    detached before it is read, so no write can land in it during the export;
+    rows for its month that arrive later go to the DEFAULT partition and are
+    archived by a later run. The rows are exported to
+    ``{archive_dir}/{table}/{partition}.parquet`` (``{partition}.1.parquet``,
+    ... if that month was archived before) and the table is dropped only after
+    the file is complete, so retention never runs a ``DELETE`` over the live
+    table. Tables detached by an interrupted run are exported first.
+
+    Returns:
+        Paths of the written parquet files
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    if engine.dialect.name != "postgresql":
+        logger.info("Partition archiving requires PostgreSQL; skipping")
+        return []
+
+    cutoff = (now or datetime.utcnow()) - timedelta(days=hot_days)
+    archived = []
+    for table_name in PARTITIONED_TABLES:
+        schema = archive_schema(table_name)
+
+        def export_and_drop(name):
+            path = _archive_path(Path(archive_dir) / table_name, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.tmp")
+            n_rows = 0
+            with engine.connect() as connection, pq.ParquetWriter(tmp, schema) as writer:
+                for chunk in pd.read_sql(text(f"SELECT * FROM {name} ORDER BY id"), connection, chunksize=chunksize):
+                    writer.write_table(_archive_batch(chunk, table_name, schema))
+                    n_rows += len(chunk)
+            os.replace(tmp, path)
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Archived {n_rows:,} rows of {name} to {path}")
+            archived.append(path)
+
+        # Left detached by an interrupted run; exported before draining reuses their names
+        for name, _ in _detached_partitions(engine, table_name):
+            export_and_drop(name)
+
+        drain_default_partition(engine, table_name)
+        for name, month in list_partitions(engine, table_name):
+            if _month_start(month, 1) > cutoff:
+                continue
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+            export_and_drop(name)
+    return archived
+
+
+def _archive_path(directory: Path, name: str) -> Path:
+    """``{name}.parquet``, or ``{name}.{n}.parquet`` for a month archived before."""
+    path, n = directory / f"{name}.parquet", 0
+    while path.exists():
+        n += 1
+        path = directory / f"{name}.{n}.parquet"
+    return path
+
+
+def prune_archive(archive_dir: Path = ARCHIVE_DIR, years: int = COLD_RETENTION_YEARS, now: datetime = None):
+    """Delete archived partitions whose month ended more than ``years`` ago."""
+    now = now or datetime.utcnow()
+    cutoff = datetime(now.year - years, now.month, 1)
+    removed = []
+    for path in Path(archive_dir).glob("*/*_y*m*.parquet"):
+        match = ARCHIVE_NAME.search(path.name)
+        if match is None:
+            continue
+        month = datetime(int(match["year"]), int(match["month"]), 1)
+        if _month_start(month, 1) <= cutoff:
+            path.unlink()
+            removed.append(path)
+    if removed:
+        logger.info(f"Removed {len(removed)} archived partitions older than {years} years")
+    return removed
+
+
 # DATABASE INITIALIZATION
 
-def init_database(database_url: str = None):
+def init_database(database_url: str = None, **pool_kwargs):
     """
     Initialize database with all tables.
     
     Args:
         database_url: PostgreSQL connection string
                      If None, uses environment variable or SQLite fallback
+        **pool_kwargs: Pool settings for ``create_pooled_engine``
+                       (see ``src.utils.db.pool_config``)
     """
-    if database_url is None:
-        # Try environment variable first
-        database_url = os.getenv(
-            "DATABASE_URL",
-            "sqlite:///data/xae_frame.db"  # Fallback to SQLite
-        )
+    # Explicit URL, then DATABASE_URL, then the SQLite fallback
+    database_url = resolve_database_url(database_url)
     
     logger.info(f"Connecting to database: {database_url.split('@')[-1]}")  # Hide password
     
     try:
-        # Create engine
-        engine = create_engine(database_url)
+        # Create engine with the shared, instrumented connection pool
+        engine = create_pooled_engine(database_url, **pool_kwargs)
         
-        # Create all tables
-        Base.metadata.create_all(engine)
+        # Create all tables (high-volume ones partitioned by month on PostgreSQL)
+        if engine.dialect.name == "postgresql":
+            partitioned = partitioned_metadata()
+            partitioned.create_all(engine)
+            Base.metadata.create_all(
+                engine,
+                tables=[t for name, t in Base.metadata.tables.items() if name not in PARTITIONED_TABLES],
+            )
+            ensure_partitions(engine)
+        else:
+            Base.metadata.create_all(engine)
         
         logger.info("Database tables created successfully!")
         logger.info(f"  Tables: {list(Base.metadata.tables.keys())}")
@@ -261,11 +598,26 @@ def main():
         default=None,
         help="Database connection string (default: from .env or SQLite)"
     )
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=3,
+        help="Monthly partitions to create ahead of the current month (PostgreSQL)"
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help=f"Move partitions older than {HOT_RETENTION_DAYS} days to parquet and prune the cold archive"
+    )
     
     args = parser.parse_args()
     
     try:
         engine = init_database(args.database_url)
+        ensure_partitions(engine, months_ahead=args.months_ahead)
+        if args.archive:
+            archive_partitions(engine)
+            prune_archive()
         logger.info("Database initialization complete!")
         return 0
     except Exception as e:
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+XAE-Frame Schema Migrations
+Evolves the tables defined in scripts/init_db.py online (see src/utils/migrations.py).
+
+Migrations:
+    0001  Packed float32 feature/SHAP columns on predictions
+    0002  Backfill the packed columns from the legacy JSON columns
+    0003  Rebuild predictions, user_interactions and drift_alerts as
+          monthly partitioned tables (PostgreSQL only)
+    0004  Create the indexes declared on the ORM models
+
+Every migration is idempotent, so a database created by init_db.py only
+records them as applied.
+
+Usage:
+    python scripts/migrate.py status
+    python scripts/migrate.py upgrade --batch-size 10000 --sleep 0.1
+    python scripts/migrate.py upgrade --target 0002 --dry-run
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add repository root and scripts to path
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import Column, LargeBinary, text
+
+from init_db import Base, PARTITIONED_TABLES, ensure_partitions, init_database, partitioned_metadata
+from src.utils.migrations import Migration, MigrationRunner
+from src.utils.vector_codec import load_codecs
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# MIGRATIONS
+
+def add_prediction_blob_columns(ctx):
+    ctx.add_column("predictions", Column("features_blob", LargeBinary))
+    ctx.add_column("predictions", Column("explanation_blob", LargeBinary))
+
+
+def backfill_prediction_blobs(ctx):
+    codecs = load_codecs(ctx.engine)
+    skipped = {"rows": 0}
+
+    def load(value):
+        if isinstance(value, str):  # SQLite returns JSON as text in raw queries
+            value = json.loads(value)
+        return value
+
+    def encode(codec, value, current):
+        if current is not None or value is None:
+            return current
+        return codec.encode(load(value))
+
+    def encode_explanation(codec, value, current):
+        if current is not None or value is None:
+            return current
+        return codec.encode_explanation_value(load(value))
+
+    def transform(rows):
+        updates = []
+        for row in rows:
+            codec = codecs.get(row["model_id"])
+            if codec is None:
+                skipped["rows"] += 1
+                continue
+            try:
+                updates.append({
+                    "id": row["id"],
+                    "features_blob": encode(codec, row["features"], row["features_blob"]),
+                    "explanation_blob": encode_explanation(codec, row["explanation"], row["explanation_blob"]),
+                })
+            except ValueError:
+                skipped["rows"] += 1  # JSON does not match the model's feature schema
+        return updates
+
+    ctx.backfill(
+        "predictions",
+        ["model_id", "features", "explanation", "features_blob", "explanation_blob"],
+        transform,
+        where="(features_blob IS NULL AND features IS NOT NULL) "
+              "OR (explanation_blob IS NULL AND explanation IS NOT NULL)",
+    )
+    if skipped["rows"]:
+        logger.warning(f"{skipped['rows']:,} predictions kept JSON only (no matching feature schema)")
+
+
+def partition_high_volume_tables(ctx):
+    if ctx.dialect != "postgresql":
+        logger.info("Partitioning requires PostgreSQL; skipping")
+        return
+
+    targets = partitioned_metadata()
+    for table_name, key in PARTITIONED_TABLES.items():
+        if ctx.is_partitioned(table_name):
+            continue
+        # The partition key becomes part of the primary key, so it must be set
+        ctx.backfill_sql(table_name, f"{key} = CURRENT_TIMESTAMP", where=f"{key} IS NULL",
+                         name=f"null_{key}_{table_name}")
+
+        with ctx.engine.connect() as connection:
+            months_back = connection.execute(text(
+                f"SELECT COALESCE((EXTRACT(YEAR FROM AGE(date_trunc('month', now()), "
+                f"date_trunc('month', MIN({key})))) * 12 + EXTRACT(MONTH FROM AGE(date_trunc('month', now()), "
+                f"date_trunc('month', MIN({key})))))::int, 0) FROM {table_name}"
+            )).scalar()
+
+        def create_partitions(ctx, new_name, table_name=table_name, months_back=months_back):
+            ensure_partitions(ctx.engine, months_back=months_back, tables=[table_name], parent_suffix="__new")
+
+        ctx.rebuild_table(targets.tables[table_name], before_copy=create_partitions)
+
+
+def create_model_indexes(ctx):
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            ctx.create_index(index)
+
+
+MIGRATIONS = [
+    Migration("0001", "Packed float32 feature/SHAP columns on predictions", add_prediction_blob_columns),
+    Migration("0002", "Backfill packed columns from legacy JSON", backfill_prediction_blobs),
+    Migration("0003", "Monthly partitioning of high-volume tables (PostgreSQL)", partition_high_volume_tables),
+    Migration("0004", "Indexes declared on the ORM models", create_model_indexes),
+]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Apply XAE-Frame schema migrations online")
+    parser.add_argument("--database-url", type=str, default=None,
+                        help="Database connection string (default: from .env or SQLite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="List migrations and their state")
+
+    upgrade = commands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade.add_argument("--target", type=str, default=None, help="Last version to apply")
+    upgrade.add_argument("--batch-size", type=int, default=5000, help="Rows per backfill/copy batch")
+    upgrade.add_argument("--sleep", type=float, default=0.05, help="Pause between batches (seconds)")
+    upgrade.add_argument("--dry-run", action="store_true", help="Only list what would be applied")
+
+    args = parser.parse_args()
+
+    try:
+        # Creates missing tables; existing ones are left to the migrations
+        engine = init_database(args.database_url)
+
+        if args.command == "status":
+            for row in MigrationRunner(engine, MIGRATIONS).status():
+                applied = f"  {row['applied_at']:%Y-%m-%d %H:%M}" if row["applied_at"] else ""
+                print(f"{row['version']}  {row['state']:<11}  {row['description']}{applied}")
+            return 0
+
+        runner = MigrationRunner(engine, MIGRATIONS, batch_size=args.batch_size, sleep=args.sleep)
+        versions = runner.upgrade(target=args.target, dry_run=args.dry_run)
+        if args.dry_run:
+            logger.info(f"Would apply: {', '.join(versions) or 'nothing'}")
+        else:
+            logger.info(f"✓ Applied {len(versions)} migrations")
+        return 0
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,407 @@
+"""
+Vectorized two-sample KS drift scans over every feature column at once.
+
+Calling ``scipy.stats.ks_2samp`` per column is thousands of calls per check
+once TF-IDF features (``max_features: 5000``) are included, and again for
+every segment. ``BatchDriftTester`` computes all columns in one pass:
+
+    dense    reference and current rows of a column chunk are stacked and
+             argsorted column-wise once; signed weights (+1/n reference,
+             -1/m current) are cumulatively summed down each column, so the
+             ECDF difference at every tie boundary, and its maximum |D|,
+             come out of a few NumPy calls
+    sparse   columns are never densified: stored non-zeros are packed into
+             (column, value, sample) integer keys and sorted; the reference
+             keys are sorted once in ``fit_reference`` and each scan merges
+             the current keys in linear time. Implicit zeros are one jump of
+             the ECDF difference per column. Cost O(nnz log nnz) per window
+
+P-values use the Kolmogorov limiting distribution at the effective sample
+size with Stephens' small-sample correction (as ``drift_detection.ks_pvalue``),
+then Benjamini-Hochberg or Bonferroni correction across columns. With heavy ties
+(e.g. TF-IDF zeros) the test is conservative.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy import special
+
+from ..xai.global_importance import segment_name
+
+logger = logging.getLogger(__name__)
+
+CORRECTIONS = ["bh", "bonferroni", "none"]
+
+ALL_SEGMENT = "all"
+
+
+def adjust_pvalues(p_values: np.ndarray, method: str = "bh") -> np.ndarray:
+    """
+    Multiple-testing adjusted p-values.
+
+    Args:
+        p_values: Raw p-values (NaN entries are ignored and kept NaN)
+        method: "bh" (Benjamini-Hochberg FDR), "bonferroni" (FWER) or "none"
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown multiple-testing correction: {method}")
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = p_values.copy()
+    valid = ~np.isnan(p_values)
+    p = p_values[valid]
+    n_tests = len(p)
+    if method == "none" or n_tests == 0:
+        return adjusted
+
+    if method == "bonferroni":
+        adjusted[valid] = np.minimum(p * n_tests, 1.0)
+        return adjusted
+
+    order = np.argsort(p)
+    ranked = p[order] * n_tests / np.arange(1, n_tests + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]  # enforce monotonicity
+    result = np.empty(n_tests)
+    result[order] = np.minimum(ranked, 1.0)
+    adjusted[valid] = result
+    return adjusted
+
+
+def ks_pvalues(statistics: np.ndarray, n_reference: np.ndarray, n_current: np.ndarray) -> np.ndarray:
+    """Asymptotic two-sample KS p-values, vectorized over columns."""
+    n_reference = np.asarray(n_reference, dtype=np.float64)
+    n_current = np.asarray(n_current, dtype=np.float64)
+    p_values = np.full(np.shape(statistics), np.nan)
+    valid = (n_reference > 0) & (n_current > 0)
+    effective = np.sqrt(n_reference[valid] * n_current[valid] / (n_reference[valid] + n_current[valid]))
+    # Stephens' correction of the limiting distribution (``kstwo.sf`` is far too slow per column)
+    scaled = (effective + 0.12 + 0.11 / effective) * np.asarray(statistics)[valid]
+    p_values[valid] = np.clip(special.kolmogorov(scaled), 0.0, 1.0)
+    return p_values
+
+
+def ks_dense(reference: np.ndarray, current: np.ndarray, chunk_columns: int = 256) -> tuple:
+    """
+    KS statistics of every column of two dense matrices (NaNs ignored).
+
+    Returns:
+        (statistics, non-NaN reference counts, non-NaN current counts) per column
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    n, m = len(reference), len(current)
+    n_features = reference.shape[1]
+    statistics = np.zeros(n_features)
+    n_ref = np.sum(~np.isnan(reference), axis=0)
+    n_cur = np.sum(~np.isnan(current), axis=0)
+
+    for start in range(0, n_features, chunk_columns):
+        end = min(start + chunk_columns, n_features)
+        stacked = np.concatenate([reference[:, start:end], current[:, start:end]])
+        order = np.argsort(stacked, axis=0, kind="stable")  # NaNs sort last
+        values = np.take_along_axis(stacked, order, axis=0)
+
+        with np.errstate(divide="ignore"):
+            weights = np.where(order < n, 1.0 / n_ref[start:end], -1.0 / n_cur[start:end])
+        weights[np.isnan(values)] = 0.0
+        difference = np.cumsum(weights, axis=0)
+
+        # Only compare ECDFs after the last of a run of tied values
+        boundary = np.ones_like(values, dtype=bool)
+        boundary[:-1] = values[1:] != values[:-1]
+        statistics[start:end] = np.max(np.abs(difference) * boundary, axis=0)
+
+    empty = (n_ref == 0) | (n_cur == 0)
+    statistics[empty] = 0.0
+    return statistics, n_ref, n_cur
+
+
+@dataclass
+class SparseSample:
+    """
+    Stored non-zeros of a sparse matrix as sorted packed ``uint64`` keys.
+
+    Each key holds (column, order-preserving value bits, sample bit) from the
+    most to the least significant bit, so one sort orders entries by column
+    and then value. Values are truncated to the bits left after the column
+    and sample bits (~12 significant digits for 5000 columns); closer values
+    count as ties.
+    """
+
+    keys: np.ndarray
+    nnz: np.ndarray
+    n_rows: int
+    n_features: int
+
+
+def sparse_sample(matrix: sp.spmatrix, sample_bit: int = 0) -> SparseSample:
+    """Sorted keys of ``matrix`` (sample bit 0 = reference, 1 = current)."""
+    matrix = _csc(matrix)
+    n_features = matrix.shape[1]
+    shift = _column_shift(n_features)
+    nnz = np.diff(matrix.indptr)
+    columns = np.repeat(np.arange(n_features, dtype=np.uint64), nnz)
+    keys = (columns << shift) | _value_bits(matrix.data, shift) | np.uint64(sample_bit)
+    keys.sort()
+    return SparseSample(keys, nnz, matrix.shape[0], n_features)
+
+
+def ks_sparse(
+    reference: Union[sp.spmatrix, SparseSample],
+    current: Union[sp.spmatrix, SparseSample],
+) -> tuple:
+    """
+    KS statistics of every column of two sparse matrices without densifying.
+
+    Only stored non-zeros are sorted (a presorted reference ``SparseSample``
+    is merged in linear time); implicit zeros enter each column as one jump
+    of the ECDF difference at 0.
+
+    Returns:
+        (statistics, reference row count, current row count) per column
+    """
+    reference = reference if isinstance(reference, SparseSample) else sparse_sample(reference, 0)
+    current = current if isinstance(current, SparseSample) else sparse_sample(current, 1)
+    n, m = reference.n_rows, current.n_rows
+    n_features = reference.n_features
+    shift = _column_shift(n_features)
+
+    keys = np.concatenate([reference.keys, current.keys])
+    keys.sort(kind="stable")  # two sorted runs: a linear merge
+
+    weights = np.where(keys & np.uint64(1), -1.0 / m, 1.0 / n)
+    difference = np.cumsum(weights)
+    column_keys = np.arange(n_features, dtype=np.uint64) << shift
+    starts = np.searchsorted(keys, column_keys)
+    counts = np.diff(np.append(starts, len(keys)))
+    # Restart the running sum at each column
+    difference -= np.repeat(np.concatenate([[0.0], difference])[starts], counts)
+
+    # Implicit zeros: one jump of the ECDF difference, right after the negative values
+    zero_jump = (n - reference.nnz) / n - (m - current.nnz) / m
+    zero_positions = np.searchsorted(keys, column_keys | _value_bits(np.zeros(1), shift)[0])
+    before_zero = np.where(
+        zero_positions > starts, np.concatenate([[0.0], difference])[zero_positions], 0.0
+    )
+    jumps = np.zeros(len(keys) + 1)
+    np.add.at(jumps, zero_positions, zero_jump)
+    np.add.at(jumps, starts + counts, -zero_jump)
+    difference += np.cumsum(jumps)[:-1]
+
+    # Only compare ECDFs after the last of a run of tied values
+    values = keys >> np.uint64(1)
+    boundary = np.ones(len(keys), dtype=bool)
+    boundary[:-1] = values[1:] != values[:-1]
+
+    statistics = np.abs(before_zero + zero_jump)
+    nonempty = counts > 0
+    if nonempty.any():
+        maxima = np.maximum.reduceat(np.abs(difference) * boundary, starts[nonempty])
+        statistics[nonempty] = np.maximum(statistics[nonempty], maxima)
+    return statistics, np.full(n_features, n), np.full(n_features, m)
+
+
+def _column_shift(n_features: int) -> np.uint64:
+    """Bit position of the column id inside a packed key."""
+    return np.uint64(64 - max(int(n_features - 1).bit_length(), 1))
+
+
+def _value_bits(values: np.ndarray, shift: np.uint64) -> np.ndarray:
+    """Order-preserving float64 bits, truncated below the column bits, sample bit cleared."""
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.uint64)
+    sign = np.uint64(1) << np.uint64(63)
+    ordered = np.where(bits & sign, ~bits, bits | sign)
+    drop = np.uint64(64) - shift + np.uint64(1)
+    return (ordered >> drop) << np.uint64(1)
+
+
+@dataclass
+class DriftScan:
+    """KS results of one segment across all feature columns."""
+
+    segment: str
+    feature_names: List[str]
+    statistic: np.ndarray
+    p_value: np.ndarray
+    p_adjusted: np.ndarray
+    drifted: np.ndarray
+    n_reference: np.ndarray
+    n_current: np.ndarray
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "segment": self.segment,
+            "feature": self.feature_names,
+            "statistic": self.statistic,
+            "p_value": self.p_value,
+            "p_adjusted": self.p_adjusted,
+            "drifted": self.drifted,
+            "n_reference": self.n_reference,
+            "n_current": self.n_current,
+        })
+
+    def drifted_features(self) -> List[Dict[str, Any]]:
+        """Drifted columns, most significant first (``affected_features`` format)."""
+        indices = np.flatnonzero(self.drifted)
+        indices = indices[np.argsort(self.p_adjusted[indices], kind="stable")]
+        return [
+            {"name": self.feature_names[i], "test": "ks", "statistic": float(self.statistic[i]),
+             "p_value": float(self.p_value[i]), "p_adjusted": float(self.p_adjusted[i]), "segment": self.segment}
+            for i in indices
+        ]
+
+
+class BatchDriftTester:
+    """
+    Column-wise KS drift scan over a reference matrix, overall and per segment.
+
+    Example:
+        tester = BatchDriftTester.from_config(config, feature_names)
+        tester.fit_reference(X_train, groups={"device_type": train_devices})
+        scans = tester.scan(X_window, groups={"device_type": window_devices})
+        scans["all"].drifted_features()
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        alpha: float = 0.05,
+        correction: str = "bh",
+        chunk_columns: int = 256,
+        min_samples: int = 30,
+    ):
+        """
+        Initialize tester.
+
+        Args:
+            feature_names: Column names of the matrices
+            alpha: Significance level of the adjusted p-values (``drift_threshold``)
+            correction: "bh", "bonferroni" or "none"
+            chunk_columns: Dense columns sorted per chunk (bounds memory)
+            min_samples: Minimum rows per side for a segment to be tested
+        """
+        if correction not in CORRECTIONS:
+            raise ValueError(f"Unknown multiple-testing correction: {correction}")
+        self.feature_names = list(feature_names)
+        self.alpha = alpha
+        self.correction = correction
+        self.chunk_columns = chunk_columns
+        self.min_samples = min_samples
+
+        self.reference: Optional[Union[np.ndarray, sp.csc_matrix]] = None
+        self._reference_sample: Optional[SparseSample] = None
+        self.reference_groups: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], feature_names: Sequence[str], **kwargs: Any) -> "BatchDriftTester":
+        """Build a tester from the ``adaptive.drift_detection`` config block."""
+        drift = config.get("adaptive", {}).get("drift_detection", {})
+        kwargs.setdefault("alpha", drift.get("drift_threshold", 0.05))
+        if "correction" in drift:
+            kwargs.setdefault("correction", drift["correction"])
+        return cls(feature_names, **kwargs)
+
+    def fit_reference(
+        self,
+        reference: Union[np.ndarray, pd.DataFrame, sp.spmatrix],
+        groups: Optional[Dict[str, np.ndarray]] = None,
+    ) -> "BatchDriftTester":
+        """Store the reference matrix (converted once) and its segment labels."""
+        self.reference = self._prepare(reference)
+        # Sorted once; every scan merges the current window into it
+        self._reference_sample = sparse_sample(self.reference) if sp.issparse(self.reference) else None
+        self.reference_groups = {k: np.asarray(v) for k, v in (groups or {}).items()}
+        return self
+
+    def scan(
+        self,
+        current: Union[np.ndarray, pd.DataFrame, sp.spmatrix],
+        groups: Optional[Dict[str, np.ndarray]] = None,
+    ) -> Dict[str, DriftScan]:
+        """
+        Test every column overall and within each segment.
+
+        Args:
+            current: Current window, same columns as the reference
+            groups: Attribute -> per-row label of ``current`` (attributes
+                    must also have been given to ``fit_reference``)
+
+        Returns:
+            Segment name ("all", "attr=label") -> DriftScan
+        """
+        if self.reference is None:
+            raise RuntimeError("Call fit_reference() before scan()")
+        current = self._prepare(current)
+        # Test in the reference's representation (sparse windows of a dense
+        # reference are densified; dense windows of a sparse reference must not contain NaN)
+        if sp.issparse(self.reference) and not sp.issparse(current):
+            current = _csc(sp.csc_matrix(current))
+        elif not sp.issparse(self.reference) and sp.issparse(current):
+            current = current.toarray()
+        reference = self.reference if self._reference_sample is None else self._reference_sample
+        scans = {ALL_SEGMENT: self._test(ALL_SEGMENT, reference, current)}
+
+        for attribute, labels in (groups or {}).items():
+            if attribute not in self.reference_groups:
+                raise KeyError(f"No reference labels for segment attribute: {attribute}")
+            labels = np.asarray(labels)
+            reference_labels = self.reference_groups[attribute]
+            for label in np.unique(labels):
+                ref_rows = np.flatnonzero(reference_labels == label)
+                cur_rows = np.flatnonzero(labels == label)
+                if len(ref_rows) < self.min_samples or len(cur_rows) < self.min_samples:
+                    continue
+                name = segment_name(attribute, label)
+                scans[name] = self._test(name, self.reference[ref_rows], current[cur_rows])
+
+        n_drifted = {name: int(scan.drifted.sum()) for name, scan in scans.items()}
+        logger.info(f"Drift scan of {len(self.feature_names)} features over {len(scans)} segments: {n_drifted}")
+        return scans
+
+    def _test(self, segment: str, reference, current) -> DriftScan:
+        if sp.issparse(current):
+            statistic, n_ref, n_cur = ks_sparse(reference, current)
+        else:
+            statistic, n_ref, n_cur = ks_dense(reference, current, self.chunk_columns)
+        p_value = ks_pvalues(statistic, n_ref, n_cur)
+        p_adjusted = adjust_pvalues(p_value, self.correction)
+        return DriftScan(
+            segment=segment,
+            feature_names=self.feature_names,
+            statistic=statistic,
+            p_value=p_value,
+            p_adjusted=p_adjusted,
+            drifted=np.nan_to_num(p_adjusted, nan=1.0) < self.alpha,
+            n_reference=np.asarray(n_ref),
+            n_current=np.asarray(n_cur),
+        )
+
+    def _prepare(self, matrix):
+        if isinstance(matrix, pd.DataFrame):
+            matrix = matrix[self.feature_names].to_numpy(dtype=np.float64)
+        if sp.issparse(matrix):
+            matrix = _csc(matrix)
+        else:
+            matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} columns, got {matrix.shape[1]}")
+        return matrix
+
+
+def _csc(matrix: sp.spmatrix) -> sp.csc_matrix:
+    """
+    Canonical float64 CSC matrix without explicit zeros (they are counted as
+    implicit zeros). Matrices already in that form are returned as is.
+    """
+    if not (sp.issparse(matrix) and matrix.format == "csc" and matrix.dtype == np.float64
+            and matrix.has_canonical_format and not (matrix.data == 0).any()):
+        matrix = sp.csc_matrix(matrix, dtype=np.float64, copy=True)
+        matrix.eliminate_zeros()
+        matrix.sum_duplicates()
+    if np.isnan(matrix.data).any():
+        raise ValueError("Sparse drift scan does not support NaN values")
+    return matrix
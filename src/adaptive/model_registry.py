@@ -0,0 +1,236 @@
+"""
+Model registry for champion/challenger rollout (README 2C).
+
+``FilesystemRegistry`` needs no tracking server, so retraining can run and be
+tested offline:
+
+    {root}/{domain}/versions/v0001/model.txt   LightGBM model file
+    {root}/{domain}/versions/v0001/meta.json   metrics, retrain mode, models.id
+                                               (``models.version`` is "{domain}-v0001")
+    {root}/{domain}/state.json                 champion, challenger + traffic
+                                               share, promotion history
+
+``state.json`` is replaced atomically, so a serving process reading it (see
+``route``) never sees a half-written rollout. ``MlflowRegistry`` keeps the same
+layout and additionally logs every registered version as an MLflow run in
+``model.mlflow_experiment``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_DIR = Path("data/registry")
+
+MODEL_FILE = "model.txt"
+META_FILE = "meta.json"
+STATE_FILE = "state.json"
+
+
+def qualified_version(domain: str, version: str) -> str:
+    """
+    Globally unique name of a registry version, e.g. "e_commerce-v0003".
+
+    Registry versions are numbered per domain, but ``models.version`` is a key
+    across domains (SHAP engine, precompute stores, kernel cache), so rows
+    written for registry versions use this name.
+    """
+    return f"{domain}-{version}"
+
+
+class FilesystemRegistry:
+    """
+    Versioned LightGBM models per domain with champion/challenger state.
+
+    Example:
+        registry = FilesystemRegistry("data/registry")
+        version = registry.register("e_commerce", booster, {"metrics": {"rmse": 0.81}})
+        registry.start_challenger("e_commerce", version, traffic=0.10)
+        registry.route("e_commerce", user_id)      # champion for ~90% of users
+        registry.promote("e_commerce", version)    # or registry.rollback("e_commerce")
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_REGISTRY_DIR):
+        self.root = Path(root)
+        self._state_cache: Dict[str, tuple] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "FilesystemRegistry":
+        """Build the registry configured in ``adaptive.scheduler`` (filesystem or MLflow)."""
+        scheduler = config.get("adaptive", {}).get("scheduler", {})
+        kwargs.setdefault("root", scheduler.get("registry_dir", DEFAULT_REGISTRY_DIR))
+        if scheduler.get("registry", "filesystem") == "mlflow":
+            kwargs.setdefault("experiment", config.get("model", {}).get("mlflow_experiment"))
+            return MlflowRegistry(**kwargs)
+        return cls(**kwargs)
+
+    # VERSIONS
+
+    def register(self, domain: str, booster: Any, meta: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store a new model version.
+
+        Args:
+            domain: Domain name (e.g. "e_commerce")
+            booster: Trained ``lightgbm.Booster``
+            meta: JSON-serializable metadata (metrics, retrain mode, ...)
+
+        Returns:
+            Version name, e.g. "v0003"
+        """
+        versions_dir = self.root / domain / "versions"
+        versions_dir.mkdir(parents=True, exist_ok=True)
+        number = max((int(p.name[1:]) for p in versions_dir.glob("v[0-9]*")), default=0) + 1
+        version = f"v{number:04d}"
+
+        staging = versions_dir / f".{version}.tmp-{os.getpid()}"
+        staging.mkdir()
+        booster.save_model(str(staging / MODEL_FILE))
+        meta = {"version": version, "domain": domain, "created_at": datetime.utcnow().isoformat(), **(meta or {})}
+        with open(staging / META_FILE, "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+        os.replace(staging, versions_dir / version)
+
+        logger.info(f"✓ Registered {domain} {version}")
+        return version
+
+    def versions(self, domain: str) -> List[str]:
+        return sorted(p.name for p in (self.root / domain / "versions").glob("v[0-9]*"))
+
+    def model_path(self, domain: str, version: str) -> Path:
+        return self.root / domain / "versions" / version / MODEL_FILE
+
+    def load(self, domain: str, version: Optional[str] = None):
+        """Load a version (default: the champion) as a ``lightgbm.Booster``, or None."""
+        import lightgbm as lgb
+
+        version = version or self.champion(domain)
+        if version is None:
+            return None
+        return lgb.Booster(model_file=str(self.model_path(domain, version)))
+
+    def metadata(self, domain: str, version: str) -> Dict[str, Any]:
+        with open(self.root / domain / "versions" / version / META_FILE) as f:
+            return json.load(f)
+
+    def update_metadata(self, domain: str, version: str, **updates: Any) -> Dict[str, Any]:
+        meta = {**self.metadata(domain, version), **updates}
+        path = self.root / domain / "versions" / version / META_FILE
+        tmp = path.with_suffix(f".json.tmp-{os.getpid()}")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+        os.replace(tmp, path)
+        return meta
+
+    # ROLLOUT STATE
+
+    def state(self, domain: str) -> Dict[str, Any]:
+        """Current rollout state (re-read only when ``state.json`` changed)."""
+        path = self.root / domain / STATE_FILE
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {"champion": None, "challenger": None, "challenger_traffic": 0.0, "history": []}
+        cached = self._state_cache.get(domain)
+        if cached is None or cached[0] != mtime:
+            with open(path) as f:
+                cached = (mtime, json.load(f))
+            self._state_cache[domain] = cached
+        return cached[1]
+
+    def champion(self, domain: str) -> Optional[str]:
+        return self.state(domain)["champion"]
+
+    def challenger(self, domain: str) -> Optional[str]:
+        return self.state(domain)["challenger"]
+
+    def start_challenger(self, domain: str, version: str, traffic: float = 0.10) -> None:
+        """Route ``traffic`` of requests to ``version`` next to the champion."""
+        self._transition(domain, "challenger", version, challenger=version, challenger_traffic=traffic)
+
+    def promote(self, domain: str, version: str) -> None:
+        """Make ``version`` the champion and end any challenger test."""
+        self._transition(domain, "promote", version, champion=version, challenger=None, challenger_traffic=0.0)
+
+    def rollback(self, domain: str) -> Optional[str]:
+        """
+        Drop the challenger (or, without one, restore the previous champion).
+
+        Returns:
+            The version serving all traffic afterwards
+        """
+        state = self.state(domain)
+        if state["challenger"] is not None:
+            self._transition(domain, "reject", state["challenger"], challenger=None, challenger_traffic=0.0)
+            return state["champion"]
+
+        champions: List[str] = []
+        for entry in state["history"]:
+            if entry["action"] == "promote":
+                champions.append(entry["version"])
+            elif entry["action"] == "rollback":
+                champions.pop()
+        if len(champions) < 2:
+            raise ValueError(f"No previous champion to roll back to for {domain}")
+        self._transition(domain, "rollback", champions[-1], champion=champions[-2])
+        return champions[-2]
+
+    def route(self, domain: str, key: Any) -> Optional[str]:
+        """
+        Version serving ``key`` (e.g. a user id).
+
+        Keys are hashed into [0, 1), so a user stays in the same arm for the
+        whole test and the challenger gets ``challenger_traffic`` of users.
+        """
+        state = self.state(domain)
+        if state["challenger"] is None:
+            return state["champion"]
+        digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+        bucket = int.from_bytes(digest, "big") / 2 ** 64
+        return state["challenger"] if bucket < state["challenger_traffic"] else state["champion"]
+
+    def _transition(self, domain: str, action: str, version: str, **changes: Any) -> None:
+        state = {**self.state(domain), **changes}
+        state["history"] = state["history"] + [
+            {"action": action, "version": version, "at": datetime.utcnow().isoformat()}
+        ]
+        path = self.root / domain / STATE_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".json.tmp-{os.getpid()}")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+        logger.info(f"{domain}: {action} {version}")
+
+
+class MlflowRegistry(FilesystemRegistry):
+    """Filesystem registry that also logs each version as an MLflow run."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_REGISTRY_DIR, experiment: Optional[str] = None,
+                 tracking_uri: Optional[str] = None):
+        super().__init__(root)
+        self.experiment = experiment
+        self.tracking_uri = tracking_uri
+
+    def register(self, domain: str, booster: Any, meta: Optional[Dict[str, Any]] = None) -> str:
+        import mlflow
+
+        if self.tracking_uri:
+            mlflow.set_tracking_uri(self.tracking_uri)
+        if self.experiment:
+            mlflow.set_experiment(self.experiment)
+
+        meta = dict(meta or {})
+        with mlflow.start_run(run_name=f"{domain}-retrain") as run:
+            meta["mlflow_run_id"] = run.info.run_id
+            version = super().register(domain, booster, meta)
+            mlflow.set_tags({"domain": domain, "version": version, "mode": meta.get("mode", "")})
+            mlflow.log_metrics({k: float(v) for k, v in meta.get("metrics", {}).items()})
+            mlflow.log_artifact(str(self.model_path(domain, version)))
+        return version
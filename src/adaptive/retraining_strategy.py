@@ -0,0 +1,374 @@
+"""
+Automated retraining for XAE-Frame (README 2C).
+
+Every trigger (drift, performance drop >10%, ``max_model_age_days``) used to
+mean a full retrain on the ``data_window_days`` window. ``RetrainingEngine``
+adds the ``adaptive.retraining.incremental`` path:
+
+    incremental  continue boosting from the champion (LightGBM
+                 ``init_model``) on the rows collected since it was trained;
+                 ``incremental_rounds`` trees are added, so time and CPU scale
+                 with the new rows, not with the window
+    full         retrain from scratch on the window; chosen when the drift
+                 magnitude (largest KS statistic) reaches
+                 ``full_retrain_drift``, when there is no champion, or when
+                 warm starts would grow the ensemble past ``max_trees``
+
+In both modes rows are weighted by recency with the feedback loop's
+``decay_factor`` (weight ``decay_factor ** age_in_days``) when
+``weight_recent`` is set. The full window is only loaded when a full retrain
+is decided, so callers can pass it as a callable.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .batch_drift import DriftScan
+from .drift_detection import DriftResult
+
+logger = logging.getLogger(__name__)
+
+RETRAIN_MODES = ["none", "incremental", "full"]
+
+# Metrics where a larger value is better (everything else is treated as a loss)
+HIGHER_IS_BETTER = {"auc", "accuracy", "precision", "recall", "f1", "ndcg", "map", "average_precision"}
+
+DriftInput = Union[None, float, Sequence[DriftResult], DriftScan, Mapping[str, DriftScan]]
+
+
+@dataclass
+class TrainingData:
+    """Features, labels and (optionally) event timestamps for recency weights."""
+
+    X: Union[np.ndarray, pd.DataFrame]
+    y: np.ndarray
+    timestamps: Optional[Union[np.ndarray, pd.Series]] = None
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+
+@dataclass
+class RetrainDecision:
+    """Whether and how to retrain, with the triggers that fired."""
+
+    mode: str
+    reasons: List[str] = field(default_factory=list)
+    drift_magnitude: float = 0.0
+
+
+@dataclass
+class RetrainResult:
+    """Outcome of one retraining run."""
+
+    booster: Any
+    mode: str
+    reasons: List[str]
+    n_rows: int
+    rounds_added: int
+    num_trees: int
+    wall_seconds: float
+    cpu_seconds: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "reasons": self.reasons,
+            "n_rows": self.n_rows,
+            "rounds_added": self.rounds_added,
+            "num_trees": self.num_trees,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+        }
+
+
+def recency_weights(
+    timestamps: Union[np.ndarray, pd.Series, Sequence[datetime]],
+    decay_factor: float = 0.95,
+    now: Optional[datetime] = None,
+    period: pd.Timedelta = pd.Timedelta(days=1),
+) -> np.ndarray:
+    """
+    Exponential recency weights ``decay_factor ** (age / period)``.
+
+    Args:
+        timestamps: Event time of every row
+        decay_factor: Weight multiplier per elapsed ``period``
+        now: Reference time (default: newest timestamp)
+        period: Age unit of the decay
+
+    Returns:
+        float64 weights in (0, 1]; future rows get weight 1
+    """
+    times = pd.to_datetime(pd.Series(np.asarray(timestamps)))
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+    now = pd.Timestamp(now) if now is not None else times.max()
+    if now.tzinfo is not None:
+        now = now.tz_convert(None)
+    age = ((now - times) / period).to_numpy(dtype=np.float64)
+    return np.power(decay_factor, np.clip(np.nan_to_num(age, nan=0.0), 0.0, None))
+
+
+def drift_magnitude(drift: DriftInput) -> float:
+    """
+    Largest feature KS statistic in drift results.
+
+    Accepts a number, ``StreamingDriftDetector.check()`` results, a
+    ``DriftScan`` or ``BatchDriftTester.scan()`` output.
+    """
+    if drift is None:
+        return 0.0
+    if isinstance(drift, (int, float)):
+        return float(drift)
+    if isinstance(drift, DriftScan):
+        return float(np.nanmax(drift.statistic, initial=0.0))
+    if isinstance(drift, Mapping):
+        return max((drift_magnitude(scan) for scan in drift.values()), default=0.0)
+    return max((r.statistic for r in drift if r.kind == "feature"), default=0.0)
+
+
+def drift_detected(drift: DriftInput) -> bool:
+    """True if any stream/column was flagged (a bare magnitude counts if positive)."""
+    if drift is None:
+        return False
+    if isinstance(drift, (int, float)):
+        return float(drift) > 0
+    if isinstance(drift, DriftScan):
+        return bool(drift.drifted.any())
+    if isinstance(drift, Mapping):
+        return any(drift_detected(scan) for scan in drift.values())
+    return any(r.drifted for r in drift)
+
+
+class RetrainingEngine:
+    """
+    Decides between no retrain, warm start and full retrain, and runs it.
+
+    Example:
+        engine = RetrainingEngine.from_config(config)
+        decision = engine.decide(champion, drift=detector.check(),
+                                 performance=0.91, baseline_performance=0.80,
+                                 model_age_days=12)
+        result = engine.retrain(decision, champion,
+                                new_data=TrainingData(X_new, y_new, ts_new),
+                                full_data=lambda: load_window(days=90))
+        challenger = result.booster
+    """
+
+    def __init__(
+        self,
+        params: Optional[Dict[str, Any]] = None,
+        num_boost_round: int = 100,
+        incremental: bool = True,
+        incremental_rounds: int = 20,
+        decay_factor: float = 0.95,
+        weight_recent: bool = True,
+        full_retrain_drift: float = 0.3,
+        performance_drop: float = 0.10,
+        max_model_age_days: Optional[float] = 30,
+        max_trees: Optional[int] = None,
+        metric: str = "rmse",
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            params: LightGBM parameters (``model.lightgbm`` without ``n_estimators``)
+            num_boost_round: Trees of a full retrain
+            incremental: Allow warm starts (``adaptive.retraining.incremental``)
+            incremental_rounds: Trees added per warm start
+            decay_factor: Per-day recency weight multiplier (``feedback_loop.decay_factor``)
+            weight_recent: Apply recency weights (``feedback_loop.weight_recent``)
+            full_retrain_drift: KS statistic at or above which a warm start is not enough
+            performance_drop: Relative degradation of ``metric`` that triggers a retrain
+            max_model_age_days: Age that triggers a retrain (None: never)
+            max_trees: Ensemble size forcing a full retrain (default: 3x ``num_boost_round``)
+            metric: Monitored metric; decides the direction of "worse"
+        """
+        self.params = dict(params or {})
+        self.params.setdefault("verbose", -1)
+        self.num_boost_round = num_boost_round
+        self.incremental = incremental
+        self.incremental_rounds = incremental_rounds
+        self.decay_factor = decay_factor
+        self.weight_recent = weight_recent
+        self.full_retrain_drift = full_retrain_drift
+        self.performance_drop = performance_drop
+        self.max_model_age_days = max_model_age_days
+        self.max_trees = max_trees if max_trees is not None else 3 * num_boost_round
+        self.metric = metric
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "RetrainingEngine":
+        """Build an engine from ``model.lightgbm`` and the ``adaptive`` config block."""
+        params = dict(config.get("model", {}).get("lightgbm", {}))
+        num_boost_round = params.pop("n_estimators", 100)
+        adaptive = config.get("adaptive", {})
+        retraining = adaptive.get("retraining", {})
+        feedback = adaptive.get("feedback_loop", {})
+
+        kwargs.setdefault("params", params)
+        kwargs.setdefault("num_boost_round", num_boost_round)
+        kwargs.setdefault("incremental", retraining.get("incremental", False))
+        kwargs.setdefault("max_model_age_days", retraining.get("max_model_age_days", 30))
+        kwargs.setdefault("metric", retraining.get("metric", params.get("metric", "rmse")))
+        for key in ("incremental_rounds", "full_retrain_drift", "performance_drop", "max_trees"):
+            if key in retraining:
+                kwargs.setdefault(key, retraining[key])
+        kwargs.setdefault("decay_factor", feedback.get("decay_factor", 0.95))
+        kwargs.setdefault("weight_recent", feedback.get("enabled", True) and feedback.get("weight_recent", True))
+        return cls(**kwargs)
+
+    # DECISION
+
+    def decide(
+        self,
+        champion: Any = None,
+        drift: DriftInput = None,
+        performance: Optional[float] = None,
+        baseline_performance: Optional[float] = None,
+        model_age_days: Optional[float] = None,
+    ) -> RetrainDecision:
+        """
+        Evaluate the retraining triggers and pick a mode.
+
+        Args:
+            champion: Current LightGBM booster (or model file path), if any
+            drift: Drift results (see ``drift_magnitude``)
+            performance: Current value of ``metric``
+            baseline_performance: Value of ``metric`` when the champion was promoted
+            model_age_days: Days since the champion was trained
+
+        Returns:
+            RetrainDecision with mode "none", "incremental" or "full"
+        """
+        magnitude = drift_magnitude(drift)
+        reasons = []
+        if drift_detected(drift):
+            reasons.append(f"drift (max KS {magnitude:.3f})")
+        if performance is not None and baseline_performance:
+            drop = self._relative_drop(performance, baseline_performance)
+            if drop > self.performance_drop:
+                reasons.append(f"{self.metric} degraded {drop:.1%}")
+        if self.max_model_age_days is not None and model_age_days is not None \
+                and model_age_days >= self.max_model_age_days:
+            reasons.append(f"model age {model_age_days:.0f}d")
+        if champion is None:
+            reasons.append("no champion")
+
+        if not reasons:
+            return RetrainDecision("none", reasons, magnitude)
+
+        full = []
+        if not self.incremental:
+            full.append("incremental retraining disabled")
+        if magnitude >= self.full_retrain_drift:
+            full.append(f"drift {magnitude:.3f} >= {self.full_retrain_drift}")
+        if champion is not None and self.incremental:
+            num_trees = _load_booster(champion).num_trees()
+            if num_trees + self.incremental_rounds > self.max_trees:
+                full.append(f"{num_trees} trees + {self.incremental_rounds} > {self.max_trees}")
+
+        if full or champion is None:
+            return RetrainDecision("full", reasons + full, magnitude)
+        return RetrainDecision("incremental", reasons, magnitude)
+
+    def _relative_drop(self, performance: float, baseline: float) -> float:
+        if self.metric.lower() in HIGHER_IS_BETTER:
+            return (baseline - performance) / abs(baseline)
+        return (performance - baseline) / abs(baseline)
+
+    # TRAINING
+
+    def retrain(
+        self,
+        decision: RetrainDecision,
+        champion: Any = None,
+        new_data: Optional[TrainingData] = None,
+        full_data: Optional[Union[TrainingData, Callable[[], TrainingData]]] = None,
+        now: Optional[datetime] = None,
+    ) -> Optional[RetrainResult]:
+        """
+        Run the decided retrain.
+
+        Args:
+            decision: Output of ``decide``
+            champion: Booster (or model file path) to continue from
+            new_data: Rows collected since the champion was trained (incremental)
+            full_data: The ``data_window_days`` window, or a callable loading it
+                       (only called for a full retrain)
+            now: Reference time of the recency weights (default: newest row)
+
+        Returns:
+            RetrainResult, or None when the decision is "none"
+        """
+        if decision.mode == "none":
+            return None
+        if decision.mode not in RETRAIN_MODES:
+            raise ValueError(f"Unknown retrain mode: {decision.mode}")
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        if decision.mode == "incremental":
+            if champion is None or new_data is None or len(new_data) == 0:
+                raise ValueError("Incremental retraining needs a champion and new rows")
+            data, rounds, init_model = new_data, self.incremental_rounds, _load_booster(champion)
+        else:
+            data = full_data() if callable(full_data) else full_data
+            if data is None or len(data) == 0:
+                raise ValueError("Full retraining needs the training window (full_data)")
+            rounds, init_model = self.num_boost_round, None
+
+        booster = self._train(data, rounds, init_model, now)
+        result = RetrainResult(
+            booster=booster,
+            mode=decision.mode,
+            reasons=decision.reasons,
+            n_rows=len(data),
+            rounds_added=booster.num_trees() - (init_model.num_trees() if init_model is not None else 0),
+            num_trees=booster.num_trees(),
+            wall_seconds=time.perf_counter() - wall,
+            cpu_seconds=time.process_time() - cpu,
+        )
+        logger.info(
+            f"✓ {decision.mode.capitalize()} retrain on {result.n_rows:,} rows "
+            f"(+{result.rounds_added} trees, {result.wall_seconds:.2f}s wall, "
+            f"{result.cpu_seconds:.2f}s CPU): {'; '.join(decision.reasons)}"
+        )
+        return result
+
+    def sample_weights(self, data: TrainingData, now: Optional[datetime] = None) -> Optional[np.ndarray]:
+        """Recency weights of ``data`` (None when disabled or without timestamps)."""
+        if not self.weight_recent or data.timestamps is None:
+            return None
+        return recency_weights(data.timestamps, self.decay_factor, now)
+
+    def _train(self, data: TrainingData, rounds: int, init_model, now: Optional[datetime]):
+        import lightgbm as lgb
+
+        X = data.X
+        if init_model is not None and isinstance(X, pd.DataFrame):
+            X = X[init_model.feature_name()]  # trees address features by position
+        train_set = lgb.Dataset(X, label=np.asarray(data.y), weight=self.sample_weights(data, now))
+        return lgb.train(
+            self.params,
+            train_set,
+            num_boost_round=rounds,
+            init_model=init_model,
+            keep_training_booster=False,
+        )
+
+
+def _load_booster(model: Any):
+    if isinstance(model, (str, Path)):
+        import lightgbm as lgb
+
+        return lgb.Booster(model_file=str(model))
+    return model
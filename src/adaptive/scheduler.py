@@ -0,0 +1,507 @@
+"""
+Parallel champion/challenger retraining for XAE-Frame (README 2C).
+
+``RetrainScheduler`` runs one retrain job per domain (e_commerce, finance,
+insurance) in a process pool under a CPU budget:
+
+    quota       every job gets ``cpus`` cores (default: budget / workers) and
+                LightGBM runs with ``num_threads = cpus``, so ``n_jobs: -1``
+                in a domain config cannot oversubscribe the machine; jobs
+                wait until enough of the budget is free
+    worker      loads the champion from the registry, lets
+                ``RetrainingEngine`` decide (skip / warm start / full
+                retrain), trains, then scores champion and challenger on the
+                held-out rows concurrently (one thread each) and registers
+                the challenger
+    scheduler   (parent process, the only one touching the database and the
+                rollout state) inserts the challenger into ``models``, writes
+                holdout scores to ``business_metrics`` (champion as control
+                group) and starts a ``challenger_traffic`` (10%) test, or
+                rejects the challenger if it scored worse
+
+``conclude`` ends a test from the online metrics: the challenger is promoted
+or rolled back, and the champion keeps serving in the meantime. With the
+default ``FilesystemRegistry`` no MLflow server is needed.
+"""
+
+import logging
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import JSON, column, insert, table, update
+
+from ..utils.config import load_config
+from ..utils.prediction_logging import TABLES
+from ..utils.vector_codec import with_feature_schema
+from .model_registry import FilesystemRegistry, qualified_version
+from .retraining_strategy import HIGHER_IS_BETTER, DriftInput, RetrainingEngine, TrainingData
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ["skipped", "promoted", "challenger", "rejected", "failed"]
+
+MODELS_TABLE = table(
+    "models",
+    column("id"), column("name"), column("version"), column("model_type"), column("domain"),
+    column("train_accuracy"), column("val_accuracy"), column("test_accuracy"),
+    column("created_at"), column("updated_at"), column("is_active"), column("mlflow_run_id"),
+    column("config", JSON),
+)
+
+# Thread pools of native libraries, capped in every worker process
+_THREAD_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+
+@dataclass
+class JobData:
+    """What a retrain job trains and evaluates on."""
+
+    holdout: TrainingData
+    new_data: Optional[TrainingData] = None
+    full_data: Optional[Union[TrainingData, Callable[[], TrainingData]]] = None
+    drift: DriftInput = None
+    performance: Optional[float] = None  # live value of the retraining metric
+
+
+@dataclass
+class RetrainJob:
+    """
+    One domain to retrain.
+
+    ``load_data(domain, config) -> JobData`` runs in the worker process, so it
+    must be a module-level function (picklable).
+    """
+
+    domain: str
+    load_data: Callable[[str, Dict[str, Any]], JobData]
+    config: Optional[Dict[str, Any]] = None
+    cpus: Optional[int] = None
+
+
+@dataclass
+class JobResult:
+    """Outcome of one retrain job."""
+
+    domain: str
+    status: str
+    metric: str = ""
+    mode: str = "none"
+    reasons: List[str] = field(default_factory=list)
+    champion: Optional[str] = None
+    challenger: Optional[str] = None
+    champion_score: Optional[float] = None
+    challenger_score: Optional[float] = None
+    retrain: Dict[str, Any] = field(default_factory=dict)
+    feature_names: List[str] = field(default_factory=list)
+    cpus: int = 1
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# METRICS
+
+def _rmse(y: np.ndarray, p: np.ndarray) -> float:
+    return float(np.sqrt(np.mean((y - p) ** 2)))
+
+
+def _mae(y: np.ndarray, p: np.ndarray) -> float:
+    return float(np.mean(np.abs(y - p)))
+
+
+def _auc(y: np.ndarray, p: np.ndarray) -> float:
+    from sklearn.metrics import roc_auc_score
+
+    return float(roc_auc_score(y, p))
+
+
+def _logloss(y: np.ndarray, p: np.ndarray) -> float:
+    from sklearn.metrics import log_loss
+
+    return float(log_loss(y, p))
+
+
+METRICS: Dict[str, Callable[[np.ndarray, np.ndarray], float]] = {
+    "rmse": _rmse,
+    "l2": _rmse,
+    "mae": _mae,
+    "l1": _mae,
+    "auc": _auc,
+    "binary_logloss": _logloss,
+}
+
+
+def evaluate_models(models: Dict[str, Any], holdout: TrainingData, metric: str = "rmse",
+                    cpus: int = 1) -> Dict[str, float]:
+    """
+    Score several boosters on the same held-out rows concurrently.
+
+    LightGBM releases the GIL while predicting, so one thread per model (each
+    with its share of ``cpus``) evaluates them in parallel.
+
+    Returns:
+        Model name -> ``metric`` (missing models are skipped)
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unsupported evaluation metric: {metric}")
+    models = {name: model for name, model in models.items() if model is not None}
+    if not models:
+        return {}
+    threads = max(1, cpus // len(models))
+    y = np.asarray(holdout.y)
+
+    def score(model):
+        X = holdout.X
+        if hasattr(X, "columns"):
+            X = X[model.feature_name()]
+        return METRICS[metric](y, model.predict(X, num_threads=threads))
+
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        futures = {name: pool.submit(score, model) for name, model in models.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+# WORKER
+
+def _limit_threads(cpus: int) -> None:
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(cpus)
+
+
+def run_job(job: RetrainJob, registry: FilesystemRegistry, cpus: int = 1) -> JobResult:
+    """
+    Retrain, evaluate and register one domain (runs in a worker process).
+
+    Args:
+        job: Domain and data loader
+        registry: Model registry (only new versions are written here; the
+                  rollout state is left to the scheduler)
+        cpus: Core quota of this job
+
+    Returns:
+        JobResult with status "skipped", "challenger" (candidate registered)
+        or "failed"
+    """
+    start = time.perf_counter()
+    config = job.config or load_config(job.domain)
+    params = dict(config.get("model", {}).get("lightgbm", {}))
+    params.pop("n_jobs", None)
+    params["num_threads"] = cpus
+    engine = RetrainingEngine.from_config(config, params={k: v for k, v in params.items() if k != "n_estimators"})
+    result = JobResult(domain=job.domain, status="skipped", metric=engine.metric, cpus=cpus)
+
+    try:
+        data = job.load_data(job.domain, config)
+        result.champion = registry.champion(job.domain)
+        champion = registry.load(job.domain, result.champion)
+        baseline, age = None, None
+        if result.champion is not None:
+            meta = registry.metadata(job.domain, result.champion)
+            baseline = meta.get("metrics", {}).get(engine.metric)
+            age = (datetime.utcnow() - datetime.fromisoformat(meta["created_at"])).total_seconds() / 86400
+
+        decision = engine.decide(champion, data.drift, data.performance, baseline, age)
+        result.mode, result.reasons = decision.mode, decision.reasons
+        if decision.mode == "none":
+            return result
+
+        retrained = engine.retrain(decision, champion, data.new_data, data.full_data)
+        scores = evaluate_models(
+            {"champion": champion, "challenger": retrained.booster}, data.holdout, engine.metric, cpus
+        )
+        result.champion_score = scores.get("champion")
+        result.challenger_score = scores["challenger"]
+        result.retrain = retrained.to_dict()
+        result.feature_names = list(retrained.booster.feature_name())
+        result.challenger = registry.register(job.domain, retrained.booster, {
+            "metrics": {engine.metric: result.challenger_score},
+            "parent": result.champion,
+            **result.retrain,
+        })
+        result.status = "challenger"
+    except Exception as e:
+        result.status = "failed"
+        result.error = f"{e}\n{traceback.format_exc()}"
+    finally:
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+class RetrainScheduler:
+    """
+    Process-pool scheduler for per-domain retrain jobs under a CPU budget.
+
+    Example:
+        registry = FilesystemRegistry.from_config(config)
+        scheduler = RetrainScheduler.from_config(config, registry, engine=get_engine())
+        results = scheduler.run([
+            RetrainJob("e_commerce", load_e_commerce),
+            RetrainJob("finance", load_finance, cpus=4),
+        ])
+        scheduler.conclude("e_commerce", champion_value=0.031, challenger_value=0.034,
+                           metric="conversion_rate")
+    """
+
+    def __init__(
+        self,
+        registry: FilesystemRegistry,
+        engine: Any = None,
+        cpu_budget: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        challenger_traffic: float = 0.10,
+        min_improvement: float = 0.0,
+        start_method: str = "spawn",
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            registry: Model registry shared with the workers
+            engine: SQLAlchemy engine for ``models``/``business_metrics`` (None: skip)
+            cpu_budget: Cores all running jobs may use together (default: all)
+            max_workers: Concurrent jobs (default: one per budgeted core)
+            challenger_traffic: Share of users routed to a challenger
+            min_improvement: Relative holdout improvement a challenger needs
+            start_method: multiprocessing start method of the workers
+        """
+        self.registry = registry
+        self.engine = engine
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.max_workers = max(1, min(max_workers or self.cpu_budget, self.cpu_budget))
+        self.challenger_traffic = challenger_traffic
+        self.min_improvement = min_improvement
+        self.start_method = start_method
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], registry: FilesystemRegistry, **kwargs: Any) -> "RetrainScheduler":
+        """Build a scheduler from the ``adaptive.scheduler`` config block."""
+        scheduler = config.get("adaptive", {}).get("scheduler", {})
+        for key in ("cpu_budget", "max_workers", "challenger_traffic", "min_improvement"):
+            if scheduler.get(key) is not None:
+                kwargs.setdefault(key, scheduler[key])
+        return cls(registry, **kwargs)
+
+    # JOBS
+
+    def run(self, jobs: Sequence[RetrainJob]) -> List[JobResult]:
+        """
+        Run all jobs, at most ``max_workers`` at a time and within ``cpu_budget``.
+
+        Returns:
+            One JobResult per job, in completion order
+        """
+        domains = [job.domain for job in jobs]
+        if len(set(domains)) != len(domains):
+            raise ValueError("At most one retrain job per domain")
+
+        default_cpus = max(1, self.cpu_budget // min(self.max_workers, max(len(jobs), 1)))
+        pending = deque((job, min(job.cpus or default_cpus, self.cpu_budget)) for job in jobs)
+        running: Dict[Any, tuple] = {}
+        results: List[JobResult] = []
+        free = self.cpu_budget
+
+        context = get_context(self.start_method)
+        pool = None
+        try:
+            while pending or running:
+                while pending and pending[0][1] <= free and len(running) < self.max_workers:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(self.max_workers, mp_context=context,
+                                                   initializer=_limit_threads, initargs=(default_cpus,))
+                    job, cpus = pending.popleft()
+                    free -= cpus
+                    running[pool.submit(run_job, job, self.registry, cpus)] = (job, cpus)
+                    logger.info(f"Started {job.domain} retrain ({cpus} cores, {free} free)")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, cpus = running.pop(future)
+                    free += cpus
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:  # a worker died (e.g. OOM); later jobs get a new pool
+                        if pool is not None:
+                            pool.shutdown(wait=False)
+                            pool = None
+                        result = JobResult(domain=job.domain, status="failed", cpus=cpus, error=str(e))
+                    except Exception as e:  # job did not pickle
+                        result = JobResult(domain=job.domain, status="failed", cpus=cpus, error=str(e))
+                    results.append(self._finish(result))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return results
+
+    def _finish(self, result: JobResult) -> JobResult:
+        if result.status == "failed":
+            logger.error(f"{result.domain} retrain failed: {result.error}")
+            return result
+        if result.status == "skipped":
+            logger.info(f"{result.domain}: no retrain needed")
+            return result
+
+        running = self.registry.challenger(result.domain)
+        if result.champion is None:
+            self.registry.promote(result.domain, result.challenger)
+            result.status = "promoted"
+        elif self._improvement(result.metric, result.champion_score, result.challenger_score) < self.min_improvement:
+            result.status = "rejected"
+        elif running is not None:  # never replace a test in flight; conclude() or rollback() it first
+            logger.warning(f"{result.domain}: challenger {running} still under test, {result.challenger} not started")
+            result.reasons.append(f"challenger {running} still under test")
+            result.status = "rejected"
+        else:
+            self.registry.start_challenger(result.domain, result.challenger, self.challenger_traffic)
+        self._record(result)
+        if result.status == "promoted":
+            self._set_active(result.domain, result.challenger)
+
+        logger.info(
+            f"✓ {result.domain}: {result.mode} retrain -> {result.challenger} {result.status} "
+            f"({result.metric} {_fmt(result.champion_score)} -> {_fmt(result.challenger_score)}, "
+            f"{result.seconds:.1f}s on {result.cpus} cores)"
+        )
+        return result
+
+    # ROLLOUT
+
+    def conclude(
+        self,
+        domain: str,
+        champion_value: float,
+        challenger_value: float,
+        metric: str = "conversion_rate",
+        higher_is_better: bool = True,
+        period_start: Optional[datetime] = None,
+        period_end: Optional[datetime] = None,
+    ) -> str:
+        """
+        End the running challenger test from its online metric.
+
+        The challenger is promoted if it did at least as well as the champion,
+        otherwise it is rolled back (the champion never stopped serving).
+
+        Returns:
+            The version serving all traffic afterwards
+        """
+        champion, challenger = self.registry.champion(domain), self.registry.challenger(domain)
+        if challenger is None:
+            raise ValueError(f"No challenger test running for {domain}")
+
+        lift = _lift(champion_value, challenger_value)
+        wins = (lift >= 0) if higher_is_better else (lift <= 0)
+        self._write_metrics(domain, metric, champion, challenger, champion_value, challenger_value,
+                            period_start, period_end)
+        if wins:
+            self.registry.promote(domain, challenger)
+            self._set_active(domain, challenger)
+            logger.info(f"✓ {domain}: promoted {challenger} ({metric} lift {lift:+.1f}%)")
+            return challenger
+        self.registry.rollback(domain)
+        logger.warning(f"{domain}: rolled back {challenger} ({metric} lift {lift:+.1f}%)")
+        return champion
+
+    def rollback(self, domain: str) -> Optional[str]:
+        """Drop the challenger or restore the previous champion (see ``FilesystemRegistry.rollback``)."""
+        version = self.registry.rollback(domain)
+        self._set_active(domain, version)
+        logger.warning(f"{domain}: rolled back to {version}")
+        return version
+
+    # DATABASE
+
+    def _record(self, result: JobResult) -> None:
+        if self.engine is None:
+            return
+        meta = self.registry.metadata(result.domain, result.challenger)
+        with self.engine.begin() as connection:
+            model_id = connection.execute(
+                insert(MODELS_TABLE).values(
+                    name=f"{result.domain}_lightgbm",
+                    version=qualified_version(result.domain, result.challenger),
+                    model_type="lightgbm",
+                    domain=result.domain,
+                    test_accuracy=result.challenger_score,
+                    created_at=datetime.utcnow(),
+                    updated_at=datetime.utcnow(),
+                    is_active=result.status == "promoted",
+                    mlflow_run_id=meta.get("mlflow_run_id"),
+                    config=with_feature_schema(
+                        {"registry_path": str(self.registry.model_path(result.domain, result.challenger)),
+                         "metric": result.metric, **result.retrain},
+                        result.feature_names,
+                    ),
+                ).returning(MODELS_TABLE.c.id)
+            ).scalar_one()
+        self.registry.update_metadata(result.domain, result.challenger, model_id=model_id)
+        self._write_metrics(result.domain, f"holdout_{result.metric}", result.champion, result.challenger,
+                            result.champion_score, result.challenger_score)
+
+    def _write_metrics(self, domain: str, metric: str, champion: Optional[str], challenger: str,
+                       champion_value: Optional[float], challenger_value: Optional[float],
+                       period_start: Optional[datetime] = None, period_end: Optional[datetime] = None) -> None:
+        if self.engine is None:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for version, value, control in ((champion, champion_value, True), (challenger, challenger_value, False)):
+            model_id = self._model_id(domain, version)
+            if model_id is None or value is None:
+                continue
+            rows.append({
+                "model_id": model_id,
+                "metric_name": metric,
+                "metric_value": value,
+                "baseline_value": champion_value,
+                "lift_percentage": None if control or champion_value is None else _lift(champion_value, value),
+                "is_control_group": control,
+                "measured_at": now,
+                "period_start": period_start,
+                "period_end": period_end,
+            })
+        if rows:
+            with self.engine.begin() as connection:
+                connection.execute(insert(TABLES["business_metrics"]), rows)
+
+    def _set_active(self, domain: str, version: str) -> None:
+        model_id = self._model_id(domain, version)
+        if self.engine is None or model_id is None:
+            return
+        models = MODELS_TABLE
+        with self.engine.begin() as connection:
+            connection.execute(update(models).where(models.c.domain == domain)
+                               .values(is_active=models.c.id == model_id, updated_at=datetime.utcnow()))
+
+    def _model_id(self, domain: str, version: Optional[str]) -> Optional[int]:
+        if version is None:
+            return None
+        return self.registry.metadata(domain, version).get("model_id")
+
+    @staticmethod
+    def _improvement(metric: str, champion_score: Optional[float], challenger_score: float) -> float:
+        if champion_score is None:
+            return float("inf")
+        lift = _lift(champion_score, challenger_score) / 100
+        return lift if metric.lower() in HIGHER_IS_BETTER else -lift
+
+
+def _lift(baseline: Optional[float], value: float) -> float:
+    """Relative change of ``value`` over ``baseline`` in percent."""
+    if not baseline:
+        return 0.0
+    return (value - baseline) / abs(baseline) * 100
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.4f}"
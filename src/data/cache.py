@@ -0,0 +1,267 @@
+"""
+Raw dataset manifest and content-addressed cache for XAE-Frame.
+
+``data/raw/manifest.json`` records, for every produced dataset, the inputs
+that determine its content (source, config, sample size, seed, ...) together
+with the resulting content hash, row count and schema. File bytes live once in
+a content-addressed store (``data/raw/.store/objects/ab/abcdef....parquet``);
+the user-facing files such as ``amazon_reviews_All_Beauty.parquet`` are hard
+links (or copies) of those objects. Repeat runs with the same inputs become
+no-ops, identical outputs are stored once, and every output is replaced
+atomically so an interrupted run never leaves a half-written file behind.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Union
+
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+_manifest_lock = threading.Lock()
+
+
+def file_sha256(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """Stream a file through SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(**inputs: Any) -> str:
+    """Deterministic key for the inputs that determine a dataset's content."""
+    canonical = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DatasetCache:
+    """
+    Manifest plus content-addressed object store next to ``data/raw``.
+
+    Example:
+        cache = DatasetCache("data/raw")
+        inputs = dict(source="hf:...", config="raw_review_All_Beauty", sample_size=10000, seed=42)
+        if cache.restore(inputs, output_path) is None:
+            with cache.staging(output_path) as tmp:
+                write_parquet(tmp)
+                cache.commit(inputs, tmp, output_path)
+    """
+
+    def __init__(self, data_dir: Union[str, Path] = "data/raw"):
+        """Initialize cache rooted at the raw data directory."""
+        self.data_dir = Path(data_dir)
+        self.manifest_path = self.data_dir / "manifest.json"
+        self.objects_dir = self.data_dir / ".store" / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+    # MANIFEST
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """All manifest entries keyed by cache key."""
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f).get("entries", {})
+
+    def get(self, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Manifest entry for ``inputs`` whose object is still present."""
+        entry = self.entries().get(cache_key(**inputs))
+        if entry is None or not self.object_path(entry["sha256"]).exists():
+            return None
+        return entry
+
+    def current_entry(self, output_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """Manifest entry whose content ``output_path`` currently holds (None if untracked)."""
+        output_path = Path(output_path)
+        if not output_path.exists():
+            return None
+        candidates = [e for e in self.entries().values() if e.get("output") == output_path.name]
+        for entry in candidates:
+            obj = self.object_path(entry["sha256"])
+            if obj.exists() and os.path.samefile(output_path, obj):
+                return entry
+        if candidates:  # copies instead of hard links
+            sha256 = file_sha256(output_path)
+            return next((e for e in candidates if e["sha256"] == sha256), None)
+        return None
+
+    def object_path(self, sha256: str) -> Path:
+        """Location of an object in the content-addressed store."""
+        return self.objects_dir / sha256[:2] / f"{sha256}.parquet"
+
+    # CACHE OPERATIONS
+
+    def restore(self, inputs: Dict[str, Any], output_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """
+        Make ``output_path`` hold the cached result for ``inputs``.
+
+        Returns the manifest entry on a hit (linking the object into place if
+        the output is missing or stale), or None on a miss.
+        """
+        entry = self.get(inputs)
+        if entry is None:
+            return None
+
+        output_path = Path(output_path)
+        obj = self.object_path(entry["sha256"])
+        if not (output_path.exists() and _same_file(output_path, obj, entry["sha256"])):
+            self._link_into_place(obj, output_path)
+            logger.info(f"✓ Restored {output_path.name} from cache ({entry['sha256'][:12]})")
+        else:
+            logger.info(f"✓ {output_path.name} is up to date ({entry['sha256'][:12]}), skipping")
+        return entry
+
+    @contextmanager
+    def staging(self, output_path: Union[str, Path]) -> Iterator[Path]:
+        """Temporary path next to ``output_path``; removed if the block fails."""
+        output_path = Path(output_path)
+        tmp = output_path.with_name(f".{output_path.name}.partial-{os.getpid()}-{threading.get_ident()}")
+        try:
+            yield tmp
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def commit(
+        self,
+        inputs: Dict[str, Any],
+        tmp_path: Union[str, Path],
+        output_path: Union[str, Path],
+        aliases: Optional[list] = None,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """
+        Move a finished file into the store and atomically publish it.
+
+        Args:
+            inputs: Inputs that determine the content (hashed into the key)
+            tmp_path: Fully written staging file
+            output_path: User-facing path to publish
+            aliases: Further input dicts known to produce the same content
+            **extra: Additional metadata recorded in the manifest entry
+
+        Returns:
+            The manifest entry
+        """
+        tmp_path, output_path = Path(tmp_path), Path(output_path)
+        sha256 = file_sha256(tmp_path)
+        metadata = pq.read_metadata(tmp_path)
+
+        obj = self.object_path(sha256)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        if obj.exists():
+            tmp_path.unlink()  # identical content already stored
+        else:
+            os.replace(tmp_path, obj)
+        self._link_into_place(obj, output_path)
+
+        entry = {
+            **inputs,
+            "sha256": sha256,
+            "rows": metadata.num_rows,
+            "bytes": obj.stat().st_size,
+            "schema": [f"{field.name}: {field.type}" for field in metadata.schema.to_arrow_schema()],
+            "output": output_path.name,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            **extra,
+        }
+        keys = [cache_key(**inputs)] + [cache_key(**alias) for alias in aliases or []]
+        self._update_manifest({key: entry for key in keys})
+
+        logger.info(f"✓ Cached {output_path.name} as {sha256[:12]} ({metadata.num_rows:,} rows)")
+        return entry
+
+    def prune(self) -> int:
+        """Delete store objects no longer referenced by the manifest."""
+        referenced: Set[str] = {e["sha256"] for e in self.entries().values()}
+        removed = 0
+        for obj in self.objects_dir.glob("*/*.parquet"):
+            if obj.stem not in referenced:
+                obj.unlink()
+                removed += 1
+        return removed
+
+    # INTERNALS
+
+    def _link_into_place(self, obj: Path, output_path: Path) -> None:
+        if output_path.exists() and os.path.samefile(output_path, obj):
+            return
+        tmp = output_path.with_name(f".{output_path.name}.link-{os.getpid()}-{threading.get_ident()}")
+        try:
+            os.link(obj, tmp)
+        except OSError:
+            shutil.copyfile(obj, tmp)  # cross-device or no hard link support
+        os.replace(tmp, output_path)
+
+    def _update_manifest(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Read-modify-write the manifest under a thread and file lock."""
+        lock_path = self.manifest_path.with_suffix(".lock")
+        with _manifest_lock, open(lock_path, "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = self.entries()
+            entries.update(updates)
+            tmp = self.manifest_path.with_suffix(f".json.tmp-{os.getpid()}")
+            with open(tmp, "w") as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": entries}, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.manifest_path)
+
+
+class ChunkJournal:
+    """
+    Record of completed chunks for a resumable chunked write.
+
+    The journal is a small JSON file rewritten atomically after each chunk,
+    keyed by the spec that produced the chunks so a changed spec starts over.
+    """
+
+    def __init__(self, path: Union[str, Path], spec_key: str):
+        """Open (or start) the journal for ``spec_key``."""
+        self.path = Path(path)
+        self.spec_key = spec_key
+        self.done: Set[int] = set()
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            if state.get("spec_key") == spec_key:
+                self.done = set(state.get("done", []))
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.done
+
+    def mark(self, index: int) -> None:
+        """Record chunk ``index`` as fully written."""
+        self.done.add(index)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"spec_key": self.spec_key, "done": sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+
+def _same_file(path: Path, obj: Path, sha256: str) -> bool:
+    """True if ``path`` is a hard link of ``obj`` or (a copy) has its content hash."""
+    try:
+        if os.path.samefile(path, obj):
+            return True
+        # Copy fallback: the size is a cheap pre-check, the hash decides
+        return path.stat().st_size == obj.stat().st_size and file_sha256(path) == sha256
+    except OSError:
+        return False
@@ -0,0 +1,286 @@
+"""
+User/item aggregate features for XAE-Frame.
+
+Computes the aggregate features declared under ``features`` in
+``config/e_commerce.yaml``:
+
+    user_review_count, user_avg_rating, user_activity_days,
+    item_avg_rating, item_review_count
+
+Aggregates are kept as running sums, counts and min/max timestamps per user
+and per item, so a batch of new ``user_interactions`` rows is folded in with
+grouped NumPy/pandas operations over the batch only, instead of recomputing
+over the full history on every ``check_interval_hours`` cycle.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MS_PER_DAY = 86_400_000
+
+USER_FEATURES = ["user_review_count", "user_avg_rating", "user_activity_days"]
+ITEM_FEATURES = ["item_avg_rating", "item_review_count"]
+
+# Running state per key; sums/counts add up, timestamps take min/max
+_SUM_COLUMNS = ["n_interactions", "n_rated", "rating_sum"]
+_STATE_COLUMNS = _SUM_COLUMNS + ["first_ts", "last_ts"]
+
+
+class AggregateFeatureEngine:
+    """
+    Incrementally maintained user and item aggregate features.
+
+    Example:
+        engine = AggregateFeatureEngine(item_col="parent_asin")
+        engine.fit(reviews)
+        engine.update(new_interactions)
+        features = engine.transform(requests)
+    """
+
+    def __init__(
+        self,
+        user_col: str = "user_id",
+        item_col: str = "item_id",
+        rating_col: str = "rating",
+        timestamp_col: str = "timestamp",
+        id_lag: int = 10_000,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            user_col, item_col, rating_col, timestamp_col: Columns of the interaction frames
+            id_lag: Ids below the watermark re-read by ``update_from_database``
+                    (covers rows committed out of id order)
+        """
+        self.user_col = user_col
+        self.item_col = item_col
+        self.rating_col = rating_col
+        self.timestamp_col = timestamp_col
+        self.user_stats = _empty_state()
+        self.item_stats = _empty_state()
+        self.id_lag = id_lag
+        self.last_interaction_id = 0  # watermark for update_from_database
+        self.recent_ids = np.empty(0, dtype=np.int64)  # aggregated ids within id_lag of the watermark
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "AggregateFeatureEngine":
+        """Build an engine whose item column follows the dataset in ``config``."""
+        if config.get("dataset", {}).get("name") == "amazon_reviews_2023":
+            kwargs.setdefault("item_col", "parent_asin")
+        return cls(**kwargs)
+
+    # AGGREGATION
+
+    def fit(self, interactions: pd.DataFrame) -> "AggregateFeatureEngine":
+        """Compute aggregates from scratch over ``interactions``."""
+        self.user_stats = _empty_state()
+        self.item_stats = _empty_state()
+        return self.update(interactions)
+
+    def update(self, interactions: pd.DataFrame) -> "AggregateFeatureEngine":
+        """
+        Fold a batch of new interactions into the running aggregates.
+
+        Rows without a rating (clicks, purchases) count towards activity but
+        not towards review counts or average ratings.
+        """
+        if interactions.empty:
+            return self
+
+        frame = pd.DataFrame({
+            "rating": pd.to_numeric(interactions[self.rating_col], errors="coerce").to_numpy(np.float64),
+            "ts": _to_epoch_ms(interactions[self.timestamp_col]),
+        })
+        frame["rated"] = ~np.isnan(frame["rating"].to_numpy())
+        frame["rating"] = frame["rating"].fillna(0.0)
+
+        self.user_stats = _merge(self.user_stats, _batch_state(frame, interactions[self.user_col]))
+        self.item_stats = _merge(self.item_stats, _batch_state(frame, interactions[self.item_col]))
+        return self
+
+    def update_from_database(self, engine, chunksize: int = 100_000) -> int:
+        """
+        Fold in ``user_interactions`` rows added since the last call.
+
+        Uses the table's autoincrement id as a watermark. Ids are assigned at
+        insert but become visible at commit, so a row can appear below the
+        watermark after a later id was read; every call therefore re-reads
+        the last ``id_lag`` ids and skips those already aggregated
+        (``recent_ids``), so each row is aggregated exactly once unless its
+        transaction stayed open for more than ``id_lag`` newer inserts.
+
+        Args:
+            engine: SQLAlchemy engine for the XAE-Frame database
+            chunksize: Rows fetched per query chunk
+
+        Returns:
+            Number of new rows aggregated
+        """
+        from sqlalchemy import text
+
+        query = text(
+            "SELECT id, user_id, item_id, rating, timestamp FROM user_interactions "
+            "WHERE id > :low_id ORDER BY id"
+        )
+        low_id = max(self.last_interaction_id - self.id_lag, 0)
+        seen = [self.recent_ids[self.recent_ids > low_id]]
+        n_rows = 0
+        with engine.connect() as connection:
+            for chunk in pd.read_sql(query, connection, params={"low_id": low_id}, chunksize=chunksize):
+                chunk = chunk[~np.isin(chunk["id"].to_numpy(np.int64), seen[0])]
+                if chunk.empty:
+                    continue
+                chunk = chunk.rename(columns={
+                    "user_id": self.user_col,
+                    "item_id": self.item_col,
+                    "rating": self.rating_col,
+                    "timestamp": self.timestamp_col,
+                })
+                self.update(chunk)
+                self.last_interaction_id = max(self.last_interaction_id, int(chunk["id"].max()))
+                seen.append(chunk["id"].to_numpy(np.int64))
+                n_rows += len(chunk)
+
+        recent = np.concatenate(seen)
+        self.recent_ids = np.sort(recent[recent > self.last_interaction_id - self.id_lag])
+
+        logger.info(f"Aggregated {n_rows:,} new interactions (watermark id={self.last_interaction_id})")
+        return n_rows
+
+    # FEATURES
+
+    def user_features(self) -> pd.DataFrame:
+        """Feature table indexed by user."""
+        stats = self.user_stats
+        return pd.DataFrame({
+            "user_review_count": stats["n_rated"].astype(np.int64),
+            "user_avg_rating": _safe_divide(stats["rating_sum"], stats["n_rated"]),
+            "user_activity_days": (stats["last_ts"] - stats["first_ts"]) / MS_PER_DAY,
+        }, index=stats.index)
+
+    def item_features(self) -> pd.DataFrame:
+        """Feature table indexed by item."""
+        stats = self.item_stats
+        return pd.DataFrame({
+            "item_avg_rating": _safe_divide(stats["rating_sum"], stats["n_rated"]),
+            "item_review_count": stats["n_rated"].astype(np.int64),
+        }, index=stats.index)
+
+    def transform(self, frame: pd.DataFrame, features: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Look up aggregate features for each row of ``frame``.
+
+        Unknown users/items get NaN averages and zero counts.
+
+        Args:
+            frame: Rows with ``user_col`` and/or ``item_col``
+            features: Subset of USER_FEATURES + ITEM_FEATURES (None = all)
+        """
+        features = features or USER_FEATURES + ITEM_FEATURES
+        parts = []
+        if self.user_col in frame and any(f in USER_FEATURES for f in features):
+            parts.append(self.user_features().reindex(frame[self.user_col].to_numpy()))
+        if self.item_col in frame and any(f in ITEM_FEATURES for f in features):
+            parts.append(self.item_features().reindex(frame[self.item_col].to_numpy()))
+
+        out = pd.concat([p.reset_index(drop=True) for p in parts], axis=1)
+        out.index = frame.index
+        for count in ("user_review_count", "item_review_count"):
+            if count in out:
+                out[count] = out[count].fillna(0).astype(np.int64)
+        return out[[f for f in features if f in out]]
+
+    # PERSISTENCE
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """Persist the running state as parquet files."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.user_stats.rename_axis("key").reset_index().to_parquet(directory / "user_stats.parquet", index=False)
+        self.item_stats.rename_axis("key").reset_index().to_parquet(directory / "item_stats.parquet", index=False)
+        pd.DataFrame({"last_interaction_id": [self.last_interaction_id]}).to_parquet(
+            directory / "watermark.parquet", index=False
+        )
+        pd.DataFrame({"id": self.recent_ids}).to_parquet(directory / "recent_ids.parquet", index=False)
+        return directory
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], **kwargs: Any) -> "AggregateFeatureEngine":
+        """Restore an engine saved with ``save``."""
+        directory = Path(directory)
+        engine = cls(**kwargs)
+        engine.user_stats = pd.read_parquet(directory / "user_stats.parquet").set_index("key").rename_axis(None)
+        engine.item_stats = pd.read_parquet(directory / "item_stats.parquet").set_index("key").rename_axis(None)
+        engine.last_interaction_id = int(
+            pd.read_parquet(directory / "watermark.parquet")["last_interaction_id"].iloc[0]
+        )
+        recent_path = directory / "recent_ids.parquet"
+        if recent_path.exists():
+            engine.recent_ids = pd.read_parquet(recent_path)["id"].to_numpy(np.int64)
+        else:  # saved before the lag window: treat every id up to the watermark as aggregated
+            watermark = engine.last_interaction_id
+            engine.recent_ids = np.arange(max(watermark - engine.id_lag, 0) + 1, watermark + 1, dtype=np.int64)
+        return engine
+
+
+def _empty_state() -> pd.DataFrame:
+    return pd.DataFrame({
+        "n_interactions": pd.Series(dtype=np.int64),
+        "n_rated": pd.Series(dtype=np.int64),
+        "rating_sum": pd.Series(dtype=np.float64),
+        "first_ts": pd.Series(dtype=np.int64),
+        "last_ts": pd.Series(dtype=np.int64),
+    })
+
+
+def _batch_state(frame: pd.DataFrame, keys: pd.Series) -> pd.DataFrame:
+    """Grouped aggregates of one batch, in the running-state layout."""
+    grouped = frame.groupby(keys.to_numpy(), sort=False)
+    state = pd.DataFrame({
+        "n_interactions": grouped.size(),
+        "n_rated": grouped["rated"].sum(),
+        "rating_sum": grouped["rating"].sum(),
+        "first_ts": grouped["ts"].min(),
+        "last_ts": grouped["ts"].max(),
+    })
+    return state.astype({"n_interactions": np.int64, "n_rated": np.int64})
+
+
+def _merge(state: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Combine running state with a batch delta, touching only the batch's keys."""
+    if state.empty:
+        return delta
+
+    existing = delta.index.isin(state.index)
+    if existing.any():
+        keys = delta.index[existing]
+        old = state.loc[keys]
+        new = delta.loc[keys]
+        state.loc[keys, _SUM_COLUMNS] = old[_SUM_COLUMNS].to_numpy() + new[_SUM_COLUMNS].to_numpy()
+        state.loc[keys, "first_ts"] = np.minimum(old["first_ts"].to_numpy(), new["first_ts"].to_numpy())
+        state.loc[keys, "last_ts"] = np.maximum(old["last_ts"].to_numpy(), new["last_ts"].to_numpy())
+
+    if not existing.all():
+        state = pd.concat([state, delta[~existing]])
+    return state[_STATE_COLUMNS]
+
+
+def _to_epoch_ms(timestamps: pd.Series) -> np.ndarray:
+    """Epoch milliseconds from integer (ms) or datetime timestamps."""
+    if pd.api.types.is_numeric_dtype(timestamps):
+        return timestamps.to_numpy(np.int64)
+    values = pd.to_datetime(timestamps)
+    if values.dt.tz is not None:
+        values = values.dt.tz_convert(None)
+    return values.to_numpy("datetime64[ms]").astype(np.int64)
+
+
+def _safe_divide(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    return numerator / denominator.where(denominator > 0)
@@ -0,0 +1,210 @@
+"""
+Compact ID encoding for XAE-Frame.
+
+String identifiers (``user_id``, ``parent_asin``, ``customer_id``) are mapped
+once to dense ``int32`` codes by an ``IdVocabulary`` persisted as a one-column
+parquet file (row number = code). Codes are append-only, so they stay stable
+as new categories or interactions extend the vocabulary, and the same code
+means the same ID in the feature store, training matrices and logs.
+
+Parquet files keep the string columns dictionary-encoded; ``read_encoded``
+reads them as Arrow dictionaries and only hashes each chunk's distinct values,
+then gathers codes for the rows. Reverse lookup (code -> ID) is an array take.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOCAB_DIR = Path("data/raw/vocab")
+
+# Code used for IDs missing from the vocabulary (and for nulls)
+UNKNOWN = -1
+
+
+class IdVocabulary:
+    """
+    Append-only bidirectional mapping between string IDs and int32 codes.
+
+    Example:
+        users = IdVocabulary.load("data/raw/vocab/user_id.parquet")
+        codes = users.encode(df["user_id"], extend=True)
+        users.decode(codes[:5])
+    """
+
+    def __init__(self, ids: Optional[Iterable[str]] = None, name: str = "id"):
+        """Initialize vocabulary with IDs in code order."""
+        self.name = name
+        self._ids = np.asarray(list(ids) if ids is not None else [], dtype=object)
+        self._index: Optional[pd.Index] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def index(self) -> pd.Index:
+        """Hash index from ID to code (built lazily)."""
+        if self._index is None:
+            self._index = pd.Index(self._ids)
+        return self._index
+
+    def extend(self, values: Iterable[str]) -> int:
+        """Append unseen IDs, returning how many were added."""
+        uniques = pd.unique(pd.Series(values, dtype=object).dropna())
+        new = uniques[self.index.get_indexer(uniques) == UNKNOWN]
+        if len(new) == 0:
+            return 0
+        if len(self._ids) + len(new) > np.iinfo(np.int32).max:
+            raise OverflowError(f"Vocabulary '{self.name}' exceeds int32 range")
+        self._ids = np.concatenate([self._ids, new.astype(object)])
+        self._index = None
+        return len(new)
+
+    def encode(self, values: Iterable[str], extend: bool = False) -> np.ndarray:
+        """Map IDs to int32 codes (``UNKNOWN`` for unseen IDs unless extending)."""
+        values = pd.Series(values, dtype=object)
+        if extend:
+            self.extend(values)
+        return self.index.get_indexer(values).astype(np.int32)
+
+    def encode_arrow(
+        self,
+        array: Union[pa.Array, pa.ChunkedArray],
+        extend: bool = False,
+    ) -> pa.ChunkedArray:
+        """
+        Encode an Arrow string column, hashing each chunk's distinct values once.
+
+        Dictionary-encoded input (as produced by ``read_dictionary``) is used
+        as-is; plain strings are dictionary-encoded first.
+        """
+        chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+        encoded = []
+        for chunk in chunks:
+            if not pa.types.is_dictionary(chunk.type):
+                chunk = chunk.dictionary_encode()
+            dictionary_codes = self.encode(
+                chunk.dictionary.to_numpy(zero_copy_only=False), extend=extend
+            )
+            indices = chunk.indices.fill_null(0).to_numpy(zero_copy_only=False)
+            codes = dictionary_codes[indices] if len(dictionary_codes) else np.full(len(chunk), UNKNOWN, np.int32)
+            if chunk.null_count:
+                codes[chunk.is_null().to_numpy(zero_copy_only=False)] = UNKNOWN
+            encoded.append(pa.array(codes, type=pa.int32()))
+        return pa.chunked_array(encoded, type=pa.int32())
+
+    def decode(self, codes: Iterable[int]) -> np.ndarray:
+        """Map codes back to IDs (None for ``UNKNOWN``)."""
+        codes = np.asarray(codes, dtype=np.int64)
+        out = np.empty(len(codes), dtype=object)
+        valid = (codes >= 0) & (codes < len(self._ids))
+        out[valid] = self._ids[codes[valid]]
+        out[~valid] = None
+        return out
+
+    def lookup(self, code: int) -> Optional[str]:
+        """Reverse lookup of a single code."""
+        return self._ids[code] if 0 <= code < len(self._ids) else None
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Atomically write the vocabulary as a one-column parquet file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+        pq.write_table(pa.table({"id": pa.array(self._ids, type=pa.string())}), tmp)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], name: Optional[str] = None) -> "IdVocabulary":
+        """Load a vocabulary (empty if the file does not exist yet)."""
+        path = Path(path)
+        name = name or path.stem
+        if not path.exists():
+            return cls(name=name)
+        ids = pq.read_table(path, columns=["id"]).column("id").to_numpy(zero_copy_only=False)
+        return cls(ids, name=name)
+
+
+def vocabulary_path(name: str, vocab_dir: Union[str, Path] = DEFAULT_VOCAB_DIR) -> Path:
+    """Location of the vocabulary file for ``name`` (e.g. "user_id")."""
+    return Path(vocab_dir) / f"{name}.parquet"
+
+
+def load_vocabularies(
+    names: Iterable[str],
+    vocab_dir: Union[str, Path] = DEFAULT_VOCAB_DIR,
+) -> Dict[str, IdVocabulary]:
+    """Load several vocabularies by name."""
+    return {name: IdVocabulary.load(vocabulary_path(name, vocab_dir), name) for name in names}
+
+
+def update_vocabularies(
+    parquet_path: Union[str, Path],
+    columns: Dict[str, str],
+    vocab_dir: Union[str, Path] = DEFAULT_VOCAB_DIR,
+    batch_size: int = 500_000,
+) -> Dict[str, IdVocabulary]:
+    """
+    Extend persisted vocabularies with the IDs found in a parquet file.
+
+    Args:
+        parquet_path: File to scan (read in batches as Arrow dictionaries)
+        columns: Mapping of parquet column -> vocabulary name,
+                 e.g. {"user_id": "user_id", "parent_asin": "item_id"}
+        vocab_dir: Directory holding the vocabulary files
+        batch_size: Rows per scanned batch
+
+    Returns:
+        The updated vocabularies keyed by vocabulary name
+    """
+    vocabularies = load_vocabularies(columns.values(), vocab_dir)
+    source = pq.ParquetFile(parquet_path, read_dictionary=list(columns))
+
+    for batch in source.iter_batches(batch_size=batch_size, columns=list(columns)):
+        for column, name in columns.items():
+            array = batch.column(column)
+            values = array.dictionary if pa.types.is_dictionary(array.type) else array.unique()
+            vocabularies[name].extend(values.to_numpy(zero_copy_only=False))
+
+    for name, vocabulary in vocabularies.items():
+        vocabulary.save(vocabulary_path(name, vocab_dir))
+        logger.info(f"✓ Vocabulary {name}: {len(vocabulary):,} IDs")
+
+    return vocabularies
+
+
+def read_encoded(
+    parquet_path: Union[str, Path],
+    vocabularies: Dict[str, IdVocabulary],
+    columns: Optional[List[str]] = None,
+    extend: bool = False,
+) -> pd.DataFrame:
+    """
+    Read a parquet file with ID columns replaced by int32 codes.
+
+    Args:
+        parquet_path: File to read
+        vocabularies: Mapping of column -> vocabulary used to encode it
+        columns: Columns to read (None = all)
+        extend: Add unseen IDs to the vocabularies instead of mapping
+                them to ``UNKNOWN``
+    """
+    id_columns = [c for c in vocabularies if columns is None or c in columns]
+    table = pq.read_table(parquet_path, columns=columns, read_dictionary=id_columns)
+
+    for column in id_columns:
+        position = table.schema.get_field_index(column)
+        codes = vocabularies[column].encode_arrow(table.column(column), extend=extend)
+        table = table.set_column(position, column, codes)
+
+    # Stored pandas metadata would turn the codes back into strings
+    return table.replace_schema_metadata(None).to_pandas()
@@ -0,0 +1,342 @@
+"""
+Memory-mapped feature matrix cache for XAE-Frame.
+
+The engineered train/val/test split is materialized once as ``.npy`` files
+next to a ``schema.json``:
+
+    data/processed/matrix_cache/<key>/
+        X_train.npy  y_train.npy  X_val.npy  y_val.npy  X_test.npy  y_test.npy
+        schema.json
+
+The key hashes the config ``features`` section, the split settings
+(``train_ratio`` / ``val_ratio`` / ``test_ratio`` / ``random_seed``), the
+target and feature columns requested by the caller and the content hashes of the configured raw files (``raw_data_path`` /
+``metadata_path``, taken from their raw data manifest entries), so changing
+any of them yields a new entry while repeat runs reuse the existing one;
+downloads of other datasets do not invalidate it. Training (``src/models``), SHAP background
+sampling (``src/xai``) and drift reference windows (``src/adaptive``) open the
+files with ``mmap_mode="r"``: all stages in all processes share the OS page
+cache instead of each holding a private copy.
+"""
+
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .cache import DatasetCache, cache_key, file_sha256
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path("data/processed/matrix_cache")
+DEFAULT_MANIFEST = Path("data/raw/manifest.json")
+
+SPLITS = ("train", "val", "test")
+
+# Bump when the on-disk layout changes
+MATRIX_CACHE_VERSION = 1
+
+# Dataset config entries naming the raw files a feature matrix is built from
+SOURCE_PATH_KEYS = ("raw_data_path", "metadata_path")
+
+
+@dataclass
+class FeatureMatrices:
+    """Read-only memory-mapped views of one cached split."""
+
+    key: str
+    directory: Path
+    feature_names: List[str]
+    target: Optional[str]
+    schema: Dict[str, Any] = field(repr=False)
+
+    def X(self, split: str = "train") -> np.ndarray:
+        """Feature matrix of ``split`` (a read-only memmap)."""
+        return np.load(self.directory / f"X_{split}.npy", mmap_mode="r")
+
+    def y(self, split: str = "train") -> Optional[np.ndarray]:
+        """Target vector of ``split`` (None if no target was cached)."""
+        path = self.directory / f"y_{split}.npy"
+        return np.load(path, mmap_mode="r") if path.exists() else None
+
+    def frame(self, split: str = "train") -> pd.DataFrame:
+        """``split`` as a DataFrame with feature names (copies the rows)."""
+        return pd.DataFrame(np.asarray(self.X(split)), columns=self.feature_names)
+
+    def sample(self, n: int, split: str = "train", seed: int = 0) -> np.ndarray:
+        """Random rows of ``split``, e.g. a SHAP background dataset."""
+        X = self.X(split)
+        n = min(n, len(X))
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), size=n, replace=False))
+        return np.asarray(X[rows])
+
+
+class FeatureMatrixCache:
+    """
+    Materialize the engineered split once and reopen it zero-copy.
+
+    Example:
+        cache = FeatureMatrixCache()
+        matrices = cache.get_or_build(config, lambda: build_features(config), target="rating")
+        model.fit(matrices.X("train"), matrices.y("train"))
+        background = matrices.sample(config["explainability"]["shap"]["sample_size"])
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        manifest_path: Union[str, Path] = DEFAULT_MANIFEST,
+        dtype: Union[str, np.dtype] = np.float32,
+        chunk_rows: int = 250_000,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Directory holding one subdirectory per key
+            manifest_path: Raw data manifest holding the source files' content hashes
+            dtype: Feature matrix dtype
+            chunk_rows: Rows copied per step when writing the memmaps
+        """
+        self.cache_dir = Path(cache_dir)
+        self.manifest_path = Path(manifest_path)
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+
+    def key(
+        self,
+        config: Dict[str, Any],
+        target: Optional[str] = None,
+        feature_columns: Optional[List[str]] = None,
+    ) -> str:
+        """Cache key for the features, split settings, columns and raw data of ``config``."""
+        return cache_key(**self._key_inputs(config, target, feature_columns))[:16]
+
+    def open(
+        self,
+        config: Dict[str, Any],
+        target: Optional[str] = None,
+        feature_columns: Optional[List[str]] = None,
+    ) -> Optional[FeatureMatrices]:
+        """Open the cached matrices for ``config`` and these columns (None on a miss)."""
+        directory = self.cache_dir / self.key(config, target, feature_columns)
+        schema_path = directory / "schema.json"
+        if not schema_path.exists():
+            return None
+        with open(schema_path, "r") as f:
+            schema = json.load(f)
+        if schema["target"] != target or (
+            feature_columns is not None and schema["feature_names"] != list(feature_columns)
+        ):
+            logger.warning(f"Feature matrices {schema['key']} were built for other columns, rebuilding")
+            return None
+        return FeatureMatrices(
+            key=schema["key"],
+            directory=directory,
+            feature_names=schema["feature_names"],
+            target=schema["target"],
+            schema=schema,
+        )
+
+    def get_or_build(
+        self,
+        config: Dict[str, Any],
+        builder: Callable[[], pd.DataFrame],
+        target: Optional[str] = None,
+        feature_columns: Optional[List[str]] = None,
+    ) -> FeatureMatrices:
+        """
+        Open the cached matrices, building them with ``builder`` on a miss.
+
+        Args:
+            config: Domain configuration
+            builder: Returns the engineered frame (only called on a miss)
+            target: Target column in the frame
+            feature_columns: Feature columns (None = all numeric non-target columns)
+        """
+        matrices = self.open(config, target, feature_columns)
+        if matrices is not None:
+            logger.info(f"✓ Feature matrices {matrices.key} found in cache, skipping")
+            return matrices
+        return self.build(config, builder(), target=target, feature_columns=feature_columns)
+
+    def build(
+        self,
+        config: Dict[str, Any],
+        frame: pd.DataFrame,
+        target: Optional[str] = None,
+        feature_columns: Optional[List[str]] = None,
+    ) -> FeatureMatrices:
+        """
+        Split ``frame`` and write the split as memory-mapped ``.npy`` files.
+
+        Returns:
+            The opened matrices
+        """
+        requested = feature_columns
+        if feature_columns is None:
+            feature_columns = [
+                c for c in frame.columns
+                if c != target and pd.api.types.is_numeric_dtype(frame[c])
+            ]
+
+        key = self.key(config, target, requested)
+        directory = self.cache_dir / key
+        staging = self.cache_dir / f".{key}.partial-{os.getpid()}"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+
+        try:
+            splits = split_indices(len(frame), config)
+            shapes = {}
+            for split, rows in splits.items():
+                self._write_split(staging, split, frame, rows, feature_columns, target)
+                shapes[split] = [len(rows), len(feature_columns)]
+
+            schema = {
+                "version": MATRIX_CACHE_VERSION,
+                "key": key,
+                "inputs": self._key_inputs(config, target, requested),
+                "feature_names": feature_columns,
+                "target": target,
+                "dtype": self.dtype.name,
+                "shapes": shapes,
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            }
+            with open(staging / "schema.json", "w") as f:
+                json.dump(schema, f, indent=2, default=str)
+
+            if directory.exists():
+                shutil.rmtree(directory)  # incomplete entry without schema.json
+            os.replace(staging, directory)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging)
+
+        logger.info(
+            f"✓ Cached feature matrices {key}: "
+            + ", ".join(f"{s}={shape[0]:,}" for s, shape in shapes.items())
+            + f" x {len(feature_columns)} features"
+        )
+        return self.open(config, target, requested)
+
+    def prune(self, keep: Optional[List[str]] = None) -> int:
+        """Delete cached entries whose key is not in ``keep``."""
+        keep = set(keep or [])
+        removed = 0
+        for directory in self.cache_dir.glob("*"):
+            if directory.is_dir() and directory.name not in keep:
+                shutil.rmtree(directory)
+                removed += 1
+        return removed
+
+    # INTERNALS
+
+    def _key_inputs(
+        self,
+        config: Dict[str, Any],
+        target: Optional[str] = None,
+        feature_columns: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        dataset = config.get("dataset", {})
+        return {
+            "features": config.get("features", {}),
+            # None = all numeric non-target columns, which the target also changes
+            "columns": {
+                "target": target,
+                "feature_columns": None if feature_columns is None else list(feature_columns),
+            },
+            "split": {
+                name: dataset.get(name)
+                for name in ("train_ratio", "val_ratio", "test_ratio", "random_seed")
+            },
+            "sources": self._source_hashes(config),
+            "dtype": self.dtype.name,
+            "version": MATRIX_CACHE_VERSION,
+        }
+
+    def _source_hashes(self, config: Dict[str, Any]) -> Any:
+        """
+        Content hash per configured raw file, from its manifest entry.
+
+        Files missing from the manifest are hashed directly. Configs naming no
+        raw file fall back to the hash of the whole manifest.
+        """
+        dataset = config.get("dataset", {})
+        paths = [Path(dataset[name]) for name in SOURCE_PATH_KEYS if dataset.get(name)]
+        if not paths:
+            return file_sha256(self.manifest_path) if self.manifest_path.exists() else None
+
+        entries = DatasetCache(self.manifest_path.parent) if self.manifest_path.exists() else None
+        hashes = {}
+        for path in paths:
+            entry = entries.current_entry(path) if entries is not None else None
+            if entry is not None:
+                hashes[path.name] = entry["sha256"]
+            else:
+                hashes[path.name] = file_sha256(path) if path.exists() else None
+        return hashes
+
+    def _write_split(
+        self,
+        directory: Path,
+        split: str,
+        frame: pd.DataFrame,
+        rows: np.ndarray,
+        feature_columns: List[str],
+        target: Optional[str],
+    ) -> None:
+        """Copy the split's rows into fresh memmaps chunk by chunk."""
+        X = np.lib.format.open_memmap(
+            directory / f"X_{split}.npy", mode="w+", dtype=self.dtype,
+            shape=(len(rows), len(feature_columns)),
+        )
+        y = None
+        if target is not None:
+            y = np.lib.format.open_memmap(
+                directory / f"y_{split}.npy", mode="w+", dtype=self.dtype, shape=(len(rows),)
+            )
+
+        for start in range(0, len(rows), self.chunk_rows):
+            chunk = frame.iloc[rows[start:start + self.chunk_rows]]
+            X[start:start + len(chunk)] = chunk[feature_columns].to_numpy(self.dtype, na_value=np.nan)
+            if y is not None:
+                y[start:start + len(chunk)] = chunk[target].to_numpy(self.dtype, na_value=np.nan)
+
+        X.flush()
+        del X
+        if y is not None:
+            y.flush()
+            del y
+
+
+def split_indices(n_rows: int, config: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Shuffled train/val/test row indices following the dataset config.
+
+    Indices within each split are sorted so writes read the source in order.
+    """
+    dataset = config.get("dataset", {})
+    ratios = np.array([
+        dataset.get("train_ratio", 0.7),
+        dataset.get("val_ratio", 0.15),
+        dataset.get("test_ratio", 0.15),
+    ], dtype=np.float64)
+    ratios = ratios / ratios.sum()
+
+    permutation = np.random.default_rng(dataset.get("random_seed", 42)).permutation(n_rows)
+    n_train = int(round(ratios[0] * n_rows))
+    n_val = int(round(ratios[1] * n_rows))
+    bounds = [0, n_train, n_train + n_val, n_rows]
+    return {
+        split: np.sort(permutation[bounds[i]:bounds[i + 1]])
+        for i, split in enumerate(SPLITS)
+    }
@@ -0,0 +1,343 @@
+"""
+Out-of-core TF-IDF text features for XAE-Frame.
+
+Implements the ``features.text_features`` block of the domain config without
+holding all review text (or, in hashing mode, any vocabulary) in memory:
+
+    1. The review parquet is split into shards of whole row groups.
+    2. Each shard is read (text column only), vectorized into sparse term
+       counts and saved as ``counts-{i}.npz``; its document frequencies are
+       returned to the parent and summed into a global IDF vector.
+    3. ``min_df`` / ``max_df`` pruning and IDF weighting are applied per shard,
+       rows are L2-normalized and saved as CSR ``tfidf-{i}.npz`` shards.
+
+Shards are processed in a process pool; only shard indices and DF vectors
+cross process boundaries. The result is a CSR matrix LightGBM can train on
+directly without densifying.
+
+Modes:
+    - hashing: ``HashingVectorizer`` into ``max_features`` buckets
+      (stateless; only the IDF vector is accumulated)
+    - vocabulary: exact terms; an extra pass collects per-shard document
+      frequencies and keeps the ``max_features`` most frequent terms. Shard
+      counts are merged as each shard finishes, and the merged counts are
+      pruned to the ``vocabulary_buffer`` most frequent terms whenever they
+      grow past twice that, so memory stays bounded by the buffer rather
+      than the corpus vocabulary (terms outside the buffer may be
+      undercounted, like in any heavy-hitter sketch)
+"""
+
+import json
+import logging
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.preprocessing import normalize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = Path("data/processed/text_features")
+
+
+class TextFeatureStage:
+    """
+    Streaming TF-IDF vectorizer producing sharded CSR matrices.
+
+    Example:
+        stage = TextFeatureStage.from_config(config, text_column="text", jobs=4)
+        shards = stage.fit_transform("data/raw/amazon_reviews_Electronics.parquet")
+        X = load_shards(shards)   # scipy.sparse.csr_matrix
+    """
+
+    def __init__(
+        self,
+        mode: str = "hashing",
+        max_features: int = 5000,
+        min_df: Union[int, float] = 2,
+        max_df: Union[int, float] = 0.95,
+        text_column: str = "text",
+        shard_rows: int = 200_000,
+        jobs: int = 1,
+        output_dir: Union[str, Path] = DEFAULT_OUTPUT_DIR,
+        vocabulary_buffer: Optional[int] = None,
+    ):
+        """
+        Initialize stage.
+
+        Args:
+            mode: "hashing" or "vocabulary"
+            max_features: Hash buckets (hashing) or vocabulary size (vocabulary)
+            min_df: Minimum document frequency (int = count, float = proportion)
+            max_df: Maximum document frequency (int = count, float = proportion)
+            text_column: Column holding the review text
+            shard_rows: Approximate rows per shard (rounded to row groups)
+            jobs: Worker processes used per pass
+            output_dir: Directory for the ``.npz`` shards and stage state
+            vocabulary_buffer: Candidate terms kept between shard merges in
+                               vocabulary mode (default: 20x ``max_features``)
+        """
+        if mode not in ("hashing", "vocabulary"):
+            raise ValueError(f"Unknown text vectorization mode: {mode}")
+        self.mode = mode
+        self.max_features = max_features
+        self.min_df = min_df
+        self.max_df = max_df
+        self.text_column = text_column
+        self.shard_rows = shard_rows
+        self.jobs = jobs
+        self.output_dir = Path(output_dir)
+        self.vocabulary_buffer = vocabulary_buffer or 20 * max_features
+
+        self.vocabulary: Optional[Dict[str, int]] = None
+        self.idf: Optional[np.ndarray] = None
+        self.n_documents = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "TextFeatureStage":
+        """Build a stage from the ``features.text_features`` config block."""
+        text = config.get("features", {}).get("text_features", {})
+        vectorization = text.get("vectorization", "tfidf")
+        if vectorization != "tfidf":
+            raise ValueError(f"TextFeatureStage only implements tfidf, not {vectorization}")
+        kwargs.setdefault("max_features", text.get("max_features", 5000))
+        kwargs.setdefault("min_df", text.get("min_df", 2))
+        kwargs.setdefault("max_df", text.get("max_df", 0.95))
+        return cls(**kwargs)
+
+    # FITTING
+
+    def fit_transform(self, parquet_path: Union[str, Path]) -> List[Path]:
+        """
+        Fit IDF (and vocabulary) on a parquet file and write TF-IDF shards.
+
+        Returns:
+            Paths of the ``tfidf-{i}.npz`` shards in row order
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        shards = plan_shards(parquet_path, self.shard_rows)
+        logger.info(f"Vectorizing {parquet_path} in {len(shards)} shards ({self.mode} mode)")
+
+        if self.mode == "vocabulary":
+            self._fit_vocabulary(parquet_path, shards)
+
+        # Pass 1: term counts + document frequencies
+        results = self._map(_count_shard, [
+            (str(parquet_path), i, row_groups, self.text_column, self._vectorizer_params(),
+             str(self.output_dir))
+            for i, row_groups in enumerate(shards)
+        ])
+        df = np.zeros(self.n_columns, dtype=np.int64)
+        self.n_documents = 0
+        for shard_df, n_docs in results:
+            df += shard_df
+            self.n_documents += n_docs
+
+        self.idf = self._compute_idf(df)
+
+        # Pass 2: IDF weighting + normalization
+        paths = self._map(_weight_shard, [
+            (str(self.output_dir), i, self.idf) for i in range(len(shards))
+        ])
+
+        self.save_state()
+        kept = int((self.idf > 0).sum())
+        logger.info(f"✓ TF-IDF: {self.n_documents:,} documents, {kept:,}/{self.n_columns:,} active columns")
+        return [Path(p) for p in paths]
+
+    def transform(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """Vectorize new texts (e.g. on the request path) with the fitted IDF."""
+        if self.idf is None:
+            raise RuntimeError("TextFeatureStage must be fitted or loaded before transform")
+        counts = _make_vectorizer(self._vectorizer_params()).transform(list(texts))
+        return _apply_idf(counts, self.idf)
+
+    @property
+    def n_columns(self) -> int:
+        if self.mode == "vocabulary":
+            return len(self.vocabulary or {})
+        return self.max_features
+
+    def _fit_vocabulary(self, parquet_path: Union[str, Path], shards: List[List[int]]) -> None:
+        """Extra pass: merge per-shard term document frequencies as shards finish."""
+        df: Counter = Counter()
+        n_documents = 0
+        for shard_df, n_docs in self._imap_unordered(_term_document_frequency, [
+            (str(parquet_path), row_groups, self.text_column) for row_groups in shards
+        ]):
+            df.update(shard_df)
+            n_documents += n_docs
+            del shard_df
+            if len(df) > 2 * self.vocabulary_buffer:
+                df = Counter(dict(df.most_common(self.vocabulary_buffer)))
+
+        low, high = _df_bounds(self.min_df, self.max_df, n_documents)
+        kept = [(term, count) for term, count in df.items() if low <= count <= high]
+        kept.sort(key=lambda tc: (-tc[1], tc[0]))
+        terms = sorted(term for term, _ in kept[: self.max_features])
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+
+    def _compute_idf(self, df: np.ndarray) -> np.ndarray:
+        """Smooth IDF (as in scikit-learn), zeroed outside [min_df, max_df]."""
+        n = self.n_documents
+        idf = np.log((1 + n) / (1 + df)) + 1.0
+        low, high = _df_bounds(self.min_df, self.max_df, n)
+        idf[(df < low) | (df > high)] = 0.0
+        return idf.astype(np.float32)
+
+    def _vectorizer_params(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "n_features": self.max_features, "vocabulary": self.vocabulary}
+
+    def _map(self, func, args: List[Tuple]) -> List[Any]:
+        if self.jobs <= 1 or len(args) <= 1:
+            return [func(*a) for a in args]
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            return list(pool.map(func, *zip(*args)))
+
+    def _imap_unordered(self, func, args: List[Tuple]) -> Iterator[Any]:
+        """Results in completion order, with at most two tasks per worker in flight."""
+        if self.jobs <= 1 or len(args) <= 1:
+            for a in args:
+                yield func(*a)
+            return
+        pending = iter(args)
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            running = {pool.submit(func, *a) for a in _take(pending, 2 * self.jobs)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running |= {pool.submit(func, *a) for a in _take(pending, 1)}
+                    yield future.result()
+
+    # PERSISTENCE
+
+    def save_state(self) -> Path:
+        """Persist IDF, vocabulary and parameters next to the shards."""
+        np.save(self.output_dir / "idf.npy", self.idf)
+        state = {
+            "mode": self.mode,
+            "max_features": self.max_features,
+            "min_df": self.min_df,
+            "max_df": self.max_df,
+            "text_column": self.text_column,
+            "n_documents": self.n_documents,
+            "vocabulary": self.vocabulary,
+        }
+        path = self.output_dir / "text_features.json"
+        with open(path, "w") as f:
+            json.dump(state, f)
+        return path
+
+    @classmethod
+    def load(cls, output_dir: Union[str, Path] = DEFAULT_OUTPUT_DIR) -> "TextFeatureStage":
+        """Restore a fitted stage from its output directory."""
+        output_dir = Path(output_dir)
+        with open(output_dir / "text_features.json", "r") as f:
+            state = json.load(f)
+        stage = cls(
+            mode=state["mode"],
+            max_features=state["max_features"],
+            min_df=state["min_df"],
+            max_df=state["max_df"],
+            text_column=state["text_column"],
+            output_dir=output_dir,
+        )
+        stage.vocabulary = state["vocabulary"]
+        stage.n_documents = state["n_documents"]
+        stage.idf = np.load(output_dir / "idf.npy")
+        return stage
+
+
+def plan_shards(parquet_path: Union[str, Path], shard_rows: int) -> List[List[int]]:
+    """Group consecutive row groups into shards of roughly ``shard_rows`` rows."""
+    metadata = pq.ParquetFile(parquet_path).metadata
+    shards: List[List[int]] = []
+    current: List[int] = []
+    rows = 0
+    for i in range(metadata.num_row_groups):
+        current.append(i)
+        rows += metadata.row_group(i).num_rows
+        if rows >= shard_rows:
+            shards.append(current)
+            current, rows = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+def load_shards(paths: Iterable[Union[str, Path]]) -> sp.csr_matrix:
+    """Stack TF-IDF shards into one CSR matrix (row order preserved)."""
+    return sp.vstack([sp.load_npz(p) for p in paths], format="csr")
+
+
+# WORKER ENTRY POINTS
+
+def _read_texts(parquet_path: str, row_groups: List[int], text_column: str) -> List[str]:
+    table = pq.ParquetFile(parquet_path).read_row_groups(row_groups, columns=[text_column])
+    return [t or "" for t in table.column(text_column).to_pylist()]
+
+
+def _make_vectorizer(params: Dict[str, Any]):
+    if params["mode"] == "hashing":
+        return HashingVectorizer(
+            n_features=params["n_features"], alternate_sign=False, norm=None, dtype=np.float32
+        )
+    return CountVectorizer(vocabulary=params["vocabulary"], dtype=np.float32)
+
+
+def _term_document_frequency(parquet_path: str, row_groups: List[int], text_column: str):
+    texts = _read_texts(parquet_path, row_groups, text_column)
+    vectorizer = CountVectorizer(binary=True, dtype=np.int32)
+    try:
+        counts = vectorizer.fit_transform(texts)
+    except ValueError:  # shard without any tokens
+        return {}, len(texts)
+    df = np.asarray(counts.sum(axis=0)).ravel()
+    return dict(zip(vectorizer.get_feature_names_out(), df.tolist())), len(texts)
+
+
+def _count_shard(
+    parquet_path: str,
+    index: int,
+    row_groups: List[int],
+    text_column: str,
+    params: Dict[str, Any],
+    output_dir: str,
+) -> Tuple[np.ndarray, int]:
+    texts = _read_texts(parquet_path, row_groups, text_column)
+    counts = _make_vectorizer(params).transform(texts).tocsr()
+    counts.sum_duplicates()
+    sp.save_npz(Path(output_dir) / f"counts-{index:05d}.npz", counts)
+    n_columns = counts.shape[1]
+    return np.bincount(counts.indices, minlength=n_columns), counts.shape[0]
+
+
+def _weight_shard(output_dir: str, index: int, idf: np.ndarray) -> str:
+    counts_path = Path(output_dir) / f"counts-{index:05d}.npz"
+    tfidf = _apply_idf(sp.load_npz(counts_path), idf)
+    path = Path(output_dir) / f"tfidf-{index:05d}.npz"
+    sp.save_npz(path, tfidf)
+    counts_path.unlink()
+    return str(path)
+
+
+def _apply_idf(counts: sp.csr_matrix, idf: np.ndarray) -> sp.csr_matrix:
+    counts = counts.tocsr().astype(np.float32)
+    counts.data *= idf[counts.indices]
+    counts.eliminate_zeros()
+    return normalize(counts, norm="l2", copy=False)
+
+
+def _take(iterator: Iterator, n: int) -> List:
+    return [item for _, item in zip(range(n), iterator)]
+
+
+def _df_bounds(min_df: Union[int, float], max_df: Union[int, float], n_documents: int) -> Tuple[float, float]:
+    low = min_df * n_documents if isinstance(min_df, float) else min_df
+    high = max_df * n_documents if isinstance(max_df, float) else max_df
+    return low, high
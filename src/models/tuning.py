@@ -0,0 +1,431 @@
+"""
+Hyperparameter search for the ``model.lightgbm`` config block.
+
+``ASHATuner`` runs asynchronous successive halving (ASHA) over random
+configurations:
+
+    rungs      a trial first trains ``min_rounds`` trees; the best
+               1/``eta`` of every rung is promoted to ``eta`` times the
+               rounds, up to ``max_rounds``, so most configurations are
+               stopped after a few dozen trees
+    async      a free worker promotes the best unpromoted trial of the
+               highest rung that has one, otherwise starts a new trial; no
+               worker waits for a rung to fill up
+    early      every run also stops after ``early_stopping_rounds`` without
+    stopping   validation improvement; such a trial has converged and is
+               never promoted again
+
+The training and validation sets are binned once and saved as LightGBM
+``Dataset`` binaries in ``work_dir``. Each worker process loads them once and
+reuses them for all its trials, so bins are never rebuilt per trial. Binning
+parameters (``max_bin``) are therefore fixed, not searched. The winner
+(with ``n_estimators`` set to its best iteration) is written to
+``config/overrides/{domain}.yaml``, which ``load_config`` merges over the
+domain config.
+"""
+
+import logging
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from ..adaptive.retraining_strategy import HIGHER_IS_BETTER
+from ..utils.config import OVERRIDES_DIR, merge_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORK_DIR = Path("data/tuning")
+
+# name -> (distribution, low, high); names as in the ``model.lightgbm`` block
+DEFAULT_SEARCH_SPACE: Dict[str, Tuple[str, float, float]] = {
+    "num_leaves": ("int_log", 15, 255),
+    "learning_rate": ("log", 0.01, 0.2),
+    "min_child_samples": ("int_log", 5, 200),
+    "subsample": ("uniform", 0.5, 1.0),
+    "colsample_bytree": ("uniform", 0.5, 1.0),
+    "reg_alpha": ("log", 1e-3, 10.0),
+    "reg_lambda": ("log", 1e-3, 10.0),
+}
+
+DISTRIBUTIONS = ["uniform", "log", "int", "int_log"]
+
+# Parameters baked into the Dataset binaries (constant across trials)
+DATASET_PARAMS = ["max_bin", "min_data_in_bin", "bin_construct_sample_cnt", "categorical_feature"]
+
+# Per-process cache of loaded Dataset binaries: (train_path, valid_path) -> (train, valid)
+_DATASETS: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+
+
+@dataclass
+class Trial:
+    """One sampled configuration and its best result so far."""
+
+    trial_id: int
+    params: Dict[str, Any]
+    rung: int = -1
+    rounds: int = 0
+    score: Optional[float] = None
+    best_iteration: int = 0
+    converged: bool = False
+    seconds: float = 0.0
+
+
+@dataclass
+class TuningResult:
+    """Winning configuration and search statistics."""
+
+    best_params: Dict[str, Any]
+    best_score: float
+    metric: str
+    trials: List[Trial] = field(default_factory=list)
+    rounds_trained: int = 0
+    full_budget_rounds: int = 0
+    seconds: float = 0.0
+
+    def to_override(self) -> Dict[str, Any]:
+        return {"model": {"lightgbm": self.best_params}}
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([{**asdict(t), **t.params} for t in self.trials]).drop(columns="params")
+
+
+def sample_params(space: Dict[str, Tuple[str, float, float]], rng: np.random.Generator) -> Dict[str, Any]:
+    """Draw one configuration from ``space``."""
+    params: Dict[str, Any] = {}
+    for name, (distribution, low, high) in space.items():
+        if distribution == "uniform":
+            params[name] = float(rng.uniform(low, high))
+        elif distribution == "log":
+            params[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+        elif distribution == "int":
+            params[name] = int(rng.integers(low, high + 1))
+        elif distribution == "int_log":
+            params[name] = int(round(math.exp(rng.uniform(math.log(low), math.log(high + 0.5)))))
+        else:
+            raise ValueError(f"Unknown distribution for {name}: {distribution}")
+    return params
+
+
+# WORKER
+
+def _datasets(train_path: str, valid_path: str, dataset_params: Dict[str, Any]):
+    import lightgbm as lgb
+
+    key = (train_path, valid_path)
+    if key not in _DATASETS:
+        train = lgb.Dataset(train_path, params=dataset_params).construct()
+        valid = lgb.Dataset(valid_path, reference=train, params=dataset_params).construct()
+        _DATASETS[key] = (train, valid)
+    return _DATASETS[key]
+
+
+def run_trial(
+    params: Dict[str, Any],
+    rounds: int,
+    train_path: str,
+    valid_path: str,
+    dataset_params: Dict[str, Any],
+    early_stopping_rounds: int,
+) -> Dict[str, Any]:
+    """
+    Train one configuration for up to ``rounds`` trees (runs in a worker process).
+
+    Returns:
+        ``score`` (best validation value of the first metric),
+        ``best_iteration``, ``iterations`` (trees trained), ``converged``
+        and ``seconds``
+    """
+    import lightgbm as lgb
+
+    start = time.perf_counter()
+    train, valid = _datasets(train_path, valid_path, dataset_params)
+    booster = lgb.train(
+        params,
+        train,
+        num_boost_round=rounds,
+        valid_sets=[valid],
+        valid_names=["valid"],
+        callbacks=[lgb.early_stopping(early_stopping_rounds, first_metric_only=True, verbose=False)],
+    )
+    metric = next(iter(booster.best_score["valid"]))
+    best_iteration = booster.best_iteration or rounds
+    return {
+        "score": float(booster.best_score["valid"][metric]),
+        "best_iteration": best_iteration,
+        "iterations": booster.current_iteration(),
+        "converged": booster.current_iteration() < rounds,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class ASHATuner:
+    """
+    Parallel ASHA search over LightGBM parameters.
+
+    Example:
+        tuner = ASHATuner.from_config(config)
+        result = tuner.tune(X_train, y_train, X_valid, y_valid)
+        write_override("e_commerce", result)      # config/overrides/e_commerce.yaml
+    """
+
+    def __init__(
+        self,
+        base_params: Optional[Dict[str, Any]] = None,
+        search_space: Optional[Dict[str, Tuple[str, float, float]]] = None,
+        n_trials: int = 64,
+        min_rounds: int = 25,
+        max_rounds: int = 800,
+        eta: int = 3,
+        early_stopping_rounds: int = 20,
+        n_workers: Optional[int] = None,
+        cpu_budget: Optional[int] = None,
+        work_dir: Union[str, Path] = DEFAULT_WORK_DIR,
+        seed: int = 42,
+        start_method: str = "spawn",
+    ):
+        """
+        Initialize tuner.
+
+        Args:
+            base_params: Fixed parameters (``model.lightgbm``: objective, metric, ...)
+            search_space: name -> (distribution, low, high), see ``DISTRIBUTIONS``
+            n_trials: Configurations sampled
+            min_rounds: Trees at the lowest rung
+            max_rounds: Trees at the highest rung
+            eta: Promotion ratio (top 1/eta advance, with eta times the trees)
+            early_stopping_rounds: Rounds without validation improvement before a run stops
+            n_workers: Parallel trials (default: one per budgeted core)
+            cpu_budget: Cores shared by all workers (default: all)
+            work_dir: Directory for the Dataset binaries
+            seed: Seed of the parameter sampling and of LightGBM
+            start_method: multiprocessing start method of the workers
+        """
+        self.base_params = {k: v for k, v in (base_params or {}).items() if k not in ("n_estimators", "n_jobs")}
+        self.base_params.setdefault("verbose", -1)
+        self.search_space = dict(search_space or DEFAULT_SEARCH_SPACE)
+        self.n_trials = n_trials
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.early_stopping_rounds = early_stopping_rounds
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.n_workers = max(1, min(n_workers or self.cpu_budget, self.cpu_budget))
+        self.work_dir = Path(work_dir)
+        self.seed = seed
+        self.start_method = start_method
+
+        self.metric = str(self.base_params.get("metric", "l2")).split(",")[0]
+        self.rungs = [min_rounds * eta ** k for k in range(64) if min_rounds * eta ** k < max_rounds] + [max_rounds]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "ASHATuner":
+        """Build a tuner from ``model.lightgbm`` and the ``model.tuning`` config block."""
+        model = config.get("model", {})
+        tuning = model.get("tuning", {})
+        kwargs.setdefault("base_params", model.get("lightgbm", {}))
+        for key in ("n_trials", "min_rounds", "max_rounds", "eta", "early_stopping_rounds",
+                    "n_workers", "cpu_budget", "work_dir"):
+            if tuning.get(key) is not None:
+                kwargs.setdefault(key, tuning[key])
+        kwargs.setdefault("seed", config.get("dataset", {}).get("random_seed", 42))
+        return cls(**kwargs)
+
+    # DATA
+
+    def prepare(self, X_train, y_train, X_valid, y_valid) -> Tuple[str, str]:
+        """
+        Bin the training/validation sets once and save them as Dataset binaries.
+
+        Returns:
+            (train_path, valid_path)
+        """
+        import lightgbm as lgb
+
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        train_path = self.work_dir / f"train-{os.getpid()}.bin"
+        valid_path = self.work_dir / f"valid-{os.getpid()}.bin"
+        for path in (train_path, valid_path):
+            path.unlink(missing_ok=True)  # save_binary does not overwrite
+
+        start = time.perf_counter()
+        train = lgb.Dataset(X_train, label=np.asarray(y_train), params=self.dataset_params).construct()
+        train.save_binary(str(train_path))
+        valid = lgb.Dataset(X_valid, label=np.asarray(y_valid), reference=train, params=self.dataset_params)
+        valid.construct().save_binary(str(valid_path))
+        logger.info(f"Binned {train.num_data():,} training rows once in {time.perf_counter() - start:.1f}s")
+        return str(train_path), str(valid_path)
+
+    @property
+    def dataset_params(self) -> Dict[str, Any]:
+        params = {k: self.base_params[k] for k in DATASET_PARAMS if k in self.base_params}
+        # min_child_samples is searched, so features must not be pre-filtered by it
+        params.update({"feature_pre_filter": False, "verbose": -1})
+        return params
+
+    # SEARCH
+
+    def tune(self, X_train, y_train, X_valid=None, y_valid=None, valid_fraction: float = 0.15) -> TuningResult:
+        """
+        Run the search.
+
+        Args:
+            X_train, y_train: Training rows
+            X_valid, y_valid: Validation rows (default: random ``valid_fraction`` of the training rows)
+            valid_fraction: Held-out share when no validation set is given
+
+        Returns:
+            TuningResult with the winning ``model.lightgbm`` parameters
+        """
+        if X_valid is None:
+            rng = np.random.default_rng(self.seed)
+            valid = rng.random(len(y_train)) < valid_fraction
+            take = (lambda X, rows: X.iloc[rows]) if isinstance(X_train, pd.DataFrame) else (lambda X, rows: X[rows])
+            y_train = np.asarray(y_train)
+            X_train, X_valid = take(X_train, ~valid), take(X_train, valid)
+            y_train, y_valid = y_train[~valid], y_train[valid]
+
+        start = time.perf_counter()
+        train_path, valid_path = self.prepare(X_train, y_train, X_valid, y_valid)
+        try:
+            trials = self._search(train_path, valid_path)
+        finally:
+            for path in (train_path, valid_path):
+                Path(path).unlink(missing_ok=True)
+
+        finished = [t for t in trials if t.score is not None]
+        if not finished:
+            raise RuntimeError("No tuning trial finished")
+        best = min(finished, key=lambda t: self._loss(t.score))
+        result = TuningResult(
+            best_params=self._config_params(best),
+            best_score=best.score,
+            metric=self.metric,
+            trials=trials,
+            rounds_trained=self._rounds_trained,
+            full_budget_rounds=self.n_trials * self.max_rounds,
+            seconds=time.perf_counter() - start,
+        )
+        logger.info(
+            f"✓ Best {self.metric} {best.score:.5f} (trial {best.trial_id}, {best.best_iteration} trees) "
+            f"after {result.rounds_trained:,} of {result.full_budget_rounds:,} full-budget rounds "
+            f"in {result.seconds:.1f}s"
+        )
+        return result
+
+    def _search(self, train_path: str, valid_path: str) -> List[Trial]:
+        rng = np.random.default_rng(self.seed)
+        trials: List[Trial] = []
+        rung_losses: List[Dict[int, float]] = [{} for _ in self.rungs]
+        promoted: List[set] = [set() for _ in self.rungs]
+        self._rounds_trained = 0
+        cpus = max(1, self.cpu_budget // self.n_workers)
+
+        def next_job() -> Optional[Tuple[Trial, int]]:
+            for rung in range(len(self.rungs) - 2, -1, -1):
+                ranked = sorted(rung_losses[rung], key=rung_losses[rung].get)
+                for trial_id in ranked[: len(ranked) // self.eta]:
+                    if trial_id not in promoted[rung] and not trials[trial_id].converged:
+                        promoted[rung].add(trial_id)
+                        return trials[trial_id], rung + 1
+            if len(trials) < self.n_trials:
+                trial = Trial(len(trials), sample_params(self.search_space, rng))
+                trials.append(trial)
+                return trial, 0
+            return None
+
+        context = get_context(self.start_method)
+        with ProcessPoolExecutor(self.n_workers, mp_context=context) as pool:
+            running: Dict[Any, Tuple[Trial, int]] = {}
+            while True:
+                while len(running) < self.n_workers:
+                    job = next_job()
+                    if job is None:
+                        break
+                    trial, rung = job
+                    future = pool.submit(run_trial, self._trial_params(trial, cpus), self.rungs[rung],
+                                         train_path, valid_path, self.dataset_params, self.early_stopping_rounds)
+                    running[future] = job
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trial, rung = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        logger.warning(f"Trial {trial.trial_id} failed: {e}")
+                        trial.converged = True  # never promote a failing configuration
+                        continue
+                    trial.rung, trial.rounds = rung, self.rungs[rung]
+                    trial.score, trial.best_iteration = outcome["score"], outcome["best_iteration"]
+                    trial.converged = outcome["converged"]
+                    trial.seconds += outcome["seconds"]
+                    self._rounds_trained += outcome["iterations"]
+                    rung_losses[rung][trial.trial_id] = self._loss(trial.score)
+
+        pruned = sum(t.rung < len(self.rungs) - 1 and not t.converged for t in trials)
+        logger.info(f"{len(trials)} trials: {pruned} pruned, rung sizes {[len(r) for r in rung_losses]}")
+        return trials
+
+    # INTERNALS
+
+    def _trial_params(self, trial: Trial, cpus: int) -> Dict[str, Any]:
+        params = {**self.base_params, **trial.params, "num_threads": cpus, "seed": self.seed}
+        if params.get("subsample", 1.0) < 1.0:
+            params.setdefault("subsample_freq", 1)  # bagging is off unless a frequency is set
+        return params
+
+    def _config_params(self, trial: Trial) -> Dict[str, Any]:
+        params = dict(trial.params)
+        if params.get("subsample", 1.0) < 1.0:
+            params["subsample_freq"] = 1
+        params["n_estimators"] = int(trial.best_iteration)
+        return {k: round(v, 6) if isinstance(v, float) else v for k, v in params.items()}
+
+    def _loss(self, score: float) -> float:
+        return -score if self.metric.lower() in HIGHER_IS_BETTER else score
+
+
+def write_override(
+    domain: str,
+    result: TuningResult,
+    overrides_dir: Union[str, Path] = OVERRIDES_DIR,
+) -> Path:
+    """
+    Merge the tuned ``model.lightgbm`` parameters into ``{overrides_dir}/{domain}.yaml``.
+
+    Other settings already in the override file are kept.
+
+    Returns:
+        Path of the override file
+    """
+    path = Path(overrides_dir) / f"{domain}.yaml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    existing: Dict[str, Any] = {}
+    if path.exists():
+        with open(path) as f:
+            existing = yaml.safe_load(f) or {}
+
+    header = (
+        f"# Written by src/models/tuning.py on {datetime.utcnow():%Y-%m-%d %H:%M} UTC\n"
+        f"# Best validation {result.metric}: {result.best_score:.6f} "
+        f"({len(result.trials)} ASHA trials, {result.seconds:.0f}s)\n"
+    )
+    tmp = path.with_suffix(f".yaml.tmp-{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(header)
+        yaml.safe_dump(merge_config(existing, result.to_override()), f, sort_keys=False)
+    os.replace(tmp, path)
+    logger.info(f"✓ Wrote tuned parameters to {path}")
+    return path
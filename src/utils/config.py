@@ -0,0 +1,67 @@
+"""
+Configuration loading for XAE-Frame.
+
+Domain configs live in ``config/{domain}.yaml`` (see ``config/e_commerce.yaml``).
+Machine-written settings, such as tuned ``model.lightgbm`` parameters from
+``src/models/tuning.py``, go to ``config/overrides/{domain}.yaml`` and are
+merged over the domain config on load.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import yaml
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "config"
+OVERRIDES_DIR = CONFIG_DIR / "overrides"
+
+
+def load_config(path: Union[str, Path] = CONFIG_DIR / "e_commerce.yaml", overrides: bool = True) -> Dict[str, Any]:
+    """
+    Load a domain configuration file.
+
+    Args:
+        path: Path to a YAML config, or a bare domain name (e.g. "e_commerce")
+        overrides: Merge ``config/overrides/{domain}.yaml`` if it exists
+
+    Returns:
+        Parsed configuration dictionary
+    """
+    path = Path(path)
+    if not path.suffix:
+        path = CONFIG_DIR / f"{path.name}.yaml"
+
+    with open(path, "r") as f:
+        config = yaml.safe_load(f) or {}
+
+    override_path = OVERRIDES_DIR / path.name
+    if overrides and override_path.exists():
+        with open(override_path, "r") as f:
+            config = merge_config(config, yaml.safe_load(f) or {})
+    return config
+
+
+def merge_config(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Recursively merge ``override`` into a copy of ``base`` (override wins)."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def get_setting(config: Dict[str, Any], dotted_key: str, default: Any = None) -> Any:
+    """
+    Look up a nested setting by dotted key.
+
+    Example:
+        get_setting(config, "adaptive.retraining.data_window_days", 90)
+    """
+    node: Any = config
+    for key in dotted_key.split("."):
+        if not isinstance(node, dict) or key not in node:
+            return default
+        node = node[key]
+    return node
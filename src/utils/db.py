@@ -0,0 +1,378 @@
+"""
+Shared database engines and sessions for XAE-Frame.
+
+Every component (API workers, prediction logger, drift jobs, scripts) should
+get its engine here instead of calling ``create_engine`` itself, so one
+process holds one tuned connection pool:
+
+    - ``get_engine`` returns a process-wide pooled engine per URL. Pools are
+      discarded (without closing the parent's sockets) in forked children,
+      so pre-fork API workers never share connections.
+    - Pool size, overflow, timeout, pre-ping and recycle come from the
+      ``database.pool`` config block. ``pool_config`` divides the
+      ``max_connections`` budget across ``api.workers`` so the workers
+      together cannot open more connections than the single PostgreSQL
+      container accepts.
+    - ``Session`` is a thread-local ``scoped_session`` for the FastAPI
+      workers; ``session_scope`` / ``get_session`` handle commit, rollback
+      and cleanup.
+    - ``get_async_engine`` is the asyncio variant (asyncpg / aiosqlite).
+    - ``InstrumentedQueuePool`` records checkouts, wait time, overflow
+      events and timeouts; ``pool_metrics`` reports them.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = "sqlite:///data/xae_frame.db"
+
+DEFAULT_POOL = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30.0,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+# Async drivers substituted for the sync ones in ``get_async_engine``
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def database_url(url: Optional[str] = None) -> str:
+    """Explicit URL, else ``DATABASE_URL``, else the local SQLite file."""
+    return url or os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+def pool_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Pool settings of one process from the ``database.pool`` config block.
+
+    When ``database.max_connections`` is set, ``pool_size + max_overflow`` is
+    capped at ``max_connections // api.workers`` so the API workers together
+    stay within the server's connection limit.
+
+    Returns:
+        Keyword arguments for ``create_pooled_engine``
+    """
+    config = config or {}
+    database = config.get("database", {})
+    settings = {**DEFAULT_POOL, **{k: v for k, v in database.get("pool", {}).items() if k in DEFAULT_POOL}}
+
+    max_connections = database.get("max_connections")
+    if max_connections:
+        workers = max(config.get("api", {}).get("workers", 1), 1)
+        budget = max(max_connections // workers, 1)
+        settings["pool_size"] = min(settings["pool_size"], budget)
+        settings["max_overflow"] = min(settings["max_overflow"], budget - settings["pool_size"])
+    return settings
+
+
+# POOL INSTRUMENTATION
+
+class PoolMetrics:
+    """Thread-safe counters of one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+
+    def record_wait(self, seconds: float, checked_out: int, overflowed: bool) -> None:
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if overflowed:
+                self.overflow_events += 1
+
+    def increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds,
+                "wait_ms_mean": 1000 * self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "wait_ms_max": 1000 * self.max_wait_seconds,
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times ``_do_get`` (the wait for a free connection) and flags overflow."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.increment("timeouts")
+            raise
+        checked_out = self.checkedout()
+        self.metrics.record_wait(time.perf_counter() - start, checked_out, checked_out > self.size())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics  # keep counters across invalidation/dispose
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """``QueuePool`` that records wait time, overflow and timeout events."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Async counterpart of ``InstrumentedQueuePool``."""
+
+
+def _instrument(engine: Engine) -> Engine:
+    """Count checkouts, checkins, connects and invalidations through pool events."""
+    metrics = getattr(engine.pool, "metrics", None)
+    if metrics is None:
+        engine.pool.metrics = metrics = PoolMetrics()
+
+    event.listen(engine, "checkout", lambda *args: metrics.increment("checkouts"))
+    event.listen(engine, "checkin", lambda *args: metrics.increment("checkins"))
+    event.listen(engine, "connect", lambda *args: metrics.increment("connects"))
+    event.listen(engine, "invalidate", lambda *args: metrics.increment("invalidations"))
+    return engine
+
+
+def pool_metrics(engine: Any) -> Dict[str, Any]:
+    """Current pool state and counters of a sync or async engine."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    metrics = getattr(pool, "metrics", None)
+    state = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        state.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    if metrics is not None:
+        state.update(metrics.to_dict())
+    return state
+
+
+# ENGINES
+
+def create_pooled_engine(
+    url: Optional[str] = None,
+    pool_size: int = DEFAULT_POOL["pool_size"],
+    max_overflow: int = DEFAULT_POOL["max_overflow"],
+    pool_timeout: float = DEFAULT_POOL["pool_timeout"],
+    pool_recycle: int = DEFAULT_POOL["pool_recycle"],
+    pool_pre_ping: bool = DEFAULT_POOL["pool_pre_ping"],
+    **kwargs: Any,
+) -> Engine:
+    """
+    Create an engine with an instrumented, tuned connection pool.
+
+    Args:
+        url: Database URL (default: ``database_url()``)
+        pool_size: Connections kept open
+        max_overflow: Extra connections opened under load
+        pool_timeout: Seconds to wait for a connection before failing
+        pool_recycle: Seconds after which connections are replaced
+        pool_pre_ping: Test connections on checkout (survives DB restarts)
+        **kwargs: Passed to ``create_engine``
+
+    Returns:
+        SQLAlchemy engine
+    """
+    url = make_url(database_url(url))
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # One shared connection, otherwise every checkout sees a new empty database
+        kwargs.setdefault("connect_args", {"check_same_thread": False})
+        engine = create_engine(url, poolclass=StaticPool, **kwargs)
+    else:
+        if url.get_backend_name() == "sqlite":
+            kwargs.setdefault("connect_args", {"check_same_thread": False})
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            **kwargs,
+        )
+    return _instrument(engine)
+
+
+def create_async_pooled_engine(
+    url: Optional[str] = None,
+    pool_size: int = DEFAULT_POOL["pool_size"],
+    max_overflow: int = DEFAULT_POOL["max_overflow"],
+    pool_timeout: float = DEFAULT_POOL["pool_timeout"],
+    pool_recycle: int = DEFAULT_POOL["pool_recycle"],
+    pool_pre_ping: bool = DEFAULT_POOL["pool_pre_ping"],
+    **kwargs: Any,
+):
+    """
+    Async engine (asyncpg / aiosqlite) with the same pool settings.
+
+    A sync URL such as ``postgresql://...`` is switched to its async driver.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(database_url(url))
+    backend = url.get_backend_name()
+    if url.get_driver_name() not in ("asyncpg", "aiosqlite") and backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        **kwargs,
+    )
+    _instrument(engine.sync_engine)
+    return engine
+
+
+# PROCESS-WIDE REGISTRY
+
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+
+def get_engine(url: Optional[str] = None, config: Optional[Dict[str, Any]] = None) -> Engine:
+    """
+    Process-wide pooled engine for ``url`` (created on first use).
+
+    Args:
+        url: Database URL (default: ``database_url()``)
+        config: Domain config; its ``database.pool`` block sizes the pool
+    """
+    url = database_url(url)
+    with _registry_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _engines[url] = create_pooled_engine(url, **pool_config(config))
+            if url == database_url():
+                Session.configure(bind=engine)
+            logger.info(f"Database pool ready: {make_url(url).render_as_string(hide_password=True)}")
+        return engine
+
+
+def get_async_engine(url: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+    """Process-wide async engine for ``url`` (created on first use)."""
+    url = database_url(url)
+    with _registry_lock:
+        engine = _async_engines.get(url)
+        if engine is None:
+            engine = _async_engines[url] = create_async_pooled_engine(url, **pool_config(config))
+        return engine
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection of this process (e.g. on shutdown)."""
+    with _registry_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _async_engines.clear()
+    Session.remove()
+
+
+def _after_fork() -> None:
+    # The child must not reuse the parent's sockets; drop them without closing
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    for engine in _async_engines.values():
+        engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+# SESSIONS
+
+# Thread-local sessions for the API workers; bound by ``get_engine``
+Session = scoped_session(sessionmaker(expire_on_commit=False))
+
+
+@contextmanager
+def session_scope(engine: Optional[Engine] = None) -> Iterator[Any]:
+    """
+    Transactional session: commit on success, roll back on error.
+
+    Example:
+        with session_scope() as session:
+            session.add(prediction)
+    """
+    if engine is None:
+        get_engine()
+        session = Session()
+    else:
+        session = sessionmaker(bind=engine, expire_on_commit=False)()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if engine is None:
+            Session.remove()
+        else:
+            session.close()
+
+
+def get_session() -> Iterator[Any]:
+    """FastAPI dependency yielding the request thread's scoped session."""
+    with session_scope() as session:
+        yield session
+
+
+@asynccontextmanager
+async def async_session_scope(engine: Optional[Any] = None):
+    """Async counterpart of ``session_scope``."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    factory = async_sessionmaker(engine or get_async_engine(), expire_on_commit=False)
+    async with factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
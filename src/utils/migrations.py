@@ -0,0 +1,561 @@
+"""
+Online schema migrations for the XAE-Frame database.
+
+``Base.metadata.create_all`` only creates missing tables, so changing a table
+that already holds millions of predictions needs an explicit migration. This
+module runs ordered, versioned migrations without long table locks:
+
+    add_column     ``ALTER TABLE ... ADD COLUMN`` (nullable, no default: a
+                   catalog-only change on PostgreSQL)
+    create_index   ``CREATE INDEX CONCURRENTLY`` on PostgreSQL
+    backfill       keyset-batched Python transform, one short transaction per
+                   batch, throttled and resumable from a checkpoint
+    backfill_sql   the same with a SQL ``SET`` expression
+    rebuild_table  copy-and-swap for changes ALTER cannot do online: create
+                   the new table, dual-write every insert/update/delete into
+                   it with triggers, copy existing rows in batches, then swap
+                   names in one short transaction
+
+Applied versions and in-progress checkpoints are kept in
+``schema_migrations``. Migrations must be idempotent (every helper skips work
+that is already done), so running them against a freshly created database is
+cheap. The migrations themselves live in ``scripts/migrate.py``.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String(64), primary_key=True),
+    Column("description", String(255)),
+    Column("started_at", DateTime),
+    Column("applied_at", DateTime),  # NULL while in progress
+    Column("checkpoint", Text),  # JSON of resumable progress
+)
+
+# Key of the PostgreSQL advisory lock held while migrating
+ADVISORY_LOCK_ID = 0x58414546  # "XAEF"
+
+
+@dataclass
+class Migration:
+    """One versioned schema change (``upgrade`` must be idempotent)."""
+
+    version: str
+    description: str
+    upgrade: Callable[["MigrationContext"], None]
+
+
+class MigrationContext:
+    """
+    Online DDL and backfill helpers handed to ``Migration.upgrade``.
+
+    Example:
+        def upgrade(ctx):
+            ctx.add_column("predictions", Column("model_version", String(50)))
+            ctx.backfill_sql("predictions", "model_version = 'v1'", where="model_version IS NULL")
+    """
+
+    def __init__(
+        self,
+        engine,
+        runner: "MigrationRunner",
+        migration: Migration,
+        batch_size: int = 5000,
+        sleep: float = 0.05,
+        target_batch_seconds: float = 1.0,
+    ):
+        """
+        Initialize context.
+
+        Args:
+            engine: SQLAlchemy engine
+            runner: Runner that stores checkpoints
+            migration: Migration being applied
+            batch_size: Rows per backfill/copy batch
+            sleep: Pause between batches (seconds) to leave headroom for live traffic
+            target_batch_seconds: Batches slower than this halve the batch size
+        """
+        self.engine = engine
+        self.runner = runner
+        self.migration = migration
+        self.batch_size = batch_size
+        self.sleep = sleep
+        self.target_batch_seconds = target_batch_seconds
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    # INTROSPECTION
+
+    def has_table(self, table_name: str) -> bool:
+        return inspect(self.engine).has_table(table_name)
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        return any(c["name"] == column_name for c in inspect(self.engine).get_columns(table_name))
+
+    def has_index(self, table_name: str, index_name: str) -> bool:
+        return any(ix["name"] == index_name for ix in inspect(self.engine).get_indexes(table_name))
+
+    def is_partitioned(self, table_name: str) -> bool:
+        if self.dialect != "postgresql":
+            return False
+        query = text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON p.partrelid = c.oid "
+            "WHERE c.relname = :table_name"
+        )
+        with self.engine.connect() as connection:
+            return connection.execute(query, {"table_name": table_name}).first() is not None
+
+    # DDL
+
+    @contextmanager
+    def transaction(self):
+        """
+        ``engine.begin()`` that takes the write lock up front on SQLite.
+
+        pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so DDL
+        would autocommit statement by statement and a batch that reads before
+        it writes could deadlock with a concurrent writer. ``BEGIN IMMEDIATE``
+        makes the block one transaction that waits for the lock instead.
+        """
+        with self.engine.begin() as connection:
+            if self.dialect == "sqlite":
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+            yield connection
+
+    def execute(self, statement: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Run one statement in its own transaction."""
+        with self.engine.begin() as connection:
+            connection.execute(text(statement), params or {})
+
+    def add_column(self, table_name: str, column: Column) -> bool:
+        """Add a nullable column unless it exists. Returns True if added."""
+        if self.has_column(table_name, column.name):
+            return False
+        if not column.nullable or column.server_default is not None:
+            raise ValueError(f"Online add_column needs a nullable column without default: {column.name}")
+        spec = CreateColumn(column).compile(dialect=self.engine.dialect)
+        self.execute(f"ALTER TABLE {table_name} ADD COLUMN {spec}")
+        logger.info(f"✓ Added column {table_name}.{column.name}")
+        return True
+
+    def create_index(self, index, table_name: Optional[str] = None) -> bool:
+        """Create an index unless it exists (CONCURRENTLY on PostgreSQL). Returns True if created."""
+        table_name = table_name or index.table.name
+        if self.has_index(table_name, index.name):
+            return False
+        statement = str(CreateIndex(index).compile(dialect=self.engine.dialect))
+        if table_name != index.table.name:
+            statement = statement.replace(f" ON {index.table.name} ", f" ON {table_name} ", 1)
+
+        if self.dialect == "postgresql":
+            statement = statement.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+            if self.is_partitioned(table_name):
+                statement = statement.replace(" CONCURRENTLY", "", 1)  # not supported on partitioned parents
+            # CONCURRENTLY cannot run inside a transaction block
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text(statement))
+        else:
+            self.execute(statement)
+        logger.info(f"✓ Created index {index.name}")
+        return True
+
+    # BACKFILLS
+
+    def backfill(
+        self,
+        table_name: str,
+        columns: Sequence[str],
+        transform: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        where: Optional[str] = None,
+        name: str = "backfill",
+    ) -> int:
+        """
+        Update rows in id order, one short transaction per batch.
+
+        Args:
+            table_name: Table to update
+            columns: Columns read for each row (``id`` is always included)
+            transform: Maps a batch of row dicts to update dicts; each needs
+                       ``id`` plus the new column values (rows may be omitted)
+            where: SQL condition selecting rows still to migrate
+            name: Checkpoint name (distinct per backfill in one migration)
+
+        Returns:
+            Number of rows updated
+        """
+        last_id = self.runner.checkpoint(self.migration.version, name, 0)
+        condition = f" AND ({where})" if where else ""
+        select_sql = text(
+            f"SELECT id, {', '.join(columns)} FROM {table_name} "
+            f"WHERE id > :last_id{condition} ORDER BY id LIMIT :limit"
+        )
+        updated = 0
+        batch_size = self.batch_size
+
+        while True:
+            start = time.perf_counter()
+            with self.transaction() as connection:
+                rows = [dict(row._mapping) for row in connection.execute(
+                    select_sql, {"last_id": last_id, "limit": batch_size}
+                )]
+                if not rows:
+                    break
+                updates = transform(rows)
+                if updates:
+                    assignments = ", ".join(f"{key} = :{key}" for key in updates[0] if key != "id")
+                    connection.execute(text(f"UPDATE {table_name} SET {assignments} WHERE id = :id"), updates)
+                last_id = rows[-1]["id"]
+                self.runner.save_checkpoint(self.migration.version, name, last_id, connection)
+            updated += len(updates)
+            batch_size = self._throttle(start, batch_size)
+
+        logger.info(f"✓ Backfilled {updated:,} rows of {table_name}")
+        return updated
+
+    def backfill_sql(self, table_name: str, assignments: str, where: str, name: str = "backfill_sql") -> int:
+        """
+        Batched ``UPDATE {table} SET {assignments} WHERE {where}`` over id ranges.
+
+        Returns:
+            Number of rows updated
+        """
+        last_id = self.runner.checkpoint(self.migration.version, name, 0)
+        bounds_sql = text(
+            f"SELECT MAX(id) FROM (SELECT id FROM {table_name} WHERE id > :last_id "
+            f"ORDER BY id LIMIT :limit) AS batch"
+        )
+        update_sql = text(
+            f"UPDATE {table_name} SET {assignments} WHERE id > :last_id AND id <= :upper AND ({where})"
+        )
+        updated = 0
+        batch_size = self.batch_size
+
+        while True:
+            start = time.perf_counter()
+            with self.transaction() as connection:
+                upper = connection.execute(bounds_sql, {"last_id": last_id, "limit": batch_size}).scalar()
+                if upper is None:
+                    break
+                updated += connection.execute(update_sql, {"last_id": last_id, "upper": upper}).rowcount
+                last_id = upper
+                self.runner.save_checkpoint(self.migration.version, name, last_id, connection)
+            batch_size = self._throttle(start, batch_size)
+
+        logger.info(f"✓ Backfilled {updated:,} rows of {table_name}")
+        return updated
+
+    def _throttle(self, start: float, batch_size: int) -> int:
+        elapsed = time.perf_counter() - start
+        if elapsed > self.target_batch_seconds and batch_size > 100:
+            batch_size //= 2
+            logger.info(f"Batch took {elapsed:.1f}s; reducing batch size to {batch_size}")
+        time.sleep(self.sleep)
+        return batch_size
+
+    # COPY AND SWAP
+
+    def rebuild_table(
+        self,
+        target: Table,
+        column_map: Optional[Dict[str, Optional[str]]] = None,
+        before_copy: Optional[Callable[["MigrationContext", str], None]] = None,
+    ) -> int:
+        """
+        Replace ``target.name`` by a table with ``target``'s definition, online.
+
+        Steps: create ``{name}__new`` (without indexes), install dual-write
+        triggers on the live table, copy existing rows in id batches (rows
+        already written by the triggers are skipped), then in one short
+        transaction drop the triggers, swap names, fix the id sequence and
+        drop the old table. Indexes are created afterwards (the batch copy
+        runs without them). On PostgreSQL the triggers upsert on the primary
+        key and each copy batch locks its source rows ``FOR SHARE``, so writes
+        that overlap a batch are applied after it rather than lost.
+
+        Args:
+            target: New table definition (any MetaData) named like the live table
+            column_map: New column -> source column (None = NULL); defaults to
+                        same-named columns
+            before_copy: Called with the temporary table name once it exists
+                         (e.g. to create partitions)
+
+        Returns:
+            Number of rows copied by the batch copy
+        """
+        name = target.name
+        new_name = f"{name}__new"
+        source_columns = {c["name"] for c in inspect(self.engine).get_columns(name)}
+        if column_map is None:
+            column_map = {c.name: c.name if c.name in source_columns else None for c in target.columns}
+        target_columns = list(column_map)
+        source_exprs = [column_map[c] or "NULL" for c in target_columns]
+
+        temp = target.to_metadata(MetaData(), name=new_name)
+        if self.dialect == "postgresql":
+            temp.primary_key.name = f"{new_name}_pkey"  # constraint names are schema-wide
+        if not self.has_table(new_name):
+            self.execute(str(CreateTable(temp).compile(dialect=self.engine.dialect)))
+        if before_copy is not None:
+            before_copy(self, new_name)
+
+        key = [c.name for c in target.primary_key.columns] or ["id"]
+        self._install_dual_write(name, new_name, target_columns, source_exprs, key)
+
+        copied = self._copy_rows(name, new_name, target_columns, source_exprs)
+        self._swap(name, new_name)
+        for index in target.indexes:
+            self.create_index(index, name)
+        logger.info(f"✓ Rebuilt {name} online ({copied:,} rows copied)")
+        return copied
+
+    def _install_dual_write(
+        self, name: str, new_name: str, columns: List[str], exprs: List[str], key: List[str]
+    ) -> None:
+        column_list = ", ".join(columns)
+        values = ", ".join("NULL" if expr == "NULL" else f"NEW.{expr}" for expr in exprs)
+
+        if self.dialect == "postgresql":
+            # Upsert on the primary key (id plus the partition key of partitioned tables): a write
+            # waiting on a copied row must overwrite it once the copy batch commits, not be dropped
+            updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in key)
+            action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            on_conflict = f"ON CONFLICT ({', '.join(key)}) {action}"
+            self.execute(f"""
+                CREATE OR REPLACE FUNCTION {name}__dual_write() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        DELETE FROM {new_name} WHERE id = OLD.id;
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO {new_name} ({column_list}) VALUES ({values}) {on_conflict};
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            self.execute(f"DROP TRIGGER IF EXISTS {name}__dual_write ON {name}")
+            self.execute(
+                f"CREATE TRIGGER {name}__dual_write AFTER INSERT OR UPDATE OR DELETE ON {name} "
+                f"FOR EACH ROW EXECUTE FUNCTION {name}__dual_write()"
+            )
+        else:
+            upsert = f"INSERT OR REPLACE INTO {new_name} ({column_list}) VALUES ({values});"
+            self.execute(f"CREATE TRIGGER IF NOT EXISTS {name}__dw_insert AFTER INSERT ON {name} BEGIN {upsert} END")
+            self.execute(f"CREATE TRIGGER IF NOT EXISTS {name}__dw_update AFTER UPDATE ON {name} BEGIN {upsert} END")
+            self.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name}__dw_delete AFTER DELETE ON {name} "
+                f"BEGIN DELETE FROM {new_name} WHERE id = OLD.id; END"
+            )
+
+    def _drop_dual_write(self, connection, name: str) -> None:
+        if self.dialect == "postgresql":
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}__dual_write ON {name}"))
+            connection.execute(text(f"DROP FUNCTION IF EXISTS {name}__dual_write()"))
+        else:
+            for suffix in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {name}__dw_{suffix}"))
+
+    def _copy_rows(self, name: str, new_name: str, columns: List[str], exprs: List[str]) -> int:
+        checkpoint = f"copy_{name}"
+        last_id = self.runner.checkpoint(self.migration.version, checkpoint, 0)
+        insert = "INSERT OR IGNORE INTO" if self.dialect == "sqlite" else "INSERT INTO"
+        # FOR SHARE: a concurrent UPDATE/DELETE of a source row waits until the batch commits, so
+        # its trigger sees (and replaces or deletes) the copied row instead of racing with it
+        lock = " FOR SHARE" if self.dialect == "postgresql" else ""
+        conflict = " ON CONFLICT DO NOTHING" if self.dialect == "postgresql" else ""
+        bounds_sql = text(
+            f"SELECT MAX(id) FROM (SELECT id FROM {name} WHERE id > :last_id ORDER BY id LIMIT :limit) AS batch"
+        )
+        copy_sql = text(
+            f"{insert} {new_name} ({', '.join(columns)}) SELECT {', '.join(exprs)} FROM {name} "
+            f"WHERE id > :last_id AND id <= :upper{lock}{conflict}"
+        )
+        copied = 0
+        batch_size = self.batch_size
+
+        while True:
+            start = time.perf_counter()
+            with self.transaction() as connection:
+                upper = connection.execute(bounds_sql, {"last_id": last_id, "limit": batch_size}).scalar()
+                if upper is None:
+                    break
+                copied += max(connection.execute(copy_sql, {"last_id": last_id, "upper": upper}).rowcount, 0)
+                last_id = upper
+                self.runner.save_checkpoint(self.migration.version, checkpoint, last_id, connection)
+            batch_size = self._throttle(start, batch_size)
+        return copied
+
+    def _swap(self, name: str, new_name: str) -> None:
+        """Short exclusive section: stop dual-writes, swap names, drop the old table."""
+        with self.transaction() as connection:
+            if self.dialect == "postgresql":
+                connection.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+            # Rows inserted since the last batch are already in the new table via the triggers
+            self._drop_dual_write(connection, name)
+            connection.execute(text(f"ALTER TABLE {name} RENAME TO {name}__old"))
+            connection.execute(text(f"ALTER TABLE {new_name} RENAME TO {name}"))
+            if self.dialect == "postgresql":
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {name}), false)"
+                ))
+            connection.execute(text(f"DROP TABLE {name}__old"))
+            if self.dialect == "postgresql":
+                connection.execute(text(f"ALTER TABLE {name} RENAME CONSTRAINT {new_name}_pkey TO {name}_pkey"))
+
+
+class MigrationRunner:
+    """
+    Applies pending migrations in version order and records them.
+
+    Example:
+        runner = MigrationRunner(engine, MIGRATIONS, batch_size=10_000, sleep=0.1)
+        runner.status()
+        runner.upgrade()
+    """
+
+    def __init__(self, engine, migrations: Sequence[Migration], batch_size: int = 5000, sleep: float = 0.05):
+        """
+        Initialize runner.
+
+        Args:
+            engine: SQLAlchemy engine
+            migrations: All known migrations (applied in version order)
+            batch_size: Rows per backfill/copy batch
+            sleep: Pause between batches (seconds)
+        """
+        versions = [m.version for m in migrations]
+        if len(set(versions)) != len(versions):
+            raise ValueError("Duplicate migration versions")
+        self.engine = engine
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.batch_size = batch_size
+        self.sleep = sleep
+        _metadata.create_all(engine)
+
+    def applied(self) -> Dict[str, Dict[str, Any]]:
+        """Rows of ``schema_migrations`` keyed by version."""
+        with self.engine.connect() as connection:
+            return {row.version: dict(row._mapping) for row in connection.execute(select(schema_migrations))}
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Every known migration with its state: applied, in_progress or pending."""
+        applied = self.applied()
+        rows = []
+        for migration in self.migrations:
+            record = applied.get(migration.version)
+            if record is None:
+                state = "pending"
+            else:
+                state = "applied" if record["applied_at"] else "in_progress"
+            rows.append({
+                "version": migration.version,
+                "description": migration.description,
+                "state": state,
+                "applied_at": record["applied_at"] if record else None,
+            })
+        return rows
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied()
+        return [m for m in self.migrations if not (applied.get(m.version) or {}).get("applied_at")]
+
+    def upgrade(self, target: Optional[str] = None, dry_run: bool = False) -> List[str]:
+        """
+        Apply pending migrations up to and including ``target``.
+
+        Returns:
+            Versions applied (or that would be applied with ``dry_run``)
+        """
+        pending = [m for m in self.pending() if target is None or m.version <= target]
+        if dry_run or not pending:
+            return [m.version for m in pending]
+
+        lock = self._lock()
+        try:
+            done = []
+            for migration in pending:
+                logger.info(f"Applying migration {migration.version}: {migration.description}")
+                self._start(migration)
+                migration.upgrade(MigrationContext(
+                    self.engine, self, migration, batch_size=self.batch_size, sleep=self.sleep,
+                ))
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        schema_migrations.update()
+                        .where(schema_migrations.c.version == migration.version)
+                        .values(applied_at=datetime.utcnow(), checkpoint=None)
+                    )
+                done.append(migration.version)
+                logger.info(f"✓ Migration {migration.version} applied")
+            return done
+        finally:
+            self._unlock(lock)
+
+    # CHECKPOINTS
+
+    def checkpoint(self, version: str, name: str, default: Any = None) -> Any:
+        with self.engine.connect() as connection:
+            raw = connection.execute(
+                select(schema_migrations.c.checkpoint).where(schema_migrations.c.version == version)
+            ).scalar()
+        return json.loads(raw).get(name, default) if raw else default
+
+    def save_checkpoint(self, version: str, name: str, value: Any, connection) -> None:
+        """Store progress in the caller's transaction so it commits with the batch."""
+        raw = connection.execute(
+            select(schema_migrations.c.checkpoint).where(schema_migrations.c.version == version)
+        ).scalar()
+        state = json.loads(raw) if raw else {}
+        state[name] = value
+        connection.execute(
+            schema_migrations.update()
+            .where(schema_migrations.c.version == version)
+            .values(checkpoint=json.dumps(state))
+        )
+
+    # INTERNALS
+
+    def _start(self, migration: Migration) -> None:
+        with self.engine.begin() as connection:
+            exists = connection.execute(
+                select(schema_migrations.c.version).where(schema_migrations.c.version == migration.version)
+            ).first()
+            if exists is None:
+                connection.execute(schema_migrations.insert().values(
+                    version=migration.version, description=migration.description, started_at=datetime.utcnow(),
+                ))
+            else:
+                logger.info(f"Resuming migration {migration.version} from its checkpoint")
+
+    def _lock(self):
+        """Session-level advisory lock so two runners never migrate at once (PostgreSQL)."""
+        if self.engine.dialect.name != "postgresql":
+            return None
+        connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        if not connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID}).scalar():
+            connection.close()
+            raise RuntimeError("Another migration run holds the lock")
+        return connection
+
+    def _unlock(self, connection) -> None:
+        if connection is not None:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+            connection.close()
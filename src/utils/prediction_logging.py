@@ -0,0 +1,603 @@
+"""
+Bulk, asynchronous prediction logging for XAE-Frame.
+
+Every served prediction must land in ``predictions`` (EU AI Act
+traceability), but one ORM insert per request would bound throughput by the
+database round trip. ``PredictionLogger`` decouples the two:
+
+    request path  -> ``log_prediction`` / ``log_interaction`` / ``log``
+                     put a plain dict on a bounded in-process queue
+    flush thread  -> drains up to ``batch_size`` rows (or whatever arrived
+                     within ``flush_interval``) and writes them per table with
+                     ``COPY ... FROM STDIN`` on PostgreSQL (psycopg2) or one
+                     multi-row ``INSERT`` (executemany) elsewhere, e.g. the
+                     SQLite fallback of ``init_database``
+
+When the queue is full the logger either blocks the caller for up to
+``block_timeout`` (``overflow="block"``) or appends the row to a JSONL spill
+file (``overflow="spill"``) in ``spill_dir``. Batches that fail because the
+database is unreachable are spilled as well. Spill files of every process,
+including ones that crashed, are replayed at startup and whenever the queue
+has drained, with exponential back-off while the database stays down, so a
+slow or unavailable database never loses records. Rows the database rejects
+(constraint violations, bad values) are isolated per table and then per row
+and moved to ``spill_dir/dead_letter`` instead of blocking their batch.
+Prediction ``features`` / ``explanation`` values of models with a feature
+schema are packed into ``features_blob`` / ``explanation_blob`` by the flush
+thread (see ``src/utils/vector_codec.py``); other models keep the JSON columns.
+``metrics()`` reports queue depth, counters and flush latency percentiles.
+"""
+
+import base64
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy import JSON, LargeBinary, column, exc, insert, table
+
+from .vector_codec import VectorCodec, load_codecs
+
+try:
+    import fcntl
+except ImportError:  # Windows: spill files are claimed by rename only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_DIR = Path("data/spill")
+DEAD_LETTER_DIR = "dead_letter"  # rows the database rejected; never replayed
+
+# Upper bound of the replay back-off while the database is unreachable (seconds)
+MAX_REPLAY_BACKOFF = 60.0
+
+# Database errors that clear up on their own: SQLSTATE prefixes (connection
+# exception, insufficient resources, server shutdown, serialization failure,
+# deadlock, lock not available) and SQLite primary result codes (BUSY, LOCKED,
+# IOERR, FULL, CANTOPEN). Anything else the server reports is a data or schema
+# error and is dead-lettered rather than replayed.
+TRANSIENT_SQLSTATES = ("08", "53", "57P", "40001", "40P01", "55P03")
+TRANSIENT_SQLITE_CODES = {5, 6, 10, 13, 14}
+# The same SQLite errors by message, for Python < 3.11 (no ``sqlite_errorcode``)
+TRANSIENT_SQLITE_MESSAGES = (
+    "database is locked", "database table is locked", "disk I/O error",
+    "database or disk is full", "unable to open database file",
+)
+
+# Missing JSON values are SQL NULL (as with COPY), not the JSON literal 'null'
+_JSON = JSON(none_as_null=True)
+
+# Lightweight table definitions: no ORM state, just what INSERT needs
+TABLES = {
+    "predictions": table(
+        "predictions",
+        column("model_id"), column("user_id"), column("item_id"),
+        column("prediction"), column("confidence"), column("timestamp"),
+        column("features", _JSON), column("explanation", _JSON),
+        column("features_blob", LargeBinary), column("explanation_blob", LargeBinary),
+    ),
+    "user_interactions": table(
+        "user_interactions",
+        column("user_id"), column("item_id"), column("interaction_type"),
+        column("rating"), column("dwell_time"), column("purchased"), column("returned"),
+        column("timestamp"), column("session_id"), column("device_type"),
+    ),
+    "drift_alerts": table(
+        "drift_alerts",
+        column("model_id"), column("drift_type"), column("drift_score"), column("threshold"),
+        column("detected_at"), column("affected_features", _JSON), column("action_taken"),
+    ),
+    "fairness_metrics": table(
+        "fairness_metrics",
+        column("model_id"), column("protected_attribute"), column("demographic_parity"),
+        column("equal_opportunity"), column("disparate_impact"), column("measured_at"), column("is_fair"),
+    ),
+    "business_metrics": table(
+        "business_metrics",
+        column("model_id"), column("metric_name"), column("metric_value"), column("baseline_value"),
+        column("lift_percentage"), column("is_control_group"), column("measured_at"),
+        column("period_start"), column("period_end"),
+    ),
+}
+
+# Column filled with the enqueue time when the caller leaves it out
+TIMESTAMP_COLUMNS = {
+    "predictions": "timestamp",
+    "user_interactions": "timestamp",
+    "drift_alerts": "detected_at",
+    "fairness_metrics": "measured_at",
+    "business_metrics": "measured_at",
+}
+
+OVERFLOW_POLICIES = ["block", "spill"]
+
+# Sentinel that stops the flush thread
+_STOP = object()
+
+
+class PredictionLogger:
+    """
+    Bounded queue plus background bulk writer for audit records.
+
+    Example:
+        prediction_log = PredictionLogger.from_config(config, engine)
+        prediction_log.log_prediction(model_id=3, user_id="u1", item_id="i9", prediction=0.82,
+                                      features={"price": 12.0, ...}, explanation=explanation)
+        prediction_log.metrics()["queue_depth"]
+        prediction_log.close()
+    """
+
+    def __init__(
+        self,
+        engine,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+        overflow: str = "spill",
+        block_timeout: float = 0.05,
+        spill_dir: Union[str, Path] = DEFAULT_SPILL_DIR,
+    ):
+        """
+        Initialize logger and start its flush thread.
+
+        Args:
+            engine: SQLAlchemy engine of the XAE-Frame database
+            batch_size: Rows written per flush (``business_impact.real_time.batch_size``)
+            flush_interval: Seconds a partial batch waits before it is flushed
+            max_queue: Queue capacity in rows
+            overflow: "block" (wait up to ``block_timeout``, then spill) or
+                      "spill" (write to disk immediately) when the queue is full
+            block_timeout: Seconds a caller may block under ``overflow="block"``
+            spill_dir: Directory for JSONL spill files
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.spill_dir = Path(spill_dir)
+        self.use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._latencies: deque = deque(maxlen=1000)
+        self._last_error: Optional[str] = None
+        self._backoff = 0.0
+        self._replay_after = 0.0
+        self._codecs: Dict[int, Optional[VectorCodec]] = {}  # models.id -> codec (None: no schema)
+
+        self._thread = threading.Thread(target=self._run, name="prediction-logger", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], engine, **kwargs: Any) -> "PredictionLogger":
+        """Build a logger using ``business_impact.real_time.batch_size``."""
+        real_time = config.get("business_impact", {}).get("real_time", {})
+        kwargs.setdefault("batch_size", real_time.get("batch_size", 100))
+        return cls(engine, **kwargs)
+
+    # LOGGING
+
+    def log(self, table_name: str, row: Dict[str, Any]) -> bool:
+        """
+        Queue one row for ``table_name``.
+
+        Returns:
+            True if queued, False if it was spilled to disk instead
+        """
+        if table_name not in TABLES:
+            raise ValueError(f"Unknown log table: {table_name}")
+        row = dict(row)
+        row.setdefault(TIMESTAMP_COLUMNS[table_name], datetime.utcnow())
+
+        try:
+            if self.overflow == "block":
+                self._queue.put((table_name, row), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((table_name, row))
+        except queue.Full:
+            self._spill([(table_name, row)])
+            return False
+        self._counters["enqueued"] += 1
+        return True
+
+    def log_prediction(self, **row: Any) -> bool:
+        """
+        Queue a ``predictions`` row.
+
+        ``features`` ({name: value}) and ``explanation`` ({name: SHAP value},
+        an ``Explanation`` or its ``to_dict()``) are stored packed when the
+        model has a feature schema.
+        """
+        if hasattr(row.get("explanation"), "to_dict"):
+            row["explanation"] = row["explanation"].to_dict()
+        return self.log("predictions", row)
+
+    def log_interaction(self, **row: Any) -> bool:
+        """Queue a ``user_interactions`` row."""
+        return self.log("user_interactions", row)
+
+    # LIFECYCLE
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything queued so far has been written (or spilled)."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush remaining rows and stop the flush thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "PredictionLogger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # METRICS
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, counters and flush latency percentiles (ms)."""
+        latencies = list(self._latencies)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self._counters["enqueued"],
+            "written": self._counters["written"],
+            "spilled": self._counters["spilled"],
+            "replayed": self._counters["replayed"],
+            "flushes": self._counters["flushes"],
+            "failed_flushes": self._counters["failed_flushes"],
+            "dead_lettered": self._counters["dead_lettered"],
+            "flush_latency_p50_ms": float(np.percentile(latencies, 50)) if latencies else None,
+            "flush_latency_p99_ms": float(np.percentile(latencies, 99)) if latencies else None,
+            "last_error": self._last_error,
+        }
+
+    # FLUSH THREAD
+
+    def _run(self) -> None:
+        self._replay_spill()  # spill files left behind by earlier (crashed) processes
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                self._replay_spill()
+                return
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                continue
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                if self._queue.qsize() < self._queue.maxsize // 2 and time.monotonic() >= self._replay_after:
+                    self._replay_spill()
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Write a batch grouped by table in one transaction.
+
+        Connection failures spill the batch to disk and return False. Data
+        errors (constraint violations, bad values) are isolated by retrying
+        per table and then per row; only the offending rows go to the
+        dead-letter file, the rest is written.
+        """
+        if not batch:
+            return True
+        by_table: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for table_name, row in batch:
+            by_table[table_name].append(row)
+        if "predictions" in by_table:
+            self._pack(by_table["predictions"])
+
+        start = time.perf_counter()
+        try:
+            self._write_tables(by_table)
+        except Exception as e:
+            if _is_transient(e):
+                self._spill_after_failure(batch, e)
+                return False
+            logger.warning(f"Prediction log batch of {len(batch)} rows rejected, isolating bad rows: {e}")
+            return self._write_isolated(by_table)
+
+        self._latencies.append((time.perf_counter() - start) * 1000)
+        self._counters["flushes"] += 1
+        self._counters["written"] += len(batch)
+        self._backoff = 0.0
+        return True
+
+    def _write_isolated(self, by_table: Dict[str, List[Dict[str, Any]]]) -> bool:
+        pending = [(table_name, row) for table_name, rows in by_table.items() for row in rows]
+        for table_name, rows in by_table.items():
+            try:
+                self._write_tables({table_name: rows})
+                self._counters["written"] += len(rows)
+                pending = [(t, r) for t, r in pending if t != table_name]
+                continue
+            except Exception as e:
+                if _is_transient(e):
+                    self._spill_after_failure(pending, e)
+                    return False
+
+            for row in rows:
+                try:
+                    self._write_tables({table_name: [row]})
+                    self._counters["written"] += 1
+                except Exception as e:
+                    if _is_transient(e):
+                        self._spill_after_failure(pending, e)
+                        return False
+                    self._dead_letter(table_name, row, e)
+                pending.remove((table_name, row))
+        self._counters["flushes"] += 1
+        return True
+
+    def _write_tables(self, by_table: Dict[str, List[Dict[str, Any]]]) -> None:
+        with self.engine.begin() as connection:
+            for table_name, rows in by_table.items():
+                if self.use_copy:
+                    _copy_rows(connection, table_name, rows)
+                else:
+                    _insert_rows(connection, table_name, rows)
+
+    def _pack(self, rows: List[Dict[str, Any]]) -> None:
+        """Move JSON features/explanations into packed blobs for models with a feature schema."""
+        unknown = {row.get("model_id") for row in rows} - set(self._codecs) - {None}
+        if unknown:
+            try:
+                codecs = load_codecs(self.engine)
+            except Exception as e:  # unreachable database: the write spills the JSON form
+                logger.debug(f"Feature schemas not loaded, packing later: {e}")
+                return
+            self._codecs.update({model_id: codecs.get(model_id) for model_id in unknown})
+
+        for row in rows:
+            codec = self._codecs.get(row.get("model_id"))
+            if codec is None:
+                continue
+            try:
+                if row.get("features") is not None and row.get("features_blob") is None:
+                    row["features_blob"], row["features"] = codec.encode(row["features"]), None
+                if row.get("explanation") is not None and row.get("explanation_blob") is None:
+                    row["explanation_blob"] = codec.encode_explanation_value(row["explanation"])
+                    row["explanation"] = None
+            except ValueError:
+                continue  # does not match the model's feature schema: kept as JSON
+
+    def _spill_after_failure(self, rows: List[Tuple[str, Dict[str, Any]]], error: Exception) -> None:
+        self._counters["failed_flushes"] += 1
+        self._last_error = str(error)
+        # Back off replays while the database is unreachable
+        self._backoff = min(max(2 * self._backoff, self.flush_interval), MAX_REPLAY_BACKOFF)
+        self._replay_after = time.monotonic() + self._backoff
+        logger.error(f"Prediction log flush of {len(rows)} rows failed, spilling to disk: {error}")
+        self._spill(rows)
+
+    # SPILL FILES
+
+    def _spill(self, rows: List[Tuple[str, Dict[str, Any]]]) -> None:
+        lines = "".join(json.dumps({"table": t, "row": _encode(row)}) + "\n" for t, row in rows)
+        _append_locked(self.spill_dir / f"predictions-{os.getpid()}.jsonl", lines, self._spill_lock)
+        self._counters["spilled"] += len(rows)
+
+    def _dead_letter(self, table_name: str, row: Dict[str, Any], error: Exception) -> None:
+        """Keep a row the database rejects for inspection; it is never replayed."""
+        self._last_error = str(error)
+        record = {"table": table_name, "row": _encode(row), "error": str(error).splitlines()[0],
+                  "at": datetime.utcnow().isoformat()}
+        path = self.spill_dir / DEAD_LETTER_DIR / f"predictions-{os.getpid()}.jsonl"
+        _append_locked(path, json.dumps(record) + "\n", self._spill_lock)
+        self._counters["dead_lettered"] += 1
+        logger.error(f"Rejected {table_name} row moved to {path}: {self._last_error.splitlines()[0]}")
+
+    def _replay_spill(self) -> None:
+        """
+        Write spilled rows back, oldest files first.
+
+        Every ``*.jsonl`` in the spill directory is claimed by renaming it
+        (so rows spilled by earlier or other processes are replayed too), as
+        is any ``*.replay-*`` file whose replaying process died. Files are
+        streamed in ``batch_size`` chunks. At the first connection failure the
+        rest of the file is spilled again and replay backs off.
+        """
+        replayed = 0
+        try:
+            for path in self._claim_spill_files():
+                with open(path, "r") as f:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_EX)  # marks the file as being replayed
+                    chunk: List[Tuple[str, Dict[str, Any]]] = []
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            chunk.append((record["table"], _decode(record["row"])))
+                        if len(chunk) >= self.batch_size:
+                            if not self._write(chunk):
+                                self._respill_rest(f)
+                                return
+                            replayed += len(chunk)
+                            chunk = []
+                    written = self._write(chunk)
+                    path.unlink()
+                    if not written:
+                        return
+                    replayed += len(chunk)
+        finally:
+            self._counters["replayed"] += replayed
+            if replayed:
+                logger.info(f"Replayed {replayed:,} spilled log rows")
+
+    def _claim_spill_files(self) -> List[Path]:
+        if not self.spill_dir.exists():
+            return []
+        claimed = []
+        candidates = sorted(self.spill_dir.glob("*.jsonl")) + sorted(self.spill_dir.glob("*.replay-*"))
+        for path in candidates:
+            target = self.spill_dir / f"{path.name.split('.')[0]}.replay-{os.getpid()}-{time.time_ns()}"
+            try:
+                if ".replay-" in path.name and not _unlocked(path):
+                    continue  # another live process is replaying it
+                with self._spill_lock:
+                    os.replace(path, target)
+            except FileNotFoundError:
+                continue  # claimed by another process first
+            claimed.append(target)
+        return claimed
+
+    def _respill_rest(self, f) -> None:
+        """Move the unread remainder of a replay file back into a spill file."""
+        rest = f.read()
+        if rest.strip():
+            _append_locked(self.spill_dir / f"predictions-{os.getpid()}.jsonl", rest, self._spill_lock)
+        os.unlink(f.name)
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Connection-level failures are worth retrying; data and schema errors are not.
+
+    An ``OperationalError`` is only transient when the DBAPI error code says so
+    ("no such table" is an ``OperationalError`` too) or when it carries no code
+    at all, i.e. the client failed before the server answered.
+    """
+    if getattr(error, "connection_invalidated", False):
+        return True
+    if isinstance(error, (exc.InterfaceError, exc.DisconnectionError, exc.TimeoutError)):
+        return True
+    if not isinstance(error, exc.DBAPIError):
+        return False
+
+    orig = error.orig
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if sqlstate:
+        return sqlstate.startswith(TRANSIENT_SQLSTATES)
+    sqlite_code = getattr(orig, "sqlite_errorcode", None)
+    if sqlite_code is not None:
+        return sqlite_code & 0xFF in TRANSIENT_SQLITE_CODES  # extended codes keep the primary code in the low byte
+    if isinstance(orig, sqlite3.Error):
+        return str(orig).startswith(TRANSIENT_SQLITE_MESSAGES)
+    return isinstance(error, exc.OperationalError)
+
+
+def _append_locked(path: Path, text: str, lock: threading.Lock) -> None:
+    """Append to ``path`` under a file lock, retrying if a replayer renamed it meanwhile."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with lock:
+        while True:
+            with open(path, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                            continue  # claimed for replay between open and lock
+                    except FileNotFoundError:
+                        continue
+                f.write(text)
+                f.flush()
+                return
+
+
+def _unlocked(path: Path) -> bool:
+    """True if no process holds a lock on ``path`` (i.e. its replayer is gone)."""
+    if fcntl is None:
+        return True
+    with open(path, "r") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(f, fcntl.LOCK_UN)
+    return True
+
+
+# WRITERS
+
+def _insert_rows(connection, table_name: str, rows: List[Dict[str, Any]]) -> None:
+    """One executemany INSERT; missing keys become NULL."""
+    target = TABLES[table_name]
+    names = [c.name for c in target.columns]
+    connection.execute(insert(target), [{name: row.get(name) for name in names} for row in rows])
+
+
+def _copy_rows(connection, table_name: str, rows: List[Dict[str, Any]]) -> None:
+    """PostgreSQL ``COPY FROM STDIN`` in CSV format via the raw psycopg2 cursor."""
+    target = TABLES[table_name]
+    names = [c.name for c in target.columns if any(c.name in row for row in rows)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row.get(name)) for name in names])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table_name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return "\\N"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()  # bytea hex format
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# SPILL ENCODING
+
+def _encode(row: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = {}
+    for key, value in row.items():
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+        elif isinstance(value, datetime):
+            value = {"__datetime__": value.isoformat()}
+        elif isinstance(value, np.generic):
+            value = value.item()
+        encoded[key] = value
+    return encoded
+
+
+def _decode(row: Dict[str, Any]) -> Dict[str, Any]:
+    decoded = {}
+    for key, value in row.items():
+        if isinstance(value, dict) and "__bytes__" in value:
+            value = base64.b64decode(value["__bytes__"])
+        elif isinstance(value, dict) and "__datetime__" in value:
+            value = datetime.fromisoformat(value["__datetime__"])
+        decoded[key] = value
+    return decoded
@@ -0,0 +1,124 @@
+"""
+Explanation accuracy (fidelity) metrics for XAE-Frame.
+
+NIST principle 3 ("Explanation Accuracy") requires that explanations reflect
+how the model actually reached its output. These metrics compare an
+approximate attribution against exact TreeSHAP row by row:
+
+    top_k_agreement   Overlap of the k most important features (by |value|)
+    sign_agreement    Share of top-k exact features whose sign matches
+    rank_correlation  Spearman correlation of the attributions
+    cosine_similarity Cosine of the angle between attribution vectors
+
+``FidelityTracker`` keeps a rolling window of per-row scores so a service
+can compare the recent mean against ``explainability.fidelity.threshold``.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS = ["top_k_agreement", "sign_agreement", "rank_correlation", "cosine_similarity"]
+
+
+def top_k_agreement(approx: np.ndarray, exact: np.ndarray, k: int = 5) -> np.ndarray:
+    """Per-row share of exact top-k features also in the approximate top-k."""
+    approx, exact = np.atleast_2d(approx), np.atleast_2d(exact)
+    k = min(k, exact.shape[1])
+    top_exact = np.argsort(-np.abs(exact), axis=1)[:, :k]
+    top_approx = np.argsort(-np.abs(approx), axis=1)[:, :k]
+    hits = (top_exact[:, :, None] == top_approx[:, None, :]).any(axis=2)
+    return hits.mean(axis=1)
+
+
+def sign_agreement(approx: np.ndarray, exact: np.ndarray, k: int = 5) -> np.ndarray:
+    """Per-row share of exact top-k features whose approximate sign matches."""
+    approx, exact = np.atleast_2d(approx), np.atleast_2d(exact)
+    k = min(k, exact.shape[1])
+    top_exact = np.argsort(-np.abs(exact), axis=1)[:, :k]
+    rows = np.arange(len(exact))[:, None]
+    return (np.sign(approx[rows, top_exact]) == np.sign(exact[rows, top_exact])).mean(axis=1)
+
+
+def rank_correlation(approx: np.ndarray, exact: np.ndarray) -> np.ndarray:
+    """Per-row Spearman correlation of the attributions (1.0 for constant rows)."""
+    approx, exact = np.atleast_2d(approx), np.atleast_2d(exact)
+    ranks_a = np.argsort(np.argsort(approx, axis=1), axis=1).astype(np.float64)
+    ranks_e = np.argsort(np.argsort(exact, axis=1), axis=1).astype(np.float64)
+    ranks_a -= ranks_a.mean(axis=1, keepdims=True)
+    ranks_e -= ranks_e.mean(axis=1, keepdims=True)
+    denominator = np.sqrt((ranks_a ** 2).sum(axis=1) * (ranks_e ** 2).sum(axis=1))
+    numerator = (ranks_a * ranks_e).sum(axis=1)
+    return np.divide(numerator, denominator, out=np.ones(len(exact)), where=denominator > 0)
+
+
+def cosine_similarity(approx: np.ndarray, exact: np.ndarray) -> np.ndarray:
+    """Per-row cosine similarity (1.0 when both rows are all zero)."""
+    approx, exact = np.atleast_2d(approx), np.atleast_2d(exact)
+    denominator = np.linalg.norm(approx, axis=1) * np.linalg.norm(exact, axis=1)
+    numerator = (approx * exact).sum(axis=1)
+    return np.divide(numerator, denominator, out=np.ones(len(exact)), where=denominator > 0)
+
+
+def explanation_fidelity(approx: np.ndarray, exact: np.ndarray, k: int = 5) -> Dict[str, float]:
+    """Mean of every fidelity metric over the rows."""
+    return {
+        "top_k_agreement": float(top_k_agreement(approx, exact, k).mean()),
+        "sign_agreement": float(sign_agreement(approx, exact, k).mean()),
+        "rank_correlation": float(rank_correlation(approx, exact).mean()),
+        "cosine_similarity": float(cosine_similarity(approx, exact).mean()),
+    }
+
+
+def fidelity_scores(approx: np.ndarray, exact: np.ndarray, metric: str = "top_k_agreement", k: int = 5) -> np.ndarray:
+    """Per-row scores of one metric."""
+    if metric == "top_k_agreement":
+        return top_k_agreement(approx, exact, k)
+    if metric == "sign_agreement":
+        return sign_agreement(approx, exact, k)
+    if metric == "rank_correlation":
+        return rank_correlation(approx, exact)
+    if metric == "cosine_similarity":
+        return cosine_similarity(approx, exact)
+    raise ValueError(f"Unknown fidelity metric: {metric}")
+
+
+class FidelityTracker:
+    """
+    Rolling window of per-row fidelity scores.
+
+    Example:
+        tracker = FidelityTracker(window_size=500)
+        tracker.update(fidelity_scores(approx, exact))
+        tracker.mean
+    """
+
+    def __init__(self, window_size: int = 500):
+        """Initialize tracker keeping the last ``window_size`` scores."""
+        self._scores: deque = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def update(self, scores: np.ndarray) -> None:
+        """Add per-row scores."""
+        with self._lock:
+            self._scores.extend(np.atleast_1d(scores).tolist())
+            self.total += len(np.atleast_1d(scores))
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean score over the window (None before any update)."""
+        with self._lock:
+            return float(np.mean(self._scores)) if self._scores else None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._scores.clear()
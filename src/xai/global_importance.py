@@ -0,0 +1,302 @@
+"""
+Incremental global SHAP importance for XAE-Frame dashboards.
+
+Instead of rescanning every logged ``predictions.explanation`` blob, the
+``ShapAggregator`` folds each batch of SHAP values into a few KB of running
+state per segment ("all" plus one segment per protected-attribute value):
+
+    n            rows aggregated
+    mean_abs     running mean |SHAP| per feature (global importance)
+    m2_abs       sum of squared deviations of |SHAP| (-> variance)
+    mean         running signed mean SHAP per feature
+    histogram    fixed-bin counts of SHAP values per feature
+    dependence   per feature-value bin: SHAP sum and count (dependence plots)
+
+Batches are combined with the parallel (Chan et al.) form of Welford's
+update, so two aggregators built by different workers merge exactly, and
+state is checkpointed to ``.npz``.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ALL = "all"
+
+DEFAULT_CHECKPOINT = Path("data/models/global_importance.npz")
+
+
+class _SegmentState:
+    """Running statistics of one segment."""
+
+    def __init__(self, n_features: int, n_bins: int, n_dependence_bins: int):
+        self.n = 0
+        self.mean_abs = np.zeros(n_features)
+        self.m2_abs = np.zeros(n_features)
+        self.mean = np.zeros(n_features)
+        # Two extra bins each for values below/above the fixed range
+        self.histogram = np.zeros((n_features, n_bins + 2), dtype=np.int64)
+        self.dependence_sum = np.zeros((n_features, n_dependence_bins + 2))
+        self.dependence_count = np.zeros((n_features, n_dependence_bins + 2), dtype=np.int64)
+
+    def merge(self, n: int, mean_abs: np.ndarray, m2_abs: np.ndarray, mean: np.ndarray) -> None:
+        """Chan et al. combination of two (count, mean, M2) summaries."""
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean_abs - self.mean_abs
+        self.m2_abs += m2_abs + delta ** 2 * self.n * n / total
+        self.mean_abs += delta * n / total
+        self.mean += (mean - self.mean) * n / total
+        self.n = total
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "n": np.array(self.n),
+            "mean_abs": self.mean_abs,
+            "m2_abs": self.m2_abs,
+            "mean": self.mean,
+            "histogram": self.histogram,
+            "dependence_sum": self.dependence_sum,
+            "dependence_count": self.dependence_count,
+        }
+
+
+class ShapAggregator:
+    """
+    Mergeable running aggregate of SHAP values, overall and per segment.
+
+    Example:
+        aggregator = ShapAggregator(feature_names, shap_range=2.0)
+        aggregator.update(shap_values, X, groups={"user_gender": genders})
+        aggregator.importance()                     # global mean |SHAP|
+        aggregator.segment_importance("user_gender")
+        aggregator.save("data/models/global_importance.npz")
+    """
+
+    def __init__(
+        self,
+        feature_names: List[str],
+        shap_range: float = 1.0,
+        n_bins: int = 40,
+        dependence_edges: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """
+        Initialize aggregator.
+
+        Args:
+            feature_names: Names of the SHAP value columns
+            shap_range: Histograms cover [-shap_range, shap_range] (plus
+                        under/overflow bins); must match across merged workers
+            n_bins: Histogram bins inside the range
+            dependence_edges: Fixed feature-value bin edges per feature for
+                              dependence summaries (same number of edges for
+                              every feature, e.g. from training quantiles)
+        """
+        self.feature_names = list(feature_names)
+        self.shap_range = float(shap_range)
+        self.n_bins = n_bins
+        self.bin_edges = np.linspace(-self.shap_range, self.shap_range, n_bins + 1)
+
+        n_features = len(self.feature_names)
+        self.dependence_edges: Optional[np.ndarray] = None
+        if dependence_edges:
+            widths = {len(edges) for edges in dependence_edges.values()}
+            if len(widths) != 1:
+                raise ValueError("All dependence edge arrays must have the same length")
+            width = widths.pop()
+            self.dependence_edges = np.full((n_features, width), np.nan)
+            for name, edges in dependence_edges.items():
+                self.dependence_edges[self.feature_names.index(name)] = np.sort(edges)
+        self.n_dependence_bins = self.dependence_edges.shape[1] - 1 if self.dependence_edges is not None else 0
+
+        self.segments: Dict[str, _SegmentState] = {}
+
+    # UPDATES
+
+    def update(
+        self,
+        shap_values: np.ndarray,
+        X: Optional[np.ndarray] = None,
+        groups: Optional[Dict[str, np.ndarray]] = None,
+    ) -> "ShapAggregator":
+        """
+        Fold a batch of SHAP values into the overall and per-segment state.
+
+        Args:
+            shap_values: (n_rows, n_features) SHAP values
+            X: (n_rows, n_features) feature values, for dependence summaries
+            groups: Protected attribute -> per-row group label
+        """
+        shap_values = np.atleast_2d(np.asarray(shap_values, dtype=np.float64))
+        if shap_values.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected {len(self.feature_names)} SHAP columns, got {shap_values.shape[1]}"
+            )
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64)) if X is not None else None
+
+        self._update_segment(ALL, shap_values, X)
+        for attribute, labels in (groups or {}).items():
+            labels = np.asarray(labels).astype(str)
+            for label in np.unique(labels):
+                mask = labels == label
+                self._update_segment(
+                    segment_name(attribute, label), shap_values[mask], X[mask] if X is not None else None
+                )
+        return self
+
+    def update_from_explanations(self, explanations: List[Any], groups: Optional[Dict[str, np.ndarray]] = None):
+        """Fold in ``Explanation`` objects (e.g. a batch from the ExplanationEngine)."""
+        if explanations:
+            self.update(np.vstack([e.shap_values for e in explanations]), groups=groups)
+        return self
+
+    def merge(self, other: "ShapAggregator") -> "ShapAggregator":
+        """Merge another worker's aggregator into this one."""
+        if other.feature_names != self.feature_names or not np.allclose(other.bin_edges, self.bin_edges):
+            raise ValueError("Cannot merge aggregators with different features or histogram bins")
+        if other.n_dependence_bins != self.n_dependence_bins:
+            raise ValueError("Cannot merge aggregators with different dependence bins")
+        for name, theirs in other.segments.items():
+            ours = self._segment(name)
+            ours.merge(theirs.n, theirs.mean_abs, theirs.m2_abs, theirs.mean)
+            ours.histogram += theirs.histogram
+            ours.dependence_sum += theirs.dependence_sum
+            ours.dependence_count += theirs.dependence_count
+        return self
+
+    # QUERIES
+
+    def importance(self, segment: str = ALL) -> pd.DataFrame:
+        """Mean |SHAP|, its standard deviation and mean SHAP per feature, most important first."""
+        state = self.segments.get(segment)
+        if state is None:
+            raise KeyError(f"No SHAP values aggregated for segment {segment}")
+        variance = state.m2_abs / (state.n - 1) if state.n > 1 else np.zeros_like(state.m2_abs)
+        frame = pd.DataFrame({
+            "feature": self.feature_names,
+            "mean_abs_shap": state.mean_abs,
+            "std_abs_shap": np.sqrt(variance),
+            "mean_shap": state.mean,
+            "n": state.n,
+        })
+        return frame.sort_values("mean_abs_shap", ascending=False, ignore_index=True)
+
+    def segment_importance(self, attribute: str) -> pd.DataFrame:
+        """Mean |SHAP| per feature (rows) and group of ``attribute`` (columns)."""
+        prefix = f"{attribute}="
+        columns = {
+            name[len(prefix):]: state.mean_abs
+            for name, state in sorted(self.segments.items()) if name.startswith(prefix)
+        }
+        return pd.DataFrame(columns, index=self.feature_names)
+
+    def histogram(self, feature: str, segment: str = ALL) -> pd.DataFrame:
+        """SHAP value histogram of ``feature`` (first/last rows are under/overflow)."""
+        counts = self.segments[segment].histogram[self.feature_names.index(feature)]
+        lower = np.concatenate([[-np.inf], self.bin_edges])
+        upper = np.concatenate([self.bin_edges, [np.inf]])
+        return pd.DataFrame({"lower": lower, "upper": upper, "count": counts})
+
+    def dependence(self, feature: str, segment: str = ALL) -> pd.DataFrame:
+        """Mean SHAP of ``feature`` per feature-value bin."""
+        if self.dependence_edges is None:
+            raise ValueError("Aggregator was created without dependence_edges")
+        i = self.feature_names.index(feature)
+        state = self.segments[segment]
+        edges = self.dependence_edges[i]
+        counts = state.dependence_count[i]
+        return pd.DataFrame({
+            "lower": np.concatenate([[-np.inf], edges]),
+            "upper": np.concatenate([edges, [np.inf]]),
+            "count": counts,
+            "mean_shap": np.divide(state.dependence_sum[i], counts, out=np.full(len(counts), np.nan), where=counts > 0),
+        })
+
+    # PERSISTENCE
+
+    def save(self, path: Union[str, Path] = DEFAULT_CHECKPOINT) -> Path:
+        """Atomically checkpoint the state to an ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "feature_names": np.array(self.feature_names, dtype=str),
+            "bin_edges": self.bin_edges,
+            "segments": np.array(list(self.segments), dtype=str),
+        }
+        if self.dependence_edges is not None:
+            arrays["dependence_edges"] = self.dependence_edges
+        for i, state in enumerate(self.segments.values()):
+            for key, value in state.arrays().items():
+                arrays[f"segment{i}/{key}"] = value
+
+        tmp = path.with_name(f".{path.stem}.tmp-{os.getpid()}.npz")
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = DEFAULT_CHECKPOINT) -> "ShapAggregator":
+        """Restore an aggregator checkpointed with ``save``."""
+        with np.load(path, allow_pickle=False) as data:
+            edges = data["bin_edges"]
+            aggregator = cls(data["feature_names"].tolist(), shap_range=float(edges[-1]), n_bins=len(edges) - 1)
+            if "dependence_edges" in data:
+                aggregator.dependence_edges = data["dependence_edges"]
+                aggregator.n_dependence_bins = aggregator.dependence_edges.shape[1] - 1
+            for i, name in enumerate(data["segments"].tolist()):
+                state = aggregator._segment(name)
+                state.n = int(data[f"segment{i}/n"])
+                for key in ("mean_abs", "m2_abs", "mean", "histogram", "dependence_sum", "dependence_count"):
+                    setattr(state, key, data[f"segment{i}/{key}"].copy())
+        return aggregator
+
+    # INTERNALS
+
+    def _segment(self, name: str) -> _SegmentState:
+        if name not in self.segments:
+            self.segments[name] = _SegmentState(len(self.feature_names), self.n_bins, self.n_dependence_bins)
+        return self.segments[name]
+
+    def _update_segment(self, name: str, shap_values: np.ndarray, X: Optional[np.ndarray]) -> None:
+        n = len(shap_values)
+        if n == 0:
+            return
+        state = self._segment(name)
+
+        absolute = np.abs(shap_values)
+        batch_mean_abs = absolute.mean(axis=0)
+        batch_m2_abs = ((absolute - batch_mean_abs) ** 2).sum(axis=0)
+        state.merge(n, batch_mean_abs, batch_m2_abs, shap_values.mean(axis=0))
+
+        # Bin 0 = below range, bin n_bins + 1 = above range
+        bins = np.searchsorted(self.bin_edges, shap_values, side="right")
+        _add_counts(state.histogram, bins)
+
+        if X is not None and self.dependence_edges is not None:
+            value_bins = np.empty(X.shape, dtype=np.int64)
+            for j in range(X.shape[1]):
+                value_bins[:, j] = np.searchsorted(self.dependence_edges[j], X[:, j], side="right")
+            _add_counts(state.dependence_count, value_bins)
+            _add_counts(state.dependence_sum, value_bins, shap_values)
+
+
+def segment_name(attribute: str, label: Any) -> str:
+    """Name of the segment for one protected-attribute value."""
+    return f"{attribute}={label}"
+
+
+def _add_counts(target: np.ndarray, bins: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+    """Scatter-add per-(feature, bin) counts or weights into ``target``."""
+    n_features, width = target.shape
+    flat = (bins + np.arange(n_features) * width).ravel()
+    added = np.bincount(
+        flat, weights=None if weights is None else weights.ravel(), minlength=n_features * width
+    )
+    target += added.reshape(n_features, width).astype(target.dtype)
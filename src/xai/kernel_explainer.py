@@ -0,0 +1,272 @@
+"""
+Parallel kernel / permutation SHAP for non-tree models.
+
+Used when ``explainability.shap.explainer_type`` is ``kernel`` (e.g. models
+transferred across domains that are not tree ensembles). Kernel SHAP is
+orders of magnitude slower than TreeSHAP, so:
+
+    - The background dataset is summarized once per model version with
+      ``shap.kmeans`` (``sample_size`` weighted centroids) and cached on disk.
+    - Explained rows are sharded across a process pool. The background, its
+      weights, the rows and the pickled model are placed in
+      ``multiprocessing.shared_memory`` blocks; each worker attaches once in
+      its initializer and builds one explainer, so tasks only carry row
+      ranges and work scales with the number of cores.
+
+Typical use is the nightly compliance re-explanation for finance/insurance.
+"""
+
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKGROUND_DIR = Path("data/models/background")
+
+EXPLAINER_TYPES = ["kernel", "permutation"]
+
+# Per-worker state set by ``_init_worker``
+_WORKER: Dict[str, Any] = {}
+
+
+def select_background(
+    X: np.ndarray,
+    sample_size: int = 100,
+    seed: int = 42,
+    max_rows: int = 100_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Summarize ``X`` into ``sample_size`` weighted k-means centroids.
+
+    Args:
+        X: Training (or reference window) feature matrix
+        sample_size: Number of background points
+        seed: Seed for the row subsample taken before clustering
+        max_rows: Rows clustered at most (k-means on all rows adds little)
+
+    Returns:
+        (background data, weights summing to 1)
+    """
+    import shap
+
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) > max_rows:
+        rows = np.random.default_rng(seed).choice(len(X), size=max_rows, replace=False)
+        X = X[np.sort(rows)]
+    if len(X) <= sample_size:
+        return X, np.full(len(X), 1.0 / len(X))
+
+    summary = shap.kmeans(X, sample_size)
+    weights = np.asarray(summary.weights, dtype=np.float64)
+    return np.asarray(summary.data, dtype=np.float64), weights / weights.sum()
+
+
+class ParallelKernelExplainer:
+    """
+    Kernel/permutation SHAP sharded across a process pool.
+
+    Example:
+        explainer = ParallelKernelExplainer.from_config(config, model, "v7", jobs=16)
+        explainer.fit_background(X_train)        # once per model version (cached)
+        shap_values = explainer.explain(X_nightly)
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        model_version: str,
+        explainer_type: str = "kernel",
+        sample_size: int = 100,
+        jobs: Optional[int] = None,
+        nsamples: Union[int, str] = "auto",
+        shard_rows: int = 32,
+        background_dir: Union[str, Path] = DEFAULT_BACKGROUND_DIR,
+        seed: int = 42,
+    ):
+        """
+        Initialize explainer.
+
+        Args:
+            model: Fitted model with ``predict_proba`` or ``predict`` (picklable)
+            model_version: Version the background cache is keyed by
+            explainer_type: "kernel" or "permutation"
+            sample_size: Background points (``explainability.shap.sample_size``)
+            jobs: Worker processes (None = all cores)
+            nsamples: Model evaluations per explained row (kernel) or
+                      max_evals (permutation)
+            shard_rows: Rows per task; fixed so results do not depend on ``jobs``
+            background_dir: Directory of the per-version background cache
+            seed: Seed for background selection and sampling
+        """
+        if explainer_type not in EXPLAINER_TYPES:
+            raise ValueError(f"Unknown explainer type for ParallelKernelExplainer: {explainer_type}")
+        self.model = model
+        self.model_version = model_version
+        self.explainer_type = explainer_type
+        self.sample_size = sample_size
+        self.jobs = jobs or os.cpu_count() or 1
+        self.nsamples = nsamples
+        self.shard_rows = shard_rows
+        self.background_dir = Path(background_dir)
+        self.seed = seed
+
+        self.background: Optional[np.ndarray] = None
+        self.weights: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], model: Any, model_version: str, **kwargs: Any):
+        """Build an explainer from the ``explainability.shap`` config block."""
+        shap_config = config.get("explainability", {}).get("shap", {})
+        explainer_type = shap_config.get("explainer_type", "kernel")
+        kwargs.setdefault("explainer_type", explainer_type if explainer_type in EXPLAINER_TYPES else "kernel")
+        kwargs.setdefault("sample_size", shap_config.get("sample_size", 100))
+        kwargs.setdefault("seed", config.get("dataset", {}).get("random_seed", 42))
+        return cls(model, model_version, **kwargs)
+
+    # BACKGROUND
+
+    @property
+    def background_path(self) -> Path:
+        return self.background_dir / f"{self.model_version}.npz"
+
+    def fit_background(self, X: np.ndarray) -> "ParallelKernelExplainer":
+        """Load the cached background for this version, or select and cache it."""
+        path = self.background_path
+        if path.exists():
+            with np.load(path) as data:
+                if int(data["sample_size"]) == self.sample_size:
+                    self.background, self.weights = data["background"], data["weights"]
+                    logger.info(f"✓ Loaded background for model version {self.model_version} from cache")
+                    return self
+
+        self.background, self.weights = select_background(X, self.sample_size, self.seed)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.tmp-{os.getpid()}.npz")
+        np.savez(tmp, background=self.background, weights=self.weights, sample_size=self.sample_size)
+        os.replace(tmp, path)
+        logger.info(f"✓ Selected {len(self.background)} background points for model version {self.model_version}")
+        return self
+
+    # EXPLAIN
+
+    def explain(self, X: np.ndarray) -> np.ndarray:
+        """
+        SHAP values for every row of ``X``, computed in parallel.
+
+        Returns:
+            (n_rows, n_features) array (positive class for classifiers)
+        """
+        if self.background is None:
+            raise RuntimeError("Call fit_background() before explain()")
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return np.empty((0, X.shape[1]))
+
+        shards = [(start, min(start + self.shard_rows, len(X))) for start in range(0, len(X), self.shard_rows)]
+
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            specs = {
+                "background": _share(self.background, blocks),
+                "weights": _share(self.weights, blocks),
+                "rows": _share(X, blocks),
+                "model": _share(np.frombuffer(pickle.dumps(self.model), dtype=np.uint8), blocks),
+            }
+            options = {"explainer_type": self.explainer_type, "nsamples": self.nsamples, "seed": self.seed}
+
+            if self.jobs <= 1:
+                _init_worker(specs, options)
+                parts = [_explain_shard(a, b) for a, b in shards]
+                _release_worker()
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(self.jobs, len(shards)),
+                    initializer=_init_worker,
+                    initargs=(specs, options),
+                ) as pool:
+                    parts = list(pool.map(_explain_shard, *zip(*shards)))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        logger.info(f"✓ Explained {len(X):,} rows with {self.explainer_type} SHAP on {self.jobs} workers")
+        return np.vstack(parts)
+
+
+def _predict_function(model: Any) -> Callable[[np.ndarray], np.ndarray]:
+    """Single-output prediction function (positive-class probability for classifiers)."""
+    if hasattr(model, "predict_proba"):
+        return lambda X: model.predict_proba(X)[:, -1]
+    return model.predict
+
+
+# SHARED MEMORY
+
+def _share(array: np.ndarray, blocks: List[shared_memory.SharedMemory]) -> Dict[str, Any]:
+    """Copy ``array`` into a new shared-memory block and describe it."""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return {"name": block.name, "shape": array.shape, "dtype": array.dtype.str}
+
+
+def _attach(spec: Dict[str, Any], blocks: List[shared_memory.SharedMemory]) -> np.ndarray:
+    block = shared_memory.SharedMemory(name=spec["name"])
+    blocks.append(block)
+    return np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+
+
+# WORKER ENTRY POINTS
+
+def _init_worker(specs: Dict[str, Dict[str, Any]], options: Dict[str, Any]) -> None:
+    """Attach to the shared blocks and build this worker's explainer once."""
+    import shap
+
+    blocks: List[shared_memory.SharedMemory] = []
+    background = _attach(specs["background"], blocks)
+    weights = _attach(specs["weights"], blocks)
+    model = pickle.loads(_attach(specs["model"], blocks).tobytes())
+    predict = _predict_function(model)
+
+    if options["explainer_type"] == "kernel":
+        from shap.utils._legacy import DenseData
+
+        data = DenseData(background, [str(i) for i in range(background.shape[1])], None, weights)
+        explainer = shap.KernelExplainer(predict, data)
+    else:
+        # The Independent masker samples background rows uniformly (weights unused)
+        explainer = shap.PermutationExplainer(predict, shap.maskers.Independent(background, len(background)))
+
+    _WORKER.update(
+        blocks=blocks, rows=_attach(specs["rows"], blocks), explainer=explainer, options=options,
+    )
+
+
+def _release_worker() -> None:
+    for block in _WORKER.pop("blocks", []):
+        block.close()
+    _WORKER.clear()
+
+
+def _explain_shard(start: int, end: int) -> np.ndarray:
+    options = _WORKER["options"]
+    rows = np.array(_WORKER["rows"][start:end])
+    np.random.seed((options["seed"] + start) % 2**32)  # kernel SHAP samples from the global RNG
+
+    if options["explainer_type"] == "kernel":
+        values = _WORKER["explainer"].shap_values(rows, nsamples=options["nsamples"], silent=True)
+    else:
+        max_evals = options["nsamples"] if options["nsamples"] != "auto" else 500
+        values = _WORKER["explainer"](rows, max_evals=max_evals, silent=True).values
+    if isinstance(values, list):
+        values = values[-1]
+    return np.asarray(values, dtype=np.float64)
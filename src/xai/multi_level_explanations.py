@@ -0,0 +1,195 @@
+"""
+Multi-level explanation rendering for XAE-Frame.
+
+Turns one SHAP attribution into the five NIST explanation types listed under
+``explainability.explanation_types``:
+
+    user_benefit          Simple "why" for end users
+    societal_acceptance   Drivers for and against, with a confidence level
+    regulatory_compliance Full, ordered attribution for audit trails
+    system_development    Raw values and shares for debugging
+    owner_benefit         Contribution shares of the main drivers
+
+Renderings are plain JSON-serializable dicts so they can be stored,
+logged (``predictions.explanation``) or returned by the API as-is.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXPLANATION_TYPES = [
+    "user_benefit",
+    "societal_acceptance",
+    "regulatory_compliance",
+    "system_development",
+    "owner_benefit",
+]
+
+
+class MultiLevelExplainer:
+    """
+    Render SHAP explanations for different stakeholders.
+
+    Example:
+        renderer = MultiLevelExplainer.from_config(config)
+        renderings = renderer.render_all(explanation, prediction=0.83)
+        renderings["user_benefit"]["summary"]
+    """
+
+    def __init__(
+        self,
+        explanation_types: Optional[List[str]] = None,
+        confidence_thresholds: Optional[Dict[str, float]] = None,
+        top_k: int = 3,
+    ):
+        """
+        Initialize renderer.
+
+        Args:
+            explanation_types: Types produced by ``render_all`` (default: all five)
+            confidence_thresholds: ``high`` / ``medium`` / ``low`` cut-offs
+            top_k: Drivers named in the short renderings
+        """
+        self.explanation_types = explanation_types or EXPLANATION_TYPES
+        unknown = set(self.explanation_types) - set(EXPLANATION_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown explanation types: {', '.join(sorted(unknown))}")
+        self.confidence_thresholds = confidence_thresholds or {"high": 0.90, "medium": 0.70, "low": 0.50}
+        self.top_k = top_k
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "MultiLevelExplainer":
+        """Build a renderer from the ``explainability`` config block."""
+        xai = config.get("explainability", {})
+        kwargs.setdefault("explanation_types", xai.get("explanation_types"))
+        kwargs.setdefault("confidence_thresholds", xai.get("confidence_thresholds"))
+        return cls(**kwargs)
+
+    def render(self, explanation, explanation_type: str, prediction: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Render one explanation type.
+
+        Args:
+            explanation: ``Explanation`` from ``src.xai.shap_explainer``
+            explanation_type: One of EXPLANATION_TYPES
+            prediction: Model output for the explained row (used for confidence)
+        """
+        renderer = _RENDERERS.get(explanation_type)
+        if renderer is None:
+            raise ValueError(f"Unknown explanation type: {explanation_type}")
+        contributions = _contributions(explanation)
+        rendering = renderer(self, explanation, contributions, prediction)
+        return {"type": explanation_type, **rendering}
+
+    def render_all(self, explanation, prediction: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Render every configured explanation type."""
+        return {t: self.render(explanation, t, prediction) for t in self.explanation_types}
+
+    def confidence_level(self, confidence: Optional[float]) -> str:
+        """Map a confidence score to ``high`` / ``medium`` / ``low`` / ``insufficient``."""
+        if confidence is None:
+            return "unknown"
+        for level in ("high", "medium", "low"):
+            if confidence >= self.confidence_thresholds.get(level, 1.0):
+                return level
+        return "insufficient"
+
+
+# RENDERERS
+
+def _user_benefit(renderer, explanation, contributions, prediction):
+    reasons = [name for name, value in contributions if value > 0][: renderer.top_k]
+    if reasons:
+        summary = "Recommended mainly because of " + _join([_readable(r) for r in reasons]) + "."
+    else:
+        summary = "No single factor stood out for this recommendation."
+    return {"summary": summary, "reasons": reasons}
+
+
+def _societal_acceptance(renderer, explanation, contributions, prediction):
+    confidence = _confidence(prediction)
+    return {
+        "drivers_for": [name for name, value in contributions if value > 0][: renderer.top_k],
+        "drivers_against": [name for name, value in contributions if value < 0][: renderer.top_k],
+        "confidence": confidence,
+        "confidence_level": renderer.confidence_level(confidence),
+    }
+
+
+def _regulatory_compliance(renderer, explanation, contributions, prediction):
+    values = np.asarray(explanation.shap_values, dtype=np.float64)
+    return {
+        "model_version": explanation.model_version,
+        "base_value": float(explanation.base_value),
+        "output_value": float(explanation.base_value + values.sum()),
+        "prediction": prediction,
+        "attributions": [{"feature": name, "contribution": value} for name, value in contributions],
+    }
+
+
+def _system_development(renderer, explanation, contributions, prediction):
+    values = np.asarray(explanation.shap_values, dtype=np.float64)
+    total = np.abs(values).sum()
+    return {
+        "base_value": float(explanation.base_value),
+        "shap_sum": float(values.sum()),
+        "abs_shap_sum": float(total),
+        "shap_values": dict(contributions),
+        "abs_share": {name: abs(value) / total if total else 0.0 for name, value in contributions},
+    }
+
+
+def _owner_benefit(renderer, explanation, contributions, prediction):
+    total = sum(abs(value) for _, value in contributions)
+    top = contributions[: renderer.top_k]
+    return {
+        "key_drivers": [
+            {"feature": name, "share": abs(value) / total if total else 0.0, "direction": _direction(value)}
+            for name, value in top
+        ],
+        "explained_share": sum(abs(value) for _, value in top) / total if total else 0.0,
+    }
+
+
+_RENDERERS: Dict[str, Callable] = {
+    "user_benefit": _user_benefit,
+    "societal_acceptance": _societal_acceptance,
+    "regulatory_compliance": _regulatory_compliance,
+    "system_development": _system_development,
+    "owner_benefit": _owner_benefit,
+}
+
+
+# HELPERS
+
+def _contributions(explanation) -> List:
+    """(feature, contribution) pairs ordered by absolute contribution."""
+    values = np.asarray(explanation.shap_values, dtype=np.float64)
+    names = explanation.feature_names or [f"f{i}" for i in range(len(values))]
+    order = np.argsort(-np.abs(values), kind="stable")
+    return [(names[i], float(values[i])) for i in order]
+
+
+def _confidence(prediction: Optional[float]) -> Optional[float]:
+    """Confidence of a probability-like prediction (distance from the undecided 0.5)."""
+    if prediction is None or not 0.0 <= prediction <= 1.0:
+        return None
+    return float(max(prediction, 1.0 - prediction))
+
+
+def _direction(value: float) -> str:
+    return "increases" if value > 0 else "decreases"
+
+
+def _readable(feature: str) -> str:
+    return feature.replace("_", " ")
+
+
+def _join(items: List[str]) -> str:
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
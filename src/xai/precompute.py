@@ -0,0 +1,319 @@
+"""
+Precomputed SHAP explanations for the hot (user, item) segment.
+
+Most traffic hits a small head of popular items and returning users, so the
+same feature vectors are explained over and over. An offline job
+(``ExplanationPrecomputer``) takes the top-N most frequent (user, item) pairs
+from ``user_interactions``, builds their feature vectors, explains them in one
+vectorized pass and renders the configured NIST explanation types. Results
+go to a compact array-backed store per model version:
+
+    data/models/explanations/<version>.npz
+        keys         uint64   sorted feature-vector hashes
+        shap_values  float32  (n, n_features)
+        base_values  float32  (n,)
+        renderings   uint8    UTF-8 JSON blob, sliced by offsets
+        offsets      int64    (n + 1,)
+
+Lookups are a binary search over ``keys``. The job runs for every model
+version that can serve (the active row in ``models``, or a version registered
+with the engine such as a running challenger) and has no store yet; stores
+already on disk are reloaded instead, e.g. after a restart. Each store is
+attached to the ``ExplanationEngine`` so online requests hit it before live
+SHAP.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from .multi_level_explanations import MultiLevelExplainer
+from .shap_explainer import Explanation, ExplanationEngine, feature_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = Path("data/models/explanations")
+
+# Versions that can serve traffic; NULL is_active means the column default (active)
+SERVING_MODELS_QUERY = (
+    "SELECT id, version, config FROM models "
+    "WHERE is_active IS NOT FALSE OR version IN :serving ORDER BY id"
+)
+
+HOT_PAIRS_QUERY = (
+    "SELECT user_id, item_id, COUNT(*) AS n_interactions FROM user_interactions "
+    "GROUP BY user_id, item_id ORDER BY n_interactions DESC LIMIT :top_n"
+)
+
+
+class PrecomputedExplanationStore:
+    """
+    Immutable, sorted array store of explanations for one model version.
+
+    Example:
+        store = PrecomputedExplanationStore.load("data/models/explanations/v3.npz")
+        explanation = store.lookup(feature_hash(x))
+        explanation.renderings["user_benefit"]["summary"]
+    """
+
+    def __init__(
+        self,
+        model_version: str,
+        keys: np.ndarray,
+        shap_values: np.ndarray,
+        base_values: np.ndarray,
+        renderings: Optional[List[Dict[str, Any]]] = None,
+        feature_names: Optional[List[str]] = None,
+    ):
+        """
+        Initialize store (rows are sorted by key).
+
+        Args:
+            model_version: Model version the explanations belong to
+            keys: Feature-vector hashes (``feature_hash``)
+            shap_values: SHAP values, one row per key
+            base_values: Expected value per row
+            renderings: Rendered explanation types per row
+            feature_names: Names of the SHAP value columns
+        """
+        order = np.argsort(np.asarray(keys, dtype=np.uint64), kind="stable")
+        self.model_version = model_version
+        self.keys = np.asarray(keys, dtype=np.uint64)[order]
+        self.shap_values = np.asarray(shap_values, dtype=np.float32)[order]
+        self.base_values = np.asarray(base_values, dtype=np.float32)[order]
+        self.feature_names = feature_names
+
+        renderings = renderings or [{} for _ in range(len(order))]
+        encoded = [json.dumps(renderings[i], separators=(",", ":")).encode("utf-8") for i in order]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=self.offsets[1:])
+        self.blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: int) -> bool:
+        return self._position(key) is not None
+
+    def lookup(self, key: int) -> Optional[Explanation]:
+        """Stored explanation for a feature-vector hash (None on a miss)."""
+        position = self._position(key)
+        if position is None:
+            return None
+        explanation = Explanation(
+            self.model_version,
+            self.shap_values[position],
+            float(self.base_values[position]),
+            self.feature_names,
+            cached=True,
+        )
+        explanation.renderings = self.renderings(position)
+        return explanation
+
+    def renderings(self, position: int) -> Dict[str, Any]:
+        """Decoded renderings of the row at ``position``."""
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return json.loads(self.blob[start:end].tobytes().decode("utf-8"))
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Atomically write the store as an ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.tmp-{os.getpid()}.npz")
+        np.savez(
+            tmp,
+            model_version=np.array(self.model_version),
+            feature_names=np.array(self.feature_names or [], dtype=str),
+            keys=self.keys,
+            shap_values=self.shap_values,
+            base_values=self.base_values,
+            renderings=self.blob,
+            offsets=self.offsets,
+        )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PrecomputedExplanationStore":
+        """Load a store written by ``save``."""
+        with np.load(path, allow_pickle=False) as data:
+            store = cls.__new__(cls)
+            store.model_version = str(data["model_version"])
+            store.feature_names = data["feature_names"].tolist() or None
+            store.keys = data["keys"]
+            store.shap_values = data["shap_values"]
+            store.base_values = data["base_values"]
+            store.blob = data["renderings"]
+            store.offsets = data["offsets"]
+        return store
+
+    def _position(self, key: int) -> Optional[int]:
+        key = np.uint64(key)
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+        return None
+
+
+class ExplanationPrecomputer:
+    """
+    Offline job filling the precomputed store for the hot segment.
+
+    Example:
+        precomputer = ExplanationPrecomputer(
+            explanation_engine, build_features, model_loader=load_model, top_n=50_000
+        )
+        precomputer.refresh(db_engine)              # once, e.g. from a cron job
+        precomputer.watch(db_engine, interval=300)  # or keep polling for new serving models
+    """
+
+    def __init__(
+        self,
+        engine: ExplanationEngine,
+        feature_builder: Callable[[pd.DataFrame], pd.DataFrame],
+        model_loader: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        renderer: Optional[MultiLevelExplainer] = None,
+        top_n: int = 10_000,
+        store_dir: Union[str, Path] = DEFAULT_STORE_DIR,
+        batch_size: int = 5_000,
+    ):
+        """
+        Initialize precomputer.
+
+        Args:
+            engine: Explanation engine whose warm explainers are used and to
+                    which finished stores are attached
+            feature_builder: Maps (user_id, item_id) rows to the model's
+                             feature frame (same row order)
+            model_loader: Loads the model of a ``models`` row (as a dict);
+                          needed to register versions the engine doesn't know
+            renderer: Renders the explanation types (default: all five)
+            top_n: Most frequent (user, item) pairs to precompute
+            store_dir: Directory of the per-version ``.npz`` stores
+            batch_size: Rows explained per vectorized SHAP call
+        """
+        self.engine = engine
+        self.feature_builder = feature_builder
+        self.model_loader = model_loader
+        self.renderer = renderer or MultiLevelExplainer()
+        self.top_n = top_n
+        self.store_dir = Path(store_dir)
+        self.batch_size = batch_size
+        self.attached: Set[str] = set()  # versions whose store is attached to the engine
+        self.failed_model_ids: Set[int] = set()  # retried on the next refresh
+
+    def store_path(self, version: str) -> Path:
+        return self.store_dir / f"{version}.npz"
+
+    def hot_pairs(self, db_engine) -> pd.DataFrame:
+        """Top-N most frequent (user, item) pairs in ``user_interactions``."""
+        from sqlalchemy import text
+
+        with db_engine.connect() as connection:
+            return pd.read_sql(text(HOT_PAIRS_QUERY), connection, params={"top_n": self.top_n})
+
+    def precompute(self, version: str, pairs: pd.DataFrame) -> PrecomputedExplanationStore:
+        """
+        Explain and render the feature vectors of ``pairs`` for ``version``.
+
+        Pairs mapping to identical feature vectors are explained once. SHAP
+        values are computed directly, without the engine's online cache.
+        """
+        features = self.feature_builder(pairs)
+        feature_names = list(features.columns) if isinstance(features, pd.DataFrame) else None
+        X = np.asarray(features, dtype=np.float64)
+
+        keys = np.fromiter((feature_hash(row) for row in X), dtype=np.uint64, count=len(X))
+        keys, first = np.unique(keys, return_index=True)
+        X = X[first]
+
+        shap_values, base_values, renderings = [], [], []
+        for start in range(0, len(X), self.batch_size):
+            batch = X[start:start + self.batch_size]
+            predictions = self.engine.predict(version, batch)
+            for explanation, prediction in zip(self.engine.explain_batch(version, batch, cache=False), predictions):
+                if feature_names is not None:
+                    explanation = replace(explanation, feature_names=feature_names)
+                shap_values.append(explanation.shap_values)
+                base_values.append(explanation.base_value)
+                renderings.append(self.renderer.render_all(explanation, prediction=float(prediction)))
+
+        n_features = X.shape[1] if X.ndim == 2 else 0
+        store = PrecomputedExplanationStore(
+            version,
+            keys,
+            np.vstack(shap_values) if shap_values else np.empty((0, n_features), np.float32),
+            np.asarray(base_values, dtype=np.float32),
+            renderings,
+            feature_names,
+        )
+        store.save(self.store_path(version))
+        self.engine.attach_store(version, store)
+        self.attached.add(version)
+        logger.info(f"✓ Precomputed {len(store):,} explanations for model version {version}")
+        return store
+
+    def refresh(self, db_engine) -> List[str]:
+        """
+        Precompute stores for serving model versions that have none yet.
+
+        A version whose store file already exists is loaded and attached
+        instead of recomputed. Versions whose precompute failed are kept in
+        ``failed_model_ids`` and retried on the next call until they succeed.
+
+        Returns:
+            Versions that were (re)computed
+        """
+        from sqlalchemy import bindparam, text
+
+        statement = text(SERVING_MODELS_QUERY).bindparams(bindparam("serving", expanding=True))
+        with db_engine.connect() as connection:
+            rows = connection.execute(statement, {"serving": self.engine.versions}).mappings().all()
+        rows = [row for row in rows if row["version"] not in self.attached]
+        rows = [row for row in rows if not self._load_store(row["version"])]
+        if not rows:
+            return []
+
+        pairs = self.hot_pairs(db_engine)
+        refreshed = []
+        for row in rows:
+            version = row["version"]
+            try:
+                if version not in self.engine.versions:
+                    if self.model_loader is None:
+                        raise ValueError("no model_loader configured")
+                    self.engine.register_model(version, self.model_loader(dict(row)))
+                self.precompute(version, pairs)
+                refreshed.append(version)
+                self.failed_model_ids.discard(row["id"])
+            except Exception as e:
+                logger.error(f"Precomputing explanations for model version {version} failed (will retry): {e}")
+                self.failed_model_ids.add(row["id"])
+        return refreshed
+
+    def load_stores(self) -> int:
+        """Attach every store already on disk for a registered version."""
+        return sum(self._load_store(version) for version in self.engine.versions)
+
+    def watch(self, db_engine, interval: float = 300.0, stop: Optional[threading.Event] = None) -> None:
+        """Poll the ``models`` table every ``interval`` seconds until ``stop`` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.refresh(db_engine)
+            stop.wait(interval)
+
+    def _load_store(self, version: str) -> bool:
+        """Attach the store on disk for ``version``; False if there is none."""
+        path = self.store_path(version)
+        if not path.exists():
+            return False
+        self.engine.attach_store(version, PrecomputedExplanationStore.load(path))
+        self.attached.add(version)
+        return True
@@ -0,0 +1,426 @@
+"""
+Batched TreeSHAP explanation service for XAE-Frame.
+
+Implements ``explainability.shap`` from the domain config on the request path:
+
+    - One warm ``shap.TreeExplainer`` per registered model version
+    - Micro-batching: requests arriving within ``max_wait_ms`` of each other
+      (up to ``max_batch_size``) are explained with one vectorized SHAP call
+    - Result cache keyed by (model version, feature-vector hash) with LRU
+      eviction and ``cache_ttl`` expiry, honoring ``cache_enabled``
+    - Precomputed stores for the hot segment (``src/xai/precompute.py``),
+      consulted before the cache and live SHAP
+
+Callers on the request path use ``explain`` (blocking) or ``submit``
+(returns a ``concurrent.futures.Future``); offline jobs call
+``explain_batch`` directly.
+"""
+
+import hashlib
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that stops the batching thread
+_STOP = object()
+
+
+@dataclass
+class Explanation:
+    """SHAP attribution of a single prediction."""
+
+    model_version: str
+    shap_values: np.ndarray
+    base_value: float
+    feature_names: Optional[List[str]] = None
+    cached: bool = False
+    renderings: Optional[Dict[str, Any]] = None
+
+    def top_features(self, k: int = 5) -> List[Tuple[str, float]]:
+        """The ``k`` features with the largest absolute contribution."""
+        order = np.argsort(-np.abs(self.shap_values))[:k]
+        names = self.feature_names or [f"f{i}" for i in range(len(self.shap_values))]
+        return [(names[i], float(self.shap_values[i])) for i in order]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form (for API responses and audit logs)."""
+        names = self.feature_names or [f"f{i}" for i in range(len(self.shap_values))]
+        return {
+            "model_version": self.model_version,
+            "base_value": self.base_value,
+            "shap_values": dict(zip(names, self.shap_values.astype(float).tolist())),
+        }
+
+
+def feature_hash(features: np.ndarray) -> int:
+    """64-bit BLAKE2b hash of a feature vector (as float64 bytes)."""
+    data = np.ascontiguousarray(features, dtype=np.float64).tobytes()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class ExplanationCache:
+    """
+    Thread-safe LRU cache with per-entry TTL.
+
+    Example:
+        cache = ExplanationCache(max_entries=10_000, ttl=3600)
+        cache.put(("v1", h), explanation)
+        cache.get(("v1", h))
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: Optional[float] = 3600):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None = no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Cached value for ``key`` (None if missing or expired)."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or (self.ttl is not None and now - item[0] > self.ttl):
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Any, value: Any) -> None:
+        """Insert or refresh ``key``, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, predicate) -> int:
+        """Drop entries whose key satisfies ``predicate``."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Request:
+    version: str
+    features: np.ndarray
+    key: int
+    future: Future = field(default_factory=Future)
+
+
+class ExplanationEngine:
+    """
+    Micro-batching TreeSHAP service with warm explainers and a result cache.
+
+    Example:
+        engine = ExplanationEngine.from_config(config)
+        engine.register_model("v3", booster, feature_names)
+        with engine:
+            explanation = engine.explain("v3", x)
+            explanation.top_features(3)
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        cache_enabled: bool = True,
+        cache_ttl: Optional[float] = 3600,
+        cache_size: int = 10_000,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            max_batch_size: Requests explained per vectorized SHAP call
+            max_wait_ms: How long the first request of a batch waits for others
+            cache_enabled: Cache explanations per (model version, feature hash)
+            cache_ttl: Seconds a cached explanation stays valid
+            cache_size: Maximum cached explanations (LRU eviction beyond)
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache = ExplanationCache(cache_size, cache_ttl) if cache_enabled else None
+
+        self._explainers: Dict[str, Any] = {}
+        self._models: Dict[str, Any] = {}
+        self._feature_names: Dict[str, Optional[List[str]]] = {}
+        self._stores: Dict[str, Any] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "ExplanationEngine":
+        """Build an engine from the ``explainability.shap`` config block."""
+        shap_config = config.get("explainability", {}).get("shap", {})
+        explainer_type = shap_config.get("explainer_type", "tree")
+        if explainer_type != "tree":
+            raise ValueError(f"ExplanationEngine only supports tree explainers, not {explainer_type}")
+        kwargs.setdefault("cache_enabled", shap_config.get("cache_enabled", True))
+        kwargs.setdefault("cache_ttl", shap_config.get("cache_ttl", 3600))
+        return cls(**kwargs)
+
+    # MODEL VERSIONS
+
+    def register_model(self, version: str, model: Any, feature_names: Optional[List[str]] = None) -> None:
+        """
+        Build (and warm up) the TreeExplainer for a model version.
+
+        Args:
+            version: Model version identifier (``models.version``)
+            model: LightGBM booster/estimator or any tree model SHAP supports
+            feature_names: Names of the model's input features
+        """
+        import shap
+
+        explainer = shap.TreeExplainer(model)
+        if feature_names is None:
+            feature_names = _model_feature_names(model)
+        if feature_names is not None:
+            explainer.shap_values(np.zeros((1, len(feature_names))))  # warm-up
+        with self._lock:
+            self._explainers[version] = explainer
+            self._models[version] = model
+            self._feature_names[version] = feature_names
+        logger.info(f"✓ Registered TreeExplainer for model version {version}")
+
+    def unregister_model(self, version: str) -> None:
+        """Drop a retired model version and its cached explanations."""
+        with self._lock:
+            self._explainers.pop(version, None)
+            self._models.pop(version, None)
+            self._feature_names.pop(version, None)
+            self._stores.pop(version, None)
+        if self.cache is not None:
+            self.cache.evict(lambda key: key[0] == version)
+
+    def attach_store(self, version: str, store: Any) -> None:
+        """Serve lookups for ``version`` from a precomputed store first."""
+        with self._lock:
+            self._stores[version] = store
+
+    @property
+    def versions(self) -> List[str]:
+        return list(self._explainers)
+
+    # EXPLAIN
+
+    def submit(self, version: str, features: np.ndarray) -> Future:
+        """Queue one feature vector for explanation (cache hits resolve immediately)."""
+        if version not in self._explainers:
+            raise KeyError(f"Model version {version} is not registered")
+        features = np.asarray(features, dtype=np.float64).ravel()
+        request = _Request(version, features, feature_hash(features))
+
+        cached = self._cached(version, request.key)
+        if cached is not None:
+            request.future.set_result(cached)
+            return request.future
+
+        self._ensure_started()
+        self._queue.put(request)
+        return request.future
+
+    def explain(self, version: str, features: np.ndarray, timeout: Optional[float] = None) -> Explanation:
+        """Explain one feature vector, blocking until its batch is done."""
+        return self.submit(version, features).result(timeout=timeout)
+
+    def explain_batch(self, version: str, X: np.ndarray, cache: bool = True) -> List[Explanation]:
+        """
+        Explain many rows with one vectorized call, bypassing the queue.
+
+        Args:
+            version: Registered model version
+            X: Feature rows
+            cache: Read and fill the precomputed store and the result cache;
+                   offline jobs pass False so they neither evict online entries
+                   nor get them back
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if not cache:
+            return self._compute(version, X)
+        keys = [feature_hash(row) for row in X]
+        explanations: List[Optional[Explanation]] = [self._cached(version, key) for key in keys]
+        missing = [i for i, e in enumerate(explanations) if e is None]
+        if missing:
+            computed = self._compute(version, X[missing])
+            for i, explanation in zip(missing, computed):
+                explanations[i] = explanation
+                self._store(version, keys[i], explanation)
+        return explanations
+
+    def predict(self, version: str, X: np.ndarray) -> np.ndarray:
+        """Model output per row (positive-class probability for classifiers)."""
+        model = self._models.get(version)
+        if model is None:
+            raise KeyError(f"Model version {version} is not registered")
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if hasattr(model, "predict_proba"):
+            return np.asarray(model.predict_proba(X))[:, -1]
+        return np.asarray(model.predict(X)).reshape(len(X), -1)[:, -1]
+
+    # LIFECYCLE
+
+    def start(self) -> "ExplanationEngine":
+        """Start the batching thread (also started lazily by ``submit``)."""
+        self._ensure_started()
+        return self
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish queued requests and stop the batching thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "ExplanationEngine":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # INTERNALS
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="shap-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Collect requests for up to ``max_wait`` and explain them together."""
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stop = True
+                    break
+                batch.append(request)
+
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[_Request]) -> None:
+        by_version: Dict[str, List[_Request]] = {}
+        for request in batch:
+            by_version.setdefault(request.version, []).append(request)
+
+        for version, requests in by_version.items():
+            # Identical vectors in one batch are explained once
+            unique: Dict[int, np.ndarray] = {}
+            for request in requests:
+                unique.setdefault(request.key, request.features)
+            try:
+                computed = self._compute(version, np.vstack(list(unique.values())))
+            except Exception as e:
+                logger.error(f"SHAP batch for model version {version} failed: {e}")
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+
+            results = dict(zip(unique, computed))
+            for key, explanation in results.items():
+                self._store(version, key, explanation)
+            for request in requests:
+                request.future.set_result(results[request.key])
+
+    def _compute(self, version: str, X: np.ndarray) -> List[Explanation]:
+        explainer = self._explainers.get(version)
+        if explainer is None:
+            raise KeyError(f"Model version {version} is not registered")
+        values, base_value = _positive_class(explainer.shap_values(X), explainer.expected_value)
+        names = self._feature_names.get(version)
+        return [
+            Explanation(version, row.astype(np.float32), base_value, names)
+            for row in np.atleast_2d(values)
+        ]
+
+    def _cached(self, version: str, key: int) -> Optional[Explanation]:
+        store = self._stores.get(version)
+        if store is not None:
+            explanation = store.lookup(key)
+            if explanation is not None:
+                return explanation
+        if self.cache is None:
+            return None
+        explanation = self.cache.get((version, key))
+        if explanation is None:
+            return None
+        return Explanation(
+            explanation.model_version, explanation.shap_values,
+            explanation.base_value, explanation.feature_names, cached=True,
+        )
+
+    def _store(self, version: str, key: int, explanation: Explanation) -> None:
+        if self.cache is not None:
+            self.cache.put((version, key), explanation)
+
+
+def _positive_class(values: Any, expected_value: Any) -> Tuple[np.ndarray, float]:
+    """Normalize SHAP output of binary classifiers to the positive class."""
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values)
+    if values.ndim == 3:  # (rows, features, classes)
+        values = values[..., -1]
+    base = np.atleast_1d(np.asarray(expected_value, dtype=np.float64))
+    return values, float(base[-1])
+
+
+def _model_feature_names(model: Any) -> Optional[List[str]]:
+    if hasattr(model, "feature_name"):  # lightgbm.Booster
+        return list(model.feature_name())
+    if hasattr(model, "feature_name_"):  # lightgbm sklearn API
+        return list(model.feature_name_)
+    if hasattr(model, "feature_names_in_"):
+        return list(model.feature_names_in_)
+    return None
@@ -0,0 +1,301 @@
+"""
+Tiered explanations for XAE-Frame: approximate fast path, exact compliance path.
+
+Exact TreeSHAP cost grows with tree count and depth, so views that only need
+the main drivers (end user, business) are served from a cheaper approximation
+while the compliance view always gets exact values:
+
+    fast modes:
+        saabas        Path attribution along each tree's decision path: one
+                      ``pred_leaf`` call plus a sparse leaf x feature matrix
+                      product (``SaabasExplainer``)
+        pred_contrib  LightGBM's native C++ TreeSHAP (``predict(pred_contrib=True)``),
+                      exact before truncation
+    both optionally truncated to the ``top_k`` largest contributions
+
+A background sampler re-explains a fraction (``sample_rate``) of fast-path
+rows exactly and scores them with ``src/xai/explanation_accuracy.py``. When
+the rolling fidelity drops below ``threshold`` the explainer falls back to
+exact SHAP for every view, and returns to the fast path once a fresh window
+of samples is back above the threshold.
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .explanation_accuracy import FidelityTracker, explanation_fidelity, fidelity_scores
+
+logger = logging.getLogger(__name__)
+
+FAST_MODES = ["saabas", "pred_contrib"]
+
+# Views that must always receive exact SHAP values
+EXACT_VIEWS = {"compliance", "regulatory_compliance"}
+
+
+class TieredExplainer:
+    """
+    Fast approximate explanations with a monitored fidelity guarantee.
+
+    Example:
+        explainer = TieredExplainer.from_config(config, booster)
+        values, mode = explainer.explain(X, view="end_user")    # fast path
+        values, mode = explainer.explain(X, view="compliance")  # always exact
+        explainer.fidelity
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        fast_mode: str = "saabas",
+        top_k: Optional[int] = 10,
+        threshold: float = 0.90,
+        metric: str = "top_k_agreement",
+        metric_k: int = 5,
+        sample_rate: float = 0.01,
+        window_size: int = 500,
+        min_samples: int = 100,
+        seed: int = 42,
+    ):
+        """
+        Initialize explainer.
+
+        Args:
+            model: LightGBM booster (or estimator) to explain
+            fast_mode: "saabas" or "pred_contrib"
+            top_k: Keep only the k largest fast-path contributions (None = all)
+            threshold: Minimum rolling fidelity for the fast path
+            metric: Fidelity metric from ``explanation_accuracy``
+            metric_k: k used by the top-k fidelity metrics
+            sample_rate: Share of fast-path rows re-checked against exact SHAP
+            window_size: Rolling window of per-row fidelity scores
+            min_samples: Scores required before switching modes
+            seed: Seed of the sampling decisions
+        """
+        import shap
+
+        if fast_mode not in FAST_MODES:
+            raise ValueError(f"Unknown fast explanation mode: {fast_mode}")
+        self.model = model
+        self.booster = getattr(model, "booster_", model)
+        self.fast_mode = fast_mode
+        self.top_k = top_k
+        self.threshold = threshold
+        self.metric = metric
+        self.metric_k = metric_k
+        self.sample_rate = sample_rate
+        self.min_samples = min_samples
+
+        self.explainer = shap.TreeExplainer(model)
+        self.saabas = SaabasExplainer(self.booster) if fast_mode == "saabas" else None
+        self.tracker = FidelityTracker(window_size)
+        self.degraded = False
+
+        self._rng = np.random.default_rng(seed)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], model: Any, **kwargs: Any) -> "TieredExplainer":
+        """Build an explainer from the ``explainability.fidelity`` config block."""
+        fidelity = config.get("explainability", {}).get("fidelity", {})
+        for key in ("fast_mode", "top_k", "threshold", "metric", "sample_rate", "window_size", "min_samples"):
+            if key in fidelity:
+                kwargs.setdefault(key, fidelity[key])
+        return cls(model, **kwargs)
+
+    # EXPLAIN
+
+    def explain(self, X: np.ndarray, view: str = "end_user") -> Tuple[np.ndarray, str]:
+        """
+        Attributions for ``X`` at the tier appropriate for ``view``.
+
+        Returns:
+            (values of shape (n_rows, n_features), mode used: "exact" or the fast mode)
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if view in EXACT_VIEWS or self.degraded:
+            values = self.exact(X)
+            if self.degraded:
+                self._sample(X)  # keep measuring so the fast path can recover
+            return values, "exact"
+
+        values = self.fast(X)
+        self._sample(X)
+        return values, self.fast_mode
+
+    def exact(self, X: np.ndarray) -> np.ndarray:
+        """Exact TreeSHAP values (positive class for binary classifiers)."""
+        values = self.explainer.shap_values(X)
+        return _positive_class(values)
+
+    def fast(self, X: np.ndarray) -> np.ndarray:
+        """Approximate attributions, truncated to ``top_k`` per row."""
+        if self.fast_mode == "saabas":
+            values = self.saabas.shap_values(X)
+        else:
+            values = self.booster.predict(X, pred_contrib=True)[:, :-1]
+        return _truncate(values, self.top_k)
+
+    @property
+    def expected_value(self) -> float:
+        return float(np.atleast_1d(self.explainer.expected_value)[-1])
+
+    @property
+    def fidelity(self) -> Optional[float]:
+        """Rolling fidelity of the fast path (None before enough samples)."""
+        return self.tracker.mean
+
+    def evaluate(self, X: np.ndarray) -> Dict[str, float]:
+        """All fidelity metrics of the fast path on ``X`` (offline check)."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        return explanation_fidelity(self.fast(X), self.exact(X), self.metric_k)
+
+    # FIDELITY SAMPLER
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the background sampler."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _sample(self, X: np.ndarray) -> None:
+        if self.sample_rate <= 0:
+            return
+        mask = self._rng.random(len(X)) < self.sample_rate
+        if not mask.any():
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(X[mask])
+        except queue.Full:
+            pass  # the sampler is behind; skipping samples never blocks requests
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="fidelity-sampler", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            X = self._queue.get()
+            if X is None:
+                return
+            try:
+                self.check(X)
+            except Exception as e:
+                logger.error(f"Fidelity check failed: {e}")
+
+    def check(self, X: np.ndarray) -> Optional[float]:
+        """Score the fast path on ``X`` against exact SHAP and update the tier."""
+        scores = fidelity_scores(self.fast(X), self.exact(X), self.metric, self.metric_k)
+        self.tracker.update(scores)
+
+        fidelity = self.tracker.mean
+        if len(self.tracker) < self.min_samples or fidelity is None:
+            return fidelity
+
+        if not self.degraded and fidelity < self.threshold:
+            self.degraded = True
+            self.tracker.reset()  # recovery needs a fresh window
+            logger.warning(
+                f"Fast-path {self.metric} {fidelity:.3f} below {self.threshold:.2f}; "
+                f"serving exact TreeSHAP"
+            )
+        elif self.degraded and fidelity >= self.threshold:
+            self.degraded = False
+            logger.info(f"✓ Fast-path {self.metric} recovered to {fidelity:.3f}; fast path re-enabled")
+        return fidelity
+
+
+class SaabasExplainer:
+    """
+    Saabas path attributions for a LightGBM booster.
+
+    Each leaf's output is split along its decision path: every split credits
+    its feature with the change in node value from parent to child. The
+    per-leaf credits are precomputed into a sparse (trees x leaves, features)
+    matrix, so explaining a batch is one ``pred_leaf`` call and one sparse
+    product. Attributions sum to the raw model output minus ``expected_value``.
+    """
+
+    def __init__(self, booster: Any):
+        """Precompute per-leaf path credits from the booster's tree dump."""
+        dump = booster.dump_model()
+        if dump.get("num_tree_per_iteration", 1) != 1:
+            raise ValueError("SaabasExplainer supports single-output models only")
+        self.booster = booster
+        self.n_features = dump["max_feature_idx"] + 1
+        trees = [tree["tree_structure"] for tree in dump["tree_info"]]
+        self.n_leaves = max(_count_leaves(tree) for tree in trees)
+
+        rows, cols, data = [], [], []
+        expected_value = 0.0
+        for t, tree in enumerate(trees):
+            if "leaf_index" in tree:  # single-leaf tree: constant output
+                expected_value += tree["leaf_value"]
+                continue
+            expected_value += tree["internal_value"]
+            stack = [(tree, [])]
+            while stack:
+                node, credits = stack.pop()
+                if "leaf_index" in node:
+                    for feature, delta in credits:
+                        rows.append(t * self.n_leaves + node["leaf_index"])
+                        cols.append(feature)
+                        data.append(delta)
+                    continue
+                for side in ("left_child", "right_child"):
+                    child = node[side]
+                    value = child["leaf_value"] if "leaf_index" in child else child["internal_value"]
+                    stack.append((child, credits + [(node["split_feature"], value - node["internal_value"])]))
+
+        self.expected_value = expected_value
+        self.n_trees = len(trees)
+        # Duplicate (leaf, feature) entries are summed on conversion
+        self._credits = sp.csr_matrix(
+            (data, (rows, cols)), shape=(self.n_trees * self.n_leaves, self.n_features)
+        )
+
+    def shap_values(self, X: np.ndarray) -> np.ndarray:
+        """Saabas attributions of shape (n_rows, n_features)."""
+        leaves = np.asarray(self.booster.predict(X, pred_leaf=True), dtype=np.int64).reshape(len(X), -1)
+        indices = (leaves + np.arange(self.n_trees) * self.n_leaves).ravel()
+        indicator = sp.csr_matrix(
+            (np.ones(len(indices)), indices, np.arange(0, len(indices) + 1, self.n_trees)),
+            shape=(len(X), self.n_trees * self.n_leaves),
+        )
+        return np.asarray((indicator @ self._credits).todense())
+
+
+def _count_leaves(node: Dict[str, Any]) -> int:
+    if "leaf_index" in node:
+        return 1
+    return _count_leaves(node["left_child"]) + _count_leaves(node["right_child"])
+
+
+def _positive_class(values: Any) -> np.ndarray:
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values)
+    if values.ndim == 3:  # (rows, features, classes)
+        values = values[..., -1]
+    return values
+
+
+def _truncate(values: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+    """Zero all but the ``top_k`` largest absolute contributions per row."""
+    if top_k is None or top_k >= values.shape[1]:
+        return values
+    drop = np.argpartition(-np.abs(values), top_k, axis=1)[:, top_k:]
+    values = values.copy()
+    np.put_along_axis(values, drop, 0.0, axis=1)
+    return values
@@ -0,0 +1,20 @@
+"""Shared pytest fixtures for XAE-Frame."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """File-backed SQLite database with every XAE-Frame table."""
+    from init_db import init_database
+
+    engine = init_database(f"sqlite:///{tmp_path / 'xae.db'}")
+    yield engine
+    engine.dispose()
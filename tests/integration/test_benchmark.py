@@ -0,0 +1,27 @@
+"""Tests for scripts/benchmark.py."""
+
+import benchmark
+from src.utils.config import load_config
+
+
+def test_stages_report_untraced_timings_and_traced_peak():
+    config = load_config("e_commerce")
+    config["model"]["lightgbm"]["n_estimators"] = 5
+    results = benchmark.PipelineBenchmark(config, n_rows=5_000, latency_samples=10, shap_rows=100).run()
+
+    assert list(results) == benchmark.STAGES
+    for metrics in results.values():
+        assert metrics["seconds"] > 0
+        assert metrics["peak_traced_mb"] >= 0
+    assert 0.0 <= results["fairness"]["disparate_impact"] <= 1.0
+
+    untraced = benchmark.PipelineBenchmark(config, n_rows=5_000, stages=["drift"], trace_memory=False).run()
+    assert list(untraced) == ["drift"]
+    assert "peak_traced_mb" not in untraced["drift"]
+
+
+def test_compare_flags_regressions_only_beyond_threshold():
+    baseline = {"results": {"1000": {"train": {"seconds": 1.0, "peak_rss_mb": 100.0}}}}
+    current = {"results": {"1000": {"train": {"seconds": 1.05, "peak_rss_mb": 150.0, "peak_traced_mb": 3.0}}}}
+    rows = benchmark.compare_results(baseline, current, threshold=0.10)
+    assert {row["metric"]: row["regression"] for row in rows} == {"seconds": False, "peak_rss_mb": True}
@@ -0,0 +1,48 @@
+"""Tests for the partition retention of scripts/init_db.py (PostgreSQL with DATABASE_URL)."""
+
+import os
+from datetime import datetime
+
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import text
+
+POSTGRES_URL = os.environ.get("DATABASE_URL", "")
+pytestmark = pytest.mark.skipif(
+    not POSTGRES_URL.startswith("postgresql"), reason="DATABASE_URL does not point at PostgreSQL"
+)
+
+
+@pytest.fixture
+def engine():
+    from init_db import init_database
+
+    engine = init_database(POSTGRES_URL)
+    yield engine
+    engine.dispose()
+
+
+def test_archive_covers_the_default_partition(engine, tmp_path):
+    import init_db
+
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO predictions (model_id, user_id, prediction, timestamp) VALUES "
+            "(1, 'old-a', 0.1, '2001-02-03'), (1, 'old-b', 0.2, '2001-02-20'), (1, 'old-c', 0.3, '2001-05-01'), "
+            "(1, 'hot', 0.4, :now)"
+        ), {"now": now})
+
+    archived = init_db.archive_partitions(engine, archive_dir=tmp_path, now=now)
+
+    names = {path.name for path in archived}
+    assert {"predictions_y2001m02.parquet", "predictions_y2001m05.parquet"} <= names
+    users = pq.read_table(tmp_path / "predictions" / "predictions_y2001m02.parquet").column("user_id").to_pylist()
+    assert sorted(users) == ["old-a", "old-b"]
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM predictions_default")).scalar() == 0
+        assert connection.execute(text("SELECT to_regclass('predictions_y2001m02')")).scalar() is None
+        hot = connection.execute(text("SELECT COUNT(*) FROM predictions WHERE user_id = 'hot'")).scalar()
+        connection.execute(text("DELETE FROM predictions WHERE user_id = 'hot'"))
+        connection.commit()
+    assert hot == 1
@@ -0,0 +1,249 @@
+"""Tests for src/utils/migrations.py and scripts/migrate.py (SQLite; PostgreSQL with DATABASE_URL)."""
+
+import os
+import random
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, insert, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from migrate import MIGRATIONS
+from src.adaptive.scheduler import MODELS_TABLE
+from src.utils.migrations import Migration, MigrationRunner
+from src.utils.vector_codec import VectorCodec, with_feature_schema
+
+FEATURES = ["price", "rating"]
+
+POSTGRES_URL = os.environ.get("DATABASE_URL", "")
+requires_postgres = pytest.mark.skipif(
+    not POSTGRES_URL.startswith("postgresql"), reason="DATABASE_URL does not point at PostgreSQL"
+)
+
+
+@pytest.fixture(params=["sqlite", pytest.param("postgresql", marks=requires_postgres)])
+def engine(request, tmp_path):
+    """Database with every XAE-Frame table, on SQLite or on the PostgreSQL in DATABASE_URL."""
+    from init_db import init_database
+
+    url = f"sqlite:///{tmp_path / 'xae.db'}" if request.param == "sqlite" else POSTGRES_URL
+    engine = init_database(url)
+    yield engine
+    engine.dispose()
+
+
+def _legacy_predictions(engine):
+    """Replace predictions by its pre-0001 shape (JSON columns only) holding a few rows."""
+    codec_config = with_feature_schema({}, FEATURES)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE predictions"))
+        connection.execute(text(
+            "CREATE TABLE predictions (id INTEGER PRIMARY KEY, model_id INTEGER NOT NULL, "
+            "user_id VARCHAR(255), prediction FLOAT, timestamp DATETIME, features JSON, explanation JSON)"
+        ))
+        connection.execute(insert(MODELS_TABLE).values(id=1, name="m", version="e_commerce-v0001",
+                                                       config=codec_config))
+        connection.execute(text(
+            "INSERT INTO predictions (id, model_id, user_id, prediction, features, explanation) VALUES "
+            "(1, 1, 'u1', 0.5, '{\"price\": 10.0, \"rating\": 4.5}', '{\"price\": 0.25, \"rating\": -0.5}'), "
+            "(2, 1, 'u2', 0.7, '{\"price\": 12.0, \"rating\": 3.0}', "
+            "'{\"shap_values\": [0.125, 0.5], \"base_value\": 0.375}'), "
+            "(3, 2, 'u3', 0.1, '{\"price\": 1.0}', NULL), "
+            "(4, 1, 'u4', 0.2, NULL, NULL)"
+        ))
+
+
+# SCRIPTS/MIGRATE.PY
+
+def test_fresh_database_records_every_migration(engine):
+    runner = MigrationRunner(engine, MIGRATIONS, sleep=0)
+    runner.upgrade()
+    assert {row["state"] for row in runner.status()} == {"applied"}
+    assert runner.upgrade() == []
+
+
+def test_upgrade_legacy_predictions(sqlite_engine):
+    _legacy_predictions(sqlite_engine)
+    runner = MigrationRunner(sqlite_engine, MIGRATIONS, batch_size=2, sleep=0)
+
+    assert runner.upgrade(target="0002", dry_run=True) == ["0001", "0002"]
+    assert runner.upgrade(target="0002") == ["0001", "0002"]
+    assert [row["state"] for row in runner.status()] == ["applied", "applied", "pending", "pending"]
+
+    with sqlite_engine.connect() as connection:
+        rows = {row.id: row for row in connection.execute(text(
+            "SELECT id, features_blob, explanation_blob FROM predictions"
+        ))}
+    codec = VectorCodec(FEATURES)
+    assert codec.decode(rows[1].features_blob) == {"price": 10.0, "rating": 4.5}
+    assert codec.decode_explanation(rows[1].explanation_blob) == ({"price": 0.25, "rating": -0.5}, None)
+    assert codec.decode_explanation(rows[2].explanation_blob) == ({"price": 0.125, "rating": 0.5}, 0.375)
+    assert rows[3].features_blob is None  # model 2 has no feature schema: JSON only
+    assert rows[4].features_blob is None and rows[4].explanation_blob is None
+
+    assert runner.upgrade() == ["0003", "0004"]
+    indexes = {ix["name"] for ix in inspect(sqlite_engine).get_indexes("predictions")}
+    assert "ix_predictions_model_id_timestamp" in indexes
+    assert runner.upgrade() == []
+
+
+def test_backfill_resumes_from_checkpoint(sqlite_engine):
+    _legacy_predictions(sqlite_engine)
+    seen = []
+
+    def transform(rows):
+        seen.extend(row["id"] for row in rows)
+        if len(seen) == 2:
+            raise RuntimeError("interrupted")
+        return [{"id": row["id"], "prediction": 1.0} for row in rows]
+
+    migrations = [Migration("0001", "Set predictions",
+                            lambda ctx: ctx.backfill("predictions", ["model_id"], transform))]
+    runner = MigrationRunner(sqlite_engine, migrations, batch_size=1, sleep=0)
+    with pytest.raises(RuntimeError):
+        runner.upgrade()
+    assert [row["state"] for row in runner.status()] == ["in_progress"]
+
+    assert runner.upgrade() == ["0001"]
+    assert seen == [1, 2, 2, 3, 4]  # the failed batch is retried, the committed one is not
+    with sqlite_engine.connect() as connection:
+        assert connection.execute(text("SELECT MIN(prediction) FROM predictions")).scalar() == 1.0
+
+
+# REBUILD UNDER CONCURRENT WRITES
+
+class _Writer(threading.Thread):
+    """Inserts, updates and deletes rows of ``table`` until stopped; ``expected`` mirrors them."""
+
+    def __init__(self, engine, table: str, expected: dict, next_id: int):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.table = table
+        self.expected = expected
+        self.next_id = next_id
+        self.stop = threading.Event()
+        self.writes = 0
+        self.error = None
+
+    def run(self):
+        rng = random.Random(0)
+        try:
+            while not self.stop.is_set():
+                action = rng.choice(["insert", "update", "delete"])
+                try:
+                    with self.engine.begin() as connection:
+                        if action == "insert":
+                            row_id, value = self.next_id, rng.random()
+                            connection.execute(text(f"INSERT INTO {self.table} (id, value, label) "
+                                                    f"VALUES (:id, :value, 'new')"), {"id": row_id, "value": value})
+                        else:
+                            row_id = rng.choice(list(self.expected))
+                            if action == "update":
+                                value = rng.random()
+                                connection.execute(text(f"UPDATE {self.table} SET value = :value WHERE id = :id"),
+                                                   {"id": row_id, "value": value})
+                            else:
+                                connection.execute(text(f"DELETE FROM {self.table} WHERE id = :id"), {"id": row_id})
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    continue  # lock timeout during the swap: nothing was committed
+                if action == "insert":
+                    self.next_id += 1
+                    self.expected[row_id] = value
+                elif action == "update":
+                    self.expected[row_id] = value
+                else:
+                    del self.expected[row_id]
+                self.writes += 1
+                self.stop.wait(0.001)  # live traffic, not a busy loop that starves the migration's lock waits
+        except Exception as e:  # surfaced by the test
+            self.error = e
+
+
+def test_rebuild_table_keeps_concurrent_writes(engine):
+    name = f"events_{uuid.uuid4().hex[:8]}"
+    source = Table(name, MetaData(), Column("id", Integer, primary_key=True),
+                   Column("value", Float), Column("label", String(20)))
+    target = Table(name, MetaData(), Column("id", Integer, primary_key=True),
+                   Column("value", Float), Column("label", String(20)), Column("score", Float),
+                   Index(f"ix_{name}_value", "value"))
+    source.create(engine)
+
+    expected = {i: i / 3000 for i in range(1, 3001)}
+    with engine.begin() as connection:
+        connection.execute(insert(source), [{"id": i, "value": v, "label": "old"} for i, v in expected.items()])
+
+    writer = _Writer(engine, name, expected, next_id=3001)
+
+    def start_writes(_ctx, _new_name):
+        writer.start()  # writes overlap the trigger install, the batch copy and the swap
+
+    migration = Migration("9001", "Rebuild events", lambda ctx: ctx.rebuild_table(target, before_copy=start_writes))
+    try:
+        MigrationRunner(engine, [migration], batch_size=200, sleep=0.005).upgrade()
+        writer.stop.set()
+        writer.join(timeout=30)
+        assert writer.error is None
+        assert writer.writes > 0
+
+        with engine.connect() as connection:
+            rows = {row.id: row.value for row in connection.execute(text(f"SELECT id, value FROM {name}"))}
+            assert connection.execute(text(f"SELECT COUNT(*) FROM {name} WHERE score IS NOT NULL")).scalar() == 0
+        assert rows == pytest.approx(expected)
+        assert {c["name"] for c in inspect(engine).get_columns(name)} == {"id", "value", "label", "score"}
+        assert f"ix_{name}_value" in {ix["name"] for ix in inspect(engine).get_indexes(name)}
+        assert not inspect(engine).has_table(f"{name}__new")
+        assert not inspect(engine).has_table(f"{name}__old")
+    finally:
+        writer.stop.set()
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            connection.execute(text("DELETE FROM schema_migrations WHERE version = '9001'"))
+
+
+def test_writes_overlapping_a_copy_batch_are_applied(engine):
+    name = f"events_{uuid.uuid4().hex[:8]}"
+    source = Table(name, MetaData(), Column("id", Integer, primary_key=True), Column("value", Float))
+    target = Table(name, MetaData(), Column("id", Integer, primary_key=True), Column("value", Float),
+                   Column("score", Float))
+    source.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(source), [{"id": i, "value": float(i)} for i in range(1, 31)])
+
+    def write(statement):
+        with engine.begin() as connection:
+            connection.execute(text(statement))
+
+    migration = Migration("9002", "Rebuild events", lambda ctx: ctx.rebuild_table(target))
+    runner = MigrationRunner(engine, [migration], batch_size=10, sleep=0)
+    save_checkpoint = runner.save_checkpoint
+    writers = []
+
+    def overlap_first_batch(version, checkpoint, value, connection):
+        # Runs inside the uncommitted copy batch of rows 1-10: both writes wait for it to commit
+        if not writers:
+            writers.extend(threading.Thread(target=write, args=(statement,)) for statement in (
+                f"UPDATE {name} SET value = -1 WHERE id = 5", f"DELETE FROM {name} WHERE id = 7",
+            ))
+            for writer in writers:
+                writer.start()
+            time.sleep(0.5)
+        save_checkpoint(version, checkpoint, value, connection)
+
+    runner.save_checkpoint = overlap_first_batch
+    try:
+        runner.upgrade()
+        for writer in writers:
+            writer.join(timeout=30)
+        with engine.connect() as connection:
+            rows = {row.id: row.value for row in connection.execute(text(f"SELECT id, value FROM {name}"))}
+        assert rows[5] == -1.0  # the update is not lost to the copied row
+        assert 7 not in rows  # the delete does not come back after the swap
+        assert len(rows) == 29
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            connection.execute(text("DELETE FROM schema_migrations WHERE version = '9002'"))
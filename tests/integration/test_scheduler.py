@@ -0,0 +1,87 @@
+"""Tests for src/adaptive/scheduler.py on SQLite."""
+
+import numpy as np
+from sqlalchemy import select
+
+from src.adaptive.model_registry import FilesystemRegistry
+from src.adaptive.retraining_strategy import TrainingData
+from src.adaptive.scheduler import MODELS_TABLE, JobData, RetrainJob, RetrainScheduler
+from src.utils.vector_codec import VectorCodec
+
+CONFIG = {
+    "model": {"lightgbm": {"n_estimators": 20, "learning_rate": 0.1, "n_jobs": -1}},
+    "adaptive": {"retraining": {"incremental": True, "metric": "rmse", "incremental_rounds": 5}},
+}
+
+
+def load_data(domain, config):
+    """Module-level (picklable) loader: a noisy linear target, drift from the config."""
+    rng = np.random.default_rng(len(domain))
+    X = rng.normal(size=(600, 4))
+    y = X @ np.array([1.0, -2.0, 0.5, 0.0]) + rng.normal(scale=0.1, size=600)
+    return JobData(
+        holdout=TrainingData(X[500:], y[500:]),
+        new_data=TrainingData(X[400:500], y[400:500]),
+        full_data=TrainingData(X[:500], y[:500]),
+        drift=config.get("drift"),
+    )
+
+
+def _jobs(drift=None):
+    return [RetrainJob(domain, load_data, config={**CONFIG, "drift": drift}) for domain in ("e_commerce", "finance")]
+
+
+def test_retrain_promote_and_conclude(tmp_path, sqlite_engine):
+    registry = FilesystemRegistry(tmp_path / "registry")
+    scheduler = RetrainScheduler(registry, engine=sqlite_engine, cpu_budget=2, max_workers=2, min_improvement=-1.0)
+
+    first = {result.domain: result for result in scheduler.run(_jobs())}
+    assert {result.status for result in first.values()} == {"promoted"}
+    assert {result.mode for result in first.values()} == {"full"}
+
+    second = {result.domain: result for result in scheduler.run(_jobs(drift=0.1))}
+    assert second["finance"].status == "challenger"
+    assert second["finance"].mode == "incremental"
+    assert second["finance"].retrain["rounds_added"] == 5
+    assert registry.challenger("finance") == "v0002"
+
+    assert scheduler.conclude("finance", champion_value=0.030, challenger_value=0.034) == "v0002"
+    assert scheduler.rollback("e_commerce") == "v0001"
+
+    with sqlite_engine.connect() as connection:
+        rows = connection.execute(
+            select(MODELS_TABLE.c.domain, MODELS_TABLE.c.version, MODELS_TABLE.c.is_active, MODELS_TABLE.c.config)
+        ).all()
+    versions = [row.version for row in rows]
+    assert len(versions) == len(set(versions)) == 4
+    assert {row.version for row in rows if row.is_active} >= {"finance-v0002"}
+    assert not any(row.is_active for row in rows if row.version == "finance-v0001")
+    # Every model row carries the feature schema its predictions are packed with
+    for row in rows:
+        assert VectorCodec.from_model_config(row.config).feature_names == [f"Column_{i}" for i in range(4)]
+
+
+def test_failed_job_does_not_stop_others(tmp_path, sqlite_engine):
+    registry = FilesystemRegistry(tmp_path / "registry")
+    scheduler = RetrainScheduler(registry, engine=sqlite_engine, cpu_budget=1)
+    jobs = _jobs()
+    jobs[0].config = {**CONFIG, "model": {"lightgbm": {"objective": "not-an-objective"}}}
+
+    results = {result.domain: result for result in scheduler.run(jobs)}
+    assert results["e_commerce"].status == "failed"
+    assert results["finance"].status == "promoted"
+
+
+def test_running_challenger_test_is_not_replaced(tmp_path, sqlite_engine):
+    registry = FilesystemRegistry(tmp_path / "registry")
+    scheduler = RetrainScheduler(registry, engine=sqlite_engine, cpu_budget=1, min_improvement=-1.0)
+    finance = _jobs(drift=0.1)[1:]
+
+    assert [result.status for result in scheduler.run(finance)] == ["promoted"]
+    assert [result.status for result in scheduler.run(finance)] == ["challenger"]
+    (third,) = scheduler.run(finance)
+
+    assert third.status == "rejected"
+    assert "challenger v0002 still under test" in third.reasons
+    assert registry.challenger("finance") == "v0002"
+    assert registry.champion("finance") == "v0001"
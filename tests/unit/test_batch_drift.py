@@ -0,0 +1,83 @@
+"""Tests for src/adaptive/batch_drift.py."""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from scipy import stats
+
+from src.adaptive.batch_drift import BatchDriftTester, adjust_pvalues, ks_dense, ks_sparse
+
+NAMES = [f"f{i}" for i in range(6)]
+
+
+def _shifted(rng, n, shift=0.0, density=None):
+    X = rng.normal(size=(n, len(NAMES))) + shift * (np.arange(len(NAMES)) % 2)
+    if density is not None:
+        X[rng.random(X.shape) > density] = 0.0
+    return X
+
+
+def test_ks_dense_matches_scipy():
+    rng = np.random.default_rng(0)
+    reference, current = _shifted(rng, 2_000), _shifted(rng, 700, shift=0.2)
+    reference[rng.random(reference.shape) < 0.05] = np.nan
+    current[:, 2] = np.round(current[:, 2])  # ties
+
+    statistics, n_ref, _ = ks_dense(reference, current, chunk_columns=4)
+    for j in range(len(NAMES)):
+        ref = reference[:, j][~np.isnan(reference[:, j])]
+        assert statistics[j] == pytest.approx(stats.ks_2samp(ref, current[:, j]).statistic)
+        assert n_ref[j] == len(ref)
+
+
+def test_ks_sparse_matches_dense():
+    rng = np.random.default_rng(1)
+    reference = _shifted(rng, 1_500, density=0.2)
+    current = _shifted(rng, 500, shift=0.5, density=0.3)
+    current[:, 0] = np.abs(current[:, 0])  # no negative values in one column
+
+    sparse_stats, _, _ = ks_sparse(sp.csr_matrix(reference), sp.csr_matrix(current))
+    dense_stats, _, _ = ks_dense(reference, current)
+    np.testing.assert_allclose(sparse_stats, dense_stats, atol=1e-12)
+
+
+def test_benjamini_hochberg_and_bonferroni():
+    p = np.array([0.01, 0.04, np.nan, 0.03, 0.2])
+    np.testing.assert_allclose(adjust_pvalues(p, "bh"), [0.04, 0.16 / 3, np.nan, 0.16 / 3, 0.2])
+    np.testing.assert_allclose(adjust_pvalues(p, "bonferroni"), [0.04, 0.16, np.nan, 0.12, 0.8])
+
+
+@pytest.mark.parametrize("reference_sparse, current_sparse", [(True, False), (False, True), (True, True)])
+def test_scan_accepts_mixed_representations(reference_sparse, current_sparse):
+    rng = np.random.default_rng(2)
+    reference = _shifted(rng, 3_000, density=0.5)
+    current = _shifted(rng, 1_000, shift=1.0, density=0.5)
+    as_input = lambda X, sparse: sp.csr_matrix(X) if sparse else X  # noqa: E731
+
+    tester = BatchDriftTester(NAMES).fit_reference(as_input(reference, reference_sparse))
+    scan = tester.scan(as_input(current, current_sparse))["all"]
+    assert scan.drifted.tolist() == [False, True] * 3
+    np.testing.assert_allclose(scan.statistic, ks_dense(reference, current)[0], atol=1e-12)
+
+
+def test_dense_window_with_nan_against_sparse_reference_is_rejected():
+    rng = np.random.default_rng(3)
+    tester = BatchDriftTester(NAMES).fit_reference(sp.csr_matrix(_shifted(rng, 200, density=0.5)))
+    current = _shifted(rng, 100)
+    current[0, 0] = np.nan
+    with pytest.raises(ValueError, match="NaN"):
+        tester.scan(current)
+
+
+def test_segment_scans():
+    rng = np.random.default_rng(4)
+    reference, current = _shifted(rng, 2_000), _shifted(rng, 1_000)
+    ref_devices = rng.choice(["mobile", "desktop"], len(reference))
+    devices = rng.choice(["mobile", "desktop", "tv"], len(current), p=[0.49, 0.49, 0.02])
+    current[devices == "mobile", 1] += 1.0
+
+    tester = BatchDriftTester(NAMES).fit_reference(reference, groups={"device_type": ref_devices})
+    scans = tester.scan(current, groups={"device_type": devices})
+    assert set(scans) == {"all", "device_type=mobile", "device_type=desktop"}
+    assert scans["device_type=mobile"].drifted[1]
+    assert not scans["device_type=desktop"].drifted.any()
@@ -0,0 +1,40 @@
+"""Tests for src/data/cache.py."""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data.cache import DatasetCache
+
+INPUTS = {"source": "synthetic", "sample_size": 3, "seed": 42}
+
+
+def _commit(cache, output, values):
+    with cache.staging(output) as tmp:
+        pq.write_table(pa.table({"x": values}), tmp)
+        return cache.commit(INPUTS, tmp, output)
+
+
+def test_restore_is_a_noop_for_a_linked_output(tmp_path):
+    cache = DatasetCache(tmp_path)
+    output = tmp_path / "dataset.parquet"
+    entry = _commit(cache, output, [1, 2, 3])
+    inode = output.stat().st_ino
+
+    assert cache.restore(INPUTS, output) == entry
+    assert output.stat().st_ino == inode
+    assert cache.restore({**INPUTS, "seed": 0}, output) is None
+
+
+def test_restore_replaces_a_same_size_file_with_other_content(tmp_path):
+    cache = DatasetCache(tmp_path)
+    output = tmp_path / "dataset.parquet"
+    _commit(cache, output, [1, 2, 3])
+
+    expected = output.read_bytes()
+    output.unlink()
+    pq.write_table(pa.table({"x": [7, 8, 9]}), output)
+    assert output.stat().st_size == len(expected)
+
+    cache.restore(INPUTS, output)
+    assert output.read_bytes() == expected
+    assert pq.read_table(output).column("x").to_pylist() == [1, 2, 3]
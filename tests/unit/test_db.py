@@ -0,0 +1,99 @@
+"""Tests for src/utils/db.py."""
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import exc, text
+
+from src.utils import db
+
+
+@pytest.fixture
+def url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+def test_pool_config_splits_the_connection_budget():
+    config = {"database": {"max_connections": 40, "pool": {"pool_size": 10, "max_overflow": 20, "unknown": 1}},
+              "api": {"workers": 4}}
+    settings = db.pool_config(config)
+    assert settings["pool_size"] + settings["max_overflow"] == 10
+    assert settings["pool_size"] == 10 and "unknown" not in settings
+    assert db.pool_config({}) == db.DEFAULT_POOL
+
+
+def test_metrics_count_overflow_and_timeouts(url):
+    engine = db.create_pooled_engine(url, pool_size=1, max_overflow=1, pool_timeout=0.1)
+    first = engine.connect()
+    second = engine.connect()  # overflow connection
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+
+    metrics = db.pool_metrics(engine)
+    assert metrics["pool"] == "InstrumentedQueuePool"
+    assert metrics["checkouts"] == metrics["checkins"] == 2
+    assert metrics["overflow_events"] == 1
+    assert metrics["timeouts"] == 1
+    assert metrics["peak_checked_out"] == 2
+
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert db.pool_metrics(engine)["checkouts"] == 3  # counters survive dispose
+    engine.dispose()
+
+
+def test_memory_database_is_shared_across_threads():
+    engine = db.create_pooled_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    def insert():
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO t VALUES (1)"))
+
+    thread = threading.Thread(target=insert)
+    thread.start()
+    thread.join()
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM t")).scalar() == 1
+
+
+def test_registry_and_session_scope(url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", url)
+    try:
+        engine = db.get_engine()
+        assert db.get_engine(url) is engine
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (x INTEGER)"))
+
+        with db.session_scope() as session:
+            session.execute(text("INSERT INTO t VALUES (1)"))
+        with pytest.raises(RuntimeError):
+            with db.session_scope(engine) as session:
+                session.execute(text("INSERT INTO t VALUES (2)"))
+                raise RuntimeError("rolled back")
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT x FROM t")).scalars().all() == [1]
+    finally:
+        db.dispose_engines()
+    assert db.get_engine(url) is not engine
+    db.dispose_engines()
+
+
+def test_async_engine(url):
+    pytest.importorskip("aiosqlite")
+
+    async def run():
+        engine = db.create_async_pooled_engine(url, pool_size=2)  # switched to aiosqlite
+        async with db.async_session_scope(engine) as session:
+            value = (await session.execute(text("SELECT 41 + 1"))).scalar()
+        await engine.dispose()
+        return value, db.pool_metrics(engine)
+
+    value, metrics = asyncio.run(run())
+    assert value == 42
+    assert metrics["pool"] == "InstrumentedAsyncQueuePool" and metrics["checkouts"] == 1
@@ -0,0 +1,146 @@
+"""Tests for scripts/download_data.py (offline source directory)."""
+
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from download_data import DataDownloader
+
+N_REVIEWS = 1_000
+
+
+def _write_source(source_dir, n_rows=N_REVIEWS, config_name="raw_review_Test"):
+    """An Amazon-shaped source config split in two parquet files."""
+    root = source_dir / config_name
+    root.mkdir(parents=True)
+    ids = np.arange(n_rows)
+    table = pa.table({
+        "row": ids,
+        "user_id": [f"u{i % 97}" for i in ids],
+        "parent_asin": [f"B{i % 31:04d}" for i in ids],
+        "rating": (ids % 5 + 1).astype("float64"),
+        "timestamp": 1_650_000_000_000 + ids * 86_400_000,
+    })
+    pq.write_table(table.slice(0, n_rows // 2), root / "part-0.parquet")
+    pq.write_table(table.slice(n_rows // 2), root / "part-1.parquet")
+    return table
+
+
+def _downloader(tmp_path, **kwargs):
+    kwargs.setdefault("batch_size", 64)
+    return DataDownloader(
+        data_dir=str(tmp_path / "raw"), source_dir=str(tmp_path / "source"), partitioned=False, **kwargs
+    )
+
+
+def test_full_stream_matches_source(tmp_path):
+    source = _write_source(tmp_path / "source")
+    path = _downloader(tmp_path, row_group_size=100).download_amazon_reviews("Test", include_metadata=False)
+
+    written = pq.ParquetFile(path)
+    assert written.metadata.num_row_groups > 1
+    assert written.read().equals(source)
+    assert (tmp_path / "raw" / "vocab").exists()
+
+
+@pytest.mark.parametrize("sample_size", [None, 10])
+def test_jsonl_source_keeps_raw_values_and_promotes_late_types(tmp_path, sample_size):
+    root = tmp_path / "source"
+    root.mkdir()
+    reviews = [
+        {"user_id": "u1", "parent_asin": "B0001", "rating": 5.0, "timestamp": 1588687728923, "images": []},
+        {"user_id": "u2", "parent_asin": "B0002", "rating": 4.0, "timestamp": 1588687728924,
+         "images": [{"small_image_url": "s.jpg", "large_image_url": "l.jpg"}]},
+    ]
+    (root / "raw_review_Test.jsonl").write_text("\n".join(json.dumps(review) for review in reviews))
+
+    path = _downloader(tmp_path, batch_size=1).download_amazon_reviews(
+        "Test", sample_size=sample_size, include_metadata=False
+    )
+    table = pq.read_table(path)
+    assert table.schema.field("timestamp").type == pa.int64()  # epoch ms, not parsed as dates
+    assert pa.types.is_struct(table.schema.field("images").type.value_type)
+    assert table.to_pylist() == reviews
+
+
+def test_reservoir_sample_is_a_seeded_subset_in_source_order(tmp_path):
+    _write_source(tmp_path / "source")
+    path = _downloader(tmp_path, use_cache=False).download_amazon_reviews(
+        "Test", sample_size=100, include_metadata=False
+    )
+    rows = pq.read_table(path).column("row").to_numpy()
+
+    assert len(rows) == len(np.unique(rows)) == 100
+    assert np.all(np.diff(rows) > 0)
+    again = _downloader(tmp_path, use_cache=False).download_amazon_reviews(
+        "Test", sample_size=100, include_metadata=False
+    )
+    assert np.array_equal(pq.read_table(again).column("row").to_numpy(), rows)
+
+
+def test_reservoir_sample_is_uniform(tmp_path):
+    n_rows, sample_size, trials = 200, 20, 400
+    batches = [pa.table({"row": np.arange(start, start + 16)}) for start in range(0, n_rows, 16)]
+    batches[-1] = batches[-1].slice(0, n_rows - 16 * (len(batches) - 1))
+
+    counts = np.zeros(n_rows)
+    for seed in range(trials):
+        downloader = _downloader(tmp_path, seed=seed)
+        sample, n_seen = downloader._reservoir_sample(iter(batches), sample_size)
+        counts[sample.column("row").to_numpy()] += 1
+    assert n_seen == n_rows
+
+    # Each row is kept with probability sample_size / n_rows
+    expected = trials * sample_size / n_rows
+    assert counts.sum() == trials * sample_size
+    assert counts[: n_rows // 2].sum() == pytest.approx(counts[n_rows // 2:].sum(), rel=0.1)
+    assert np.abs(counts - expected).max() < 5 * np.sqrt(expected)
+
+
+def test_sample_larger_than_source_keeps_every_row(tmp_path):
+    source = _write_source(tmp_path / "source", n_rows=50)
+    downloader = _downloader(tmp_path)
+    path = downloader.download_amazon_reviews("Test", sample_size=500, include_metadata=False)
+    assert pq.read_table(path).equals(source)
+
+    # The full copy is now cached, so a smaller sample never touches the source
+    for part in (tmp_path / "source" / "raw_review_Test").iterdir():
+        part.unlink()
+    sample = downloader.download_amazon_reviews("Test", sample_size=10, include_metadata=False)
+    assert pq.read_table(sample).num_rows == 10
+
+
+def test_download_all_jobs_match_sequential(tmp_path):
+    for config_name in ("raw_review_All_Beauty", "raw_meta_All_Beauty"):
+        _write_source(tmp_path / "source", config_name=config_name)
+
+    outputs = {}
+    for jobs in (1, 2):
+        downloader = DataDownloader(
+            data_dir=str(tmp_path / f"raw{jobs}"), source_dir=str(tmp_path / "source"),
+            synthetic_rows=500, use_cache=False,
+        )
+        downloader.download_all(sample_size=100, jobs=jobs)
+        outputs[jobs] = {
+            path.name: pq.read_table(path) for path in sorted((tmp_path / f"raw{jobs}").glob("*.parquet"))
+        }
+
+    assert set(outputs[1]) == {
+        "amazon_reviews_All_Beauty.parquet", "amazon_metadata_All_Beauty.parquet",
+        "synthetic_finance_data.parquet", "synthetic_insurance_data.parquet",
+    }
+    for name, table in outputs[1].items():
+        assert outputs[2][name].equals(table), name
+
+
+def test_failed_task_is_reported_after_the_others(tmp_path):
+    downloader = DataDownloader(data_dir=str(tmp_path / "raw"), source_dir=str(tmp_path / "empty"),
+                                synthetic_rows=500)
+    with pytest.raises(RuntimeError, match="failed: amazon_reviews$"):
+        downloader.download_all(sample_size=100, jobs=2)
+    # _download_amazon_metadata only logs its failure, the generators still ran
+    assert (tmp_path / "raw" / "synthetic_finance_data.parquet").exists()
+    assert (tmp_path / "raw" / "synthetic_insurance_data.parquet").exists()
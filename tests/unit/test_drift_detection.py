@@ -0,0 +1,69 @@
+"""Tests for src/adaptive/drift_detection.py."""
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from src.adaptive.drift_detection import KLLSketch, StreamingDriftDetector, ks_pvalue, ks_statistic, mann_whitney
+
+
+def _sketch(values, k=400):
+    sketch = KLLSketch(k=k, seed=0)
+    sketch.update_many(values)
+    return sketch
+
+
+def test_kll_quantiles_within_rank_error():
+    values = np.random.default_rng(0).normal(size=200_000)
+    sketch = _sketch(values)
+    qs = np.array([0.01, 0.1, 0.5, 0.9, 0.99])
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(qs)) / len(values)
+    assert np.max(np.abs(ranks - qs)) < 0.01
+    assert sketch.size < 3_000
+
+
+def test_merged_sketches_match_single_sketch():
+    values = np.random.default_rng(1).exponential(size=100_000)
+    merged = _sketch(values[:50_000]).merge(_sketch(values[50_000:]))
+    assert merged.n == len(values)
+    assert abs(merged.quantile(0.5) - np.median(values)) < 0.02
+
+
+def test_ks_matches_scipy():
+    rng = np.random.default_rng(2)
+    reference, current = rng.normal(size=20_000), rng.normal(0.1, 1.0, size=1_000)
+    expected = stats.ks_2samp(reference, current)
+    statistic = ks_statistic(_sketch(reference), _sketch(current))
+    assert statistic == pytest.approx(expected.statistic, abs=0.01)
+    assert ks_pvalue(statistic, len(reference), len(current)) == pytest.approx(expected.pvalue, rel=0.5)
+
+
+def test_mann_whitney_binary_metric_matches_scipy():
+    rng = np.random.default_rng(3)
+    reference = (rng.random(20_000) < 0.05).astype(float)
+    current = (rng.random(1_000) < 0.08).astype(float)
+    expected = stats.mannwhitneyu(current, reference, alternative="two-sided", use_continuity=False)
+    expected_effect = expected.statistic / (len(reference) * len(current))
+
+    # Uncompacted sketches are exact
+    effect, p_value = mann_whitney(_sketch(reference, k=50_000), _sketch(current, k=50_000))
+    assert effect == pytest.approx(expected_effect)
+    assert p_value == pytest.approx(expected.pvalue, rel=1e-6)
+
+    # Compacted sketches are within rank error
+    effect, p_value = mann_whitney(_sketch(reference), _sketch(current))
+    assert effect == pytest.approx(expected_effect, abs=0.005)
+    assert abs(np.log10(p_value) - np.log10(expected.pvalue)) < 1.0
+    assert p_value < 0.01
+
+
+def test_binary_metric_drift_detected_by_psi_and_mann_whitney():
+    rng = np.random.default_rng(4)
+    detector = StreamingDriftDetector([], ["conversion"], window_size=1_000, seed=0)
+    detector.fit_reference(np.empty((0, 0)), {"conversion": (rng.random(20_000) < 0.05).astype(float)})
+    detector.update_metrics({"conversion": (rng.random(1_000) < 0.15).astype(float)})
+
+    (result,) = detector.check()
+    assert result.psi > 0
+    assert result.p_value < 0.05
+    assert result.drifted
@@ -0,0 +1,73 @@
+"""Tests for src/data/feature_engineering.py."""
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.data.feature_engineering import AggregateFeatureEngine
+
+
+def _interactions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rating = rng.integers(1, 6, n).astype(float)
+    rating[rng.random(n) < 0.3] = np.nan  # clicks without a rating
+    return pd.DataFrame({
+        "user_id": rng.choice([f"u{i}" for i in range(20)], n),
+        "item_id": rng.choice([f"i{i}" for i in range(15)], n),
+        "rating": rating,
+        "timestamp": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90 * 86400, n), unit="s"),
+    })
+
+
+def _insert(engine, frame, ids=None):
+    rows = frame.to_dict("records")
+    for i, row in enumerate(rows):
+        row["timestamp"] = row["timestamp"].to_pydatetime()
+        if ids is not None:
+            row["id"] = int(ids[i])
+    columns = ", ".join(rows[0])
+    values = ", ".join(f":{c}" for c in rows[0])
+    with engine.begin() as connection:
+        connection.execute(text(f"INSERT INTO user_interactions ({columns}) VALUES ({values})"), rows)
+
+
+def test_incremental_updates_equal_a_full_fit():
+    frame = _interactions(1_000)
+    full = AggregateFeatureEngine().fit(frame)
+    incremental = AggregateFeatureEngine().fit(frame.iloc[:300])
+    for start in range(300, len(frame), 250):
+        incremental.update(frame.iloc[start:start + 250])
+
+    pd.testing.assert_frame_equal(incremental.user_features().sort_index(), full.user_features().sort_index())
+    pd.testing.assert_frame_equal(incremental.item_features().sort_index(), full.item_features().sort_index())
+
+
+def test_rows_committed_out_of_id_order_are_aggregated_once(tmp_path, sqlite_engine):
+    frame = _interactions(300, seed=1)
+    engine = AggregateFeatureEngine(id_lag=100)
+
+    # ids 1-100 and 151-200 commit first; 101-150 (an open transaction) later
+    _insert(sqlite_engine, frame.iloc[:100], ids=range(1, 101))
+    _insert(sqlite_engine, frame.iloc[150:200], ids=range(151, 201))
+    assert engine.update_from_database(sqlite_engine) == 150
+
+    _insert(sqlite_engine, frame.iloc[100:150], ids=range(101, 151))
+    _insert(sqlite_engine, frame.iloc[200:], ids=range(201, 301))
+    engine.save(tmp_path)
+    engine = AggregateFeatureEngine.load(tmp_path, id_lag=100)
+    assert engine.update_from_database(sqlite_engine) == 150
+    assert engine.update_from_database(sqlite_engine) == 0
+
+    full = AggregateFeatureEngine().fit(frame)
+    pd.testing.assert_frame_equal(engine.user_features().sort_index(), full.user_features().sort_index(),
+                                  check_exact=False)
+    assert engine.last_interaction_id == 300
+    assert engine.recent_ids.min() > 200
+
+
+def test_transform_defaults_for_unknown_keys():
+    engine = AggregateFeatureEngine().fit(_interactions(100))
+    out = engine.transform(pd.DataFrame({"user_id": ["u1", "nobody"], "item_id": ["i1", "nothing"]}))
+    assert out.loc[1, "user_review_count"] == 0
+    assert np.isnan(out.loc[1, "item_avg_rating"])
+    assert out.loc[0, "user_review_count"] > 0
@@ -0,0 +1,99 @@
+"""Tests for src/xai/global_importance.py."""
+
+import numpy as np
+import pytest
+
+from src.xai.global_importance import ALL, ShapAggregator
+
+FEATURES = ["price", "rating", "review_count"]
+EDGES = {name: np.array([-1.0, 0.0, 1.0]) for name in FEATURES}
+
+
+def _batch(seed, n=500):
+    rng = np.random.default_rng(seed)
+    shap_values = rng.normal(scale=[0.5, 0.2, 1.5], size=(n, 3))
+    X = rng.normal(size=(n, 3))
+    genders = rng.choice(["f", "m"], size=n)
+    return shap_values, X, genders
+
+
+def test_incremental_matches_a_single_pass():
+    batches = [_batch(seed) for seed in range(4)]
+    incremental = ShapAggregator(FEATURES, shap_range=2.0, dependence_edges=EDGES)
+    for shap_values, X, genders in batches:
+        incremental.update(shap_values, X, groups={"gender": genders})
+
+    shap_values = np.vstack([b[0] for b in batches])
+    X = np.vstack([b[1] for b in batches])
+    genders = np.concatenate([b[2] for b in batches])
+    single = ShapAggregator(FEATURES, shap_range=2.0, dependence_edges=EDGES)
+    single.update(shap_values, X, groups={"gender": genders})
+
+    importance = incremental.importance()
+    assert importance["feature"].tolist() == ["review_count", "price", "rating"]
+    np.testing.assert_allclose(
+        importance.set_index("feature").loc[FEATURES, "mean_abs_shap"], np.abs(shap_values).mean(axis=0)
+    )
+    np.testing.assert_allclose(
+        importance.set_index("feature").loc[FEATURES, "std_abs_shap"], np.abs(shap_values).std(axis=0, ddof=1)
+    )
+    np.testing.assert_allclose(
+        importance.set_index("feature").loc[FEATURES, "mean_shap"], shap_values.mean(axis=0), atol=1e-12
+    )
+    for segment, state in single.segments.items():
+        np.testing.assert_allclose(incremental.segments[segment].m2_abs, state.m2_abs)
+        np.testing.assert_array_equal(incremental.segments[segment].histogram, state.histogram)
+
+    women = genders == "f"
+    np.testing.assert_allclose(incremental.segment_importance("gender")["f"],
+                               np.abs(shap_values[women]).mean(axis=0))
+
+
+def test_merged_workers_equal_one_aggregator():
+    workers = []
+    combined = ShapAggregator(FEATURES, shap_range=2.0, dependence_edges=EDGES)
+    for seed in range(3):
+        shap_values, X, genders = _batch(seed, n=100 + 50 * seed)
+        workers.append(ShapAggregator(FEATURES, shap_range=2.0, dependence_edges=EDGES).update(
+            shap_values, X, groups={"gender": genders}
+        ))
+        combined.update(shap_values, X, groups={"gender": genders})
+
+    merged = workers[0].merge(workers[1]).merge(workers[2])
+    assert set(merged.segments) == set(combined.segments) == {ALL, "gender=f", "gender=m"}
+    for segment, state in combined.segments.items():
+        ours = merged.segments[segment]
+        assert ours.n == state.n
+        for key in ("mean_abs", "m2_abs", "mean", "dependence_sum"):
+            np.testing.assert_allclose(getattr(ours, key), getattr(state, key), atol=1e-12)
+        np.testing.assert_array_equal(ours.histogram, state.histogram)
+        np.testing.assert_array_equal(ours.dependence_count, state.dependence_count)
+
+    with pytest.raises(ValueError):
+        merged.merge(ShapAggregator(FEATURES, shap_range=1.0))
+
+
+def test_histogram_dependence_and_checkpoint(tmp_path):
+    aggregator = ShapAggregator(FEATURES, shap_range=1.0, n_bins=4, dependence_edges=EDGES)
+    shap_values = np.array([[-2.0, 0.1, 0.0], [0.3, 0.2, 5.0], [0.4, -0.9, 0.0]])
+    X = np.array([[-2.0, 0.5, 0.0], [0.5, 0.5, 0.0], [0.7, 2.0, 0.0]])
+    aggregator.update(shap_values, X)
+
+    histogram = aggregator.histogram("price")
+    assert histogram["count"].tolist() == [1, 0, 0, 2, 0, 0]  # underflow, then [0, 0.5)
+    assert aggregator.histogram("review_count")["count"].iloc[-1] == 1  # overflow
+    dependence = aggregator.dependence("price")
+    assert dependence["count"].tolist() == [1, 0, 2, 0]  # X in [0, 1) twice
+    assert dependence["mean_shap"].iloc[2] == pytest.approx(0.35)
+    assert np.isnan(dependence["mean_shap"].iloc[1])
+
+    restored = ShapAggregator.load(aggregator.save(tmp_path / "importance.npz"))
+    assert restored.importance().equals(aggregator.importance())
+    assert restored.dependence("price").equals(dependence)
+    restored.update(shap_values, X)
+    assert restored.importance()["n"].iloc[0] == 6
+
+    with pytest.raises(ValueError):
+        aggregator.update(np.zeros((2, 4)))
+    with pytest.raises(KeyError):
+        aggregator.importance("gender=f")
@@ -0,0 +1,57 @@
+"""Tests for src/data/id_encoding.py."""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data.id_encoding import UNKNOWN, IdVocabulary, load_vocabularies, read_encoded, update_vocabularies
+
+
+def test_encode_decode_round_trip():
+    vocabulary = IdVocabulary(["a", "b"], name="user_id")
+    codes = vocabulary.encode(["b", "c", None, "a", "c"], extend=True)
+
+    assert codes.dtype == np.int32
+    assert codes.tolist() == [1, 2, UNKNOWN, 0, 2]
+    assert vocabulary.decode(codes).tolist() == ["b", "c", None, "a", "c"]
+    assert vocabulary.encode(["d"]).tolist() == [UNKNOWN]
+    assert vocabulary.lookup(2) == "c" and vocabulary.lookup(7) is None
+
+
+def test_codes_are_append_only_across_files(tmp_path):
+    first = tmp_path / "first.parquet"
+    second = tmp_path / "second.parquet"
+    pq.write_table(pa.table({"user_id": ["u1", "u2", "u1"], "parent_asin": ["B1", "B1", "B2"]}), first)
+    pq.write_table(pa.table({"user_id": ["u3", "u2"], "parent_asin": ["B3", "B2"]}), second)
+    columns = {"user_id": "user_id", "parent_asin": "item_id"}
+
+    update_vocabularies(first, columns, vocab_dir=tmp_path / "vocab")
+    before = load_vocabularies(["user_id", "item_id"], tmp_path / "vocab")
+    update_vocabularies(second, columns, vocab_dir=tmp_path / "vocab")
+    after = load_vocabularies(["user_id", "item_id"], tmp_path / "vocab")
+
+    assert len(after["user_id"]) == 3 and len(after["item_id"]) == 3
+    for name in ("user_id", "item_id"):
+        known = before[name].decode(np.arange(len(before[name])))
+        assert after[name].encode(known).tolist() == list(range(len(before[name])))
+
+
+def test_read_encoded_matches_row_encoding(tmp_path):
+    path = tmp_path / "reviews.parquet"
+    users = [f"u{i % 13}" for i in range(200)] + [None]
+    table = pa.table({"user_id": users, "rating": np.arange(201, dtype=float)})
+    pq.write_table(table, path, row_group_size=50)
+
+    vocabulary = IdVocabulary(["u3", "u0"], name="user_id")
+    df = read_encoded(path, {"user_id": vocabulary}, extend=True)
+
+    assert df["user_id"].dtype == np.int32
+    assert df["user_id"].tolist() == vocabulary.encode(users).tolist()
+    assert df["user_id"].iloc[-1] == UNKNOWN
+    assert vocabulary.encode(["u3", "u0"]).tolist() == [0, 1]
+    assert df["rating"].tolist() == table.column("rating").to_pylist()
+
+    # Chunks with different dictionaries, as read from different row groups
+    chunked = pa.chunked_array([pa.array(["u0", "zz"]).dictionary_encode(),
+                                pa.array(["u3", None]).dictionary_encode()])
+    assert vocabulary.encode_arrow(chunked).to_pylist() == [1, UNKNOWN, 0, UNKNOWN]
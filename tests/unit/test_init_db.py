@@ -0,0 +1,50 @@
+"""Tests for scripts/init_db.py."""
+
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import init_db
+
+
+def test_archive_chunks_share_the_table_schema(tmp_path):
+    schema = init_db.archive_schema("drift_alerts")
+    assert schema.field("affected_features").type == pa.string()
+    assert schema.field("detected_at").type == pa.timestamp("us")
+
+    with_json = pd.DataFrame({
+        "id": [1, 2],
+        "model_id": [3, 3],
+        "drift_type": ["data", "concept"],
+        "drift_score": [0.3, 0.4],
+        "threshold": [0.2, 0.2],
+        "detected_at": [datetime(2024, 1, 1), datetime(2024, 1, 2)],
+        "affected_features": [[{"name": "age", "psi": 0.3}], {"a": 1.0}],
+        "action_taken": ["alert_sent", None],
+    })
+    without_json = with_json.assign(affected_features=[None, None], drift_score=[None, None])
+
+    path = tmp_path / "drift_alerts_y2024m01.parquet"
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in (with_json, without_json):
+            writer.write_table(init_db._archive_batch(chunk, "drift_alerts", schema))
+
+    archived = pq.read_table(path)
+    assert archived.schema.equals(schema)
+    assert archived.column("affected_features").to_pylist() == [
+        '[{"name": "age", "psi": 0.3}]', '{"a": 1.0}', None, None
+    ]
+
+
+def test_prune_archive_handles_repeated_months(tmp_path):
+    directory = tmp_path / "predictions"
+    directory.mkdir()
+    for name in ("predictions_y2015m03.parquet", "predictions_y2015m03.1.parquet", "predictions_y2024m01.parquet"):
+        (directory / name).touch()
+    assert init_db._archive_path(directory, "predictions_y2024m01").name == "predictions_y2024m01.1.parquet"
+
+    removed = init_db.prune_archive(tmp_path, years=7, now=datetime(2025, 6, 1))
+    assert sorted(path.name for path in removed) == ["predictions_y2015m03.1.parquet", "predictions_y2015m03.parquet"]
+    assert [path.name for path in directory.iterdir()] == ["predictions_y2024m01.parquet"]
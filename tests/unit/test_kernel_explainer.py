@@ -0,0 +1,66 @@
+"""Tests for src/xai/kernel_explainer.py."""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src.xai.kernel_explainer import ParallelKernelExplainer, select_background
+
+COEF = np.array([1.0, -2.0, 0.5])
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 3))
+    return X, X @ COEF + 3.0
+
+
+def _explainer(model, tmp_path, **kwargs):
+    kwargs.setdefault("sample_size", 10)
+    kwargs.setdefault("shard_rows", 4)
+    return ParallelKernelExplainer(model, "v1", background_dir=tmp_path, **kwargs)
+
+
+def test_kernel_shap_is_exact_for_linear_models(tmp_path, data):
+    X, y = data
+    explainer = _explainer(LinearRegression().fit(X, y), tmp_path, jobs=1).fit_background(X)
+    values = explainer.explain(X[:10])
+
+    # Linear model: phi_j = coef_j * (x_j - weighted background mean_j)
+    expected = COEF * (X[:10] - explainer.weights @ explainer.background)
+    np.testing.assert_allclose(values, expected, atol=1e-6)
+    assert explainer.weights.sum() == pytest.approx(1.0)
+    assert len(explainer.background) == 10
+
+
+@pytest.mark.parametrize("explainer_type", ["kernel", "permutation"])
+def test_results_do_not_depend_on_jobs(tmp_path, data, explainer_type):
+    X, y = data
+    model = LogisticRegression().fit(X, y > 3.0)
+    sequential = _explainer(model, tmp_path, jobs=1, explainer_type=explainer_type, nsamples=40)
+    parallel = _explainer(model, tmp_path, jobs=2, explainer_type=explainer_type, nsamples=40)
+
+    first = sequential.fit_background(X).explain(X[:10])
+    second = parallel.fit_background(X).explain(X[:10])
+    assert first.shape == (10, 3)
+    np.testing.assert_allclose(first, second)
+
+
+def test_background_is_cached_per_version(tmp_path, data):
+    X, y = data
+    model = LinearRegression().fit(X, y)
+    first = _explainer(model, tmp_path).fit_background(X)
+    assert first.background_path == tmp_path / "v1.npz"
+
+    cached = _explainer(model, tmp_path).fit_background(X[:50] + 100.0)
+    np.testing.assert_array_equal(cached.background, first.background)
+    resized = _explainer(model, tmp_path, sample_size=5).fit_background(X)
+    assert len(resized.background) == 5
+
+    background, weights = select_background(X[:8], sample_size=10)
+    assert len(background) == 8 and weights == pytest.approx(np.full(8, 1 / 8))
+    with pytest.raises(RuntimeError):
+        _explainer(model, tmp_path / "empty").explain(X[:2])
+    with pytest.raises(ValueError):
+        _explainer(model, tmp_path, explainer_type="tree")
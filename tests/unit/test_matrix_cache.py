@@ -0,0 +1,77 @@
+"""Tests for src/data/matrix_cache.py."""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data.cache import DatasetCache
+from src.data.matrix_cache import FeatureMatrixCache
+
+
+def _publish(cache, name, values, **inputs):
+    output = cache.data_dir / name
+    with cache.staging(output) as tmp:
+        pq.write_table(pa.table({"x": values}), tmp)
+        cache.commit({"name": name, **inputs}, tmp, output)
+    return output
+
+
+def _config(raw_path):
+    return {
+        "features": {"user_features": ["user_avg_rating"]},
+        "dataset": {"raw_data_path": str(raw_path), "train_ratio": 0.7, "val_ratio": 0.15,
+                    "test_ratio": 0.15, "random_seed": 42},
+    }
+
+
+def test_key_depends_only_on_the_source_entry(tmp_path):
+    raw = DatasetCache(tmp_path / "raw")
+    source = _publish(raw, "reviews.parquet", [1, 2, 3], sample_size=3)
+    matrices = FeatureMatrixCache(tmp_path / "matrix_cache", manifest_path=raw.manifest_path)
+    config = _config(source)
+    key = matrices.key(config)
+
+    _publish(raw, "other_dataset.parquet", [4, 5], sample_size=2)
+    assert matrices.key(config) == key
+
+    _publish(raw, "reviews.parquet", [1, 2, 3, 4], sample_size=4)
+    assert matrices.key(config) != key
+
+    raw.restore({"name": "reviews.parquet", "sample_size": 3}, source)
+    assert matrices.key(config) == key
+
+
+def test_build_and_reopen_memory_mapped_split(tmp_path):
+    raw = DatasetCache(tmp_path / "raw")
+    config = _config(_publish(raw, "reviews.parquet", [1, 2, 3]))
+    matrices = FeatureMatrixCache(tmp_path / "matrix_cache", manifest_path=raw.manifest_path)
+    frame = pd.DataFrame({"a": np.arange(100.0), "b": np.arange(100.0) * 2, "rating": np.arange(100) % 5})
+
+    built = matrices.build(config, frame, target="rating")
+    reopened = matrices.get_or_build(config, lambda: None, target="rating")
+
+    assert reopened.key == built.key
+    assert reopened.feature_names == ["a", "b"]
+    assert isinstance(reopened.X("train"), np.memmap)
+    rows = sum(len(reopened.X(split)) for split in ("train", "val", "test"))
+    assert rows == len(frame)
+    np.testing.assert_array_equal(reopened.X("train")[:, 1], reopened.X("train")[:, 0] * 2)
+
+
+def test_other_target_or_columns_build_a_new_entry(tmp_path):
+    raw = DatasetCache(tmp_path / "raw")
+    config = _config(_publish(raw, "reviews.parquet", [1, 2, 3]))
+    matrices = FeatureMatrixCache(tmp_path / "matrix_cache", manifest_path=raw.manifest_path)
+    frame = pd.DataFrame({"a": np.arange(50.0), "r": np.arange(50) % 5, "p": np.arange(50.0) / 50})
+
+    by_rating = matrices.get_or_build(config, lambda: frame, target="r")
+    by_price = matrices.get_or_build(config, lambda: frame, target="p")
+    assert by_price.key != by_rating.key
+    assert (by_rating.target, by_rating.feature_names) == ("r", ["a", "p"])
+    assert (by_price.target, by_price.feature_names) == ("p", ["a", "r"])
+    assert np.asarray(by_price.y("train")).max() < 1.0
+
+    only_a = matrices.get_or_build(config, lambda: frame, target="r", feature_columns=["a"])
+    assert only_a.key != by_rating.key and only_a.feature_names == ["a"]
+    assert matrices.get_or_build(config, lambda: None, target="r").key == by_rating.key
@@ -0,0 +1,48 @@
+"""Tests for src/adaptive/model_registry.py."""
+
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from src.adaptive.model_registry import FilesystemRegistry, qualified_version
+
+
+@pytest.fixture
+def booster():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    return lgb.train({"verbose": -1}, lgb.Dataset(X, label=X[:, 0]), num_boost_round=3)
+
+
+def test_versions_are_numbered_per_domain_and_qualified_globally(tmp_path, booster):
+    registry = FilesystemRegistry(tmp_path)
+    assert registry.register("e_commerce", booster) == "v0001"
+    assert registry.register("e_commerce", booster, {"metrics": {"rmse": 0.8}}) == "v0002"
+    assert registry.register("finance", booster) == "v0001"
+
+    assert registry.versions("e_commerce") == ["v0001", "v0002"]
+    assert registry.metadata("e_commerce", "v0002")["metrics"] == {"rmse": 0.8}
+    assert registry.load("e_commerce", "v0001").num_trees() == 3
+    assert qualified_version("e_commerce", "v0001") != qualified_version("finance", "v0001")
+
+
+def test_challenger_routing_promotion_and_rollback(tmp_path, booster):
+    registry = FilesystemRegistry(tmp_path)
+    for _ in range(3):
+        registry.register("finance", booster)
+    registry.promote("finance", "v0001")
+
+    registry.start_challenger("finance", "v0002", traffic=0.10)
+    arms = [registry.route("finance", user_id) for user_id in range(5_000)]
+    assert 0.08 < arms.count("v0002") / len(arms) < 0.12
+    assert registry.route("finance", 42) == registry.route("finance", 42)
+
+    assert registry.rollback("finance") == "v0001"
+    assert registry.challenger("finance") is None
+
+    registry.promote("finance", "v0003")
+    assert registry.champion("finance") == "v0003"
+    assert registry.rollback("finance") == "v0001"
+    assert registry.champion("finance") == "v0001"
+    with pytest.raises(ValueError):
+        registry.rollback("finance")
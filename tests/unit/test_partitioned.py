@@ -0,0 +1,88 @@
+"""Tests for src/data/partitioned.py."""
+
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from src.data.partitioned import (
+    PartitionedDataReader,
+    append_partitioned,
+    is_partitioned,
+    load_retraining_window,
+    write_partitioned,
+)
+
+DAY_MS = 86_400_000
+START_MS = int((datetime(2024, 1, 1) - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def _reviews(n_days=120):
+    """One review per day from 2024-01-01, epoch-millisecond timestamps, plus one undated row."""
+    return pa.table({
+        "user_id": [f"u{i}" for i in range(n_days)] + ["undated"],
+        "rating": [float(i % 5 + 1) for i in range(n_days)] + [3.0],
+        "timestamp": pa.array([START_MS + i * DAY_MS for i in range(n_days)] + [None], pa.int64()),
+    })
+
+
+def test_layout_and_source_marker(tmp_path):
+    source = tmp_path / "reviews.parquet"
+    pq.write_table(_reviews(), source)
+    category_dir = write_partitioned(source, "e_commerce", "Beauty", root=tmp_path, source_sha256="abc")
+
+    months = sorted(p.name for p in category_dir.iterdir() if p.is_dir())
+    assert months == ["month=2024-01", "month=2024-02", "month=2024-03", "month=2024-04",
+                      "month=__HIVE_DEFAULT_PARTITION__"]
+    assert is_partitioned("e_commerce", "Beauty", "abc", root=tmp_path)
+    assert not is_partitioned("e_commerce", "Beauty", "def", root=tmp_path)
+
+    table = PartitionedDataReader(tmp_path).read("e_commerce", category="Beauty")
+    assert table.num_rows == 121
+    assert sorted(table.column("user_id").to_pylist()) == sorted(_reviews().column("user_id").to_pylist())
+
+
+def test_rewrite_replaces_the_category(tmp_path):
+    write_partitioned([_reviews()], "e_commerce", "Beauty", root=tmp_path)
+    write_partitioned([_reviews(10)], "e_commerce", "Beauty", root=tmp_path)
+    write_partitioned([_reviews(5)], "e_commerce", "Books", root=tmp_path)
+
+    reader = PartitionedDataReader(tmp_path)
+    assert reader.read("e_commerce", category="Beauty").num_rows == 11
+    assert reader.read("e_commerce").num_rows == 17
+    assert not list(tmp_path.glob(".staging-*"))
+
+
+def test_window_prunes_month_partitions(tmp_path):
+    category_dir = write_partitioned([_reviews()], "e_commerce", "Beauty", root=tmp_path)
+    # Unreadable files outside the window: the scan only succeeds if their months are pruned
+    for month in ("month=2024-04", "month=__HIVE_DEFAULT_PARTITION__"):
+        for part in (category_dir / month).glob("*.parquet"):
+            part.write_bytes(b"not parquet")
+
+    reader = PartitionedDataReader(tmp_path)
+    end = datetime(2024, 3, 15)
+    scanner = reader.scanner("e_commerce", columns=["user_id", "rating"], start=datetime(2024, 2, 14), end=end)
+    table = scanner.to_table()
+    assert table.column_names == ["user_id", "rating"]
+    assert table.num_rows == 30  # 2024-02-14 .. 2024-03-14
+    with pytest.raises(pa.ArrowInvalid):
+        reader.read("e_commerce")  # the unpruned scan does hit them
+
+    config = {"adaptive": {"retraining": {"data_window_days": 30}}}
+    window = load_retraining_window(config, "e_commerce", columns=["timestamp"], root=tmp_path, end=end)
+    assert window.num_rows == 30
+    assert min(window.column("timestamp").to_pylist()) == START_MS + 44 * DAY_MS
+
+
+def test_filter_pushdown_and_append(tmp_path):
+    write_partitioned([_reviews(31)], "e_commerce", "Beauty", root=tmp_path)
+    append_partitioned(_reviews(31).slice(0, 31), "e_commerce", "Beauty", basename="extra", root=tmp_path)
+
+    reader = PartitionedDataReader(tmp_path)
+    table = reader.read("e_commerce", filter=ds.field("rating") >= 5.0, columns=["user_id"])
+    assert table.num_rows == 2 * 6
+    with pytest.raises(FileNotFoundError):
+        reader.read("finance")
@@ -0,0 +1,94 @@
+"""Tests for src/xai/precompute.py."""
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.xai.precompute import ExplanationPrecomputer, PrecomputedExplanationStore
+from src.xai.shap_explainer import ExplanationEngine, feature_hash
+
+FEATURES = ["user_score", "item_score"]
+
+
+def build_features(pairs):
+    return pd.DataFrame({
+        "user_score": pairs["user_id"].str[1:].astype(float),
+        "item_score": pairs["item_id"].str[1:].astype(float),
+    })
+
+
+def _classifier():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 5, size=(500, 2))
+    y = (X.sum(axis=1) > 5).astype(int)
+    return lgb.train({"objective": "binary", "verbose": -1},
+                     lgb.Dataset(pd.DataFrame(X, columns=FEATURES), label=y), num_boost_round=10)
+
+
+def _seed(engine):
+    interactions = [{"user_id": f"u{i % 4}", "item_id": f"i{i % 3}"} for i in range(24)]
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO models (name, version, domain) VALUES ('m', 'e_commerce-v0001', 'e_commerce')"
+        ))
+        connection.execute(text("INSERT INTO user_interactions (user_id, item_id) VALUES (:user_id, :item_id)"),
+                           interactions)
+
+
+def test_failed_precompute_is_retried_and_renders_predictions(tmp_path, sqlite_engine):
+    _seed(sqlite_engine)
+    booster = _classifier()
+    calls = []
+
+    def load_model(row):
+        calls.append(row["id"])
+        if len(calls) == 1:
+            raise OSError("model file not synced yet")
+        return booster
+
+    engine = ExplanationEngine()
+    precomputer = ExplanationPrecomputer(engine, build_features, model_loader=load_model, store_dir=tmp_path)
+
+    assert precomputer.refresh(sqlite_engine) == []
+    assert precomputer.failed_model_ids == {1}
+    assert precomputer.refresh(sqlite_engine) == ["e_commerce-v0001"]
+    assert precomputer.failed_model_ids == set()
+    assert precomputer.refresh(sqlite_engine) == []
+
+    store = PrecomputedExplanationStore.load(tmp_path / "e_commerce-v0001.npz")
+    x = np.array([3.0, 2.0])
+    explanation = store.lookup(feature_hash(x))
+    rendering = explanation.renderings["regulatory_compliance"]
+    assert rendering["prediction"] == float(booster.predict(x.reshape(1, -1))[0])
+    assert explanation.renderings["societal_acceptance"]["confidence_level"] != "unknown"
+    assert len(store) == 12
+
+
+def test_restart_reloads_stores_and_skips_versions_that_cannot_serve(tmp_path, sqlite_engine):
+    _seed(sqlite_engine)
+    with sqlite_engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO models (name, version, domain, is_active) VALUES "
+            "('m', 'e_commerce-v0002', 'e_commerce', 0), ('m', 'e_commerce-v0003', 'e_commerce', 0)"
+        ))
+    booster = _classifier()
+    loaded = []
+
+    def load_model(row):
+        loaded.append(row["version"])
+        return booster
+
+    engine = ExplanationEngine(cache_size=100)
+    engine.register_model("e_commerce-v0003", booster)  # running challenger: serves next to the champion
+    precomputer = ExplanationPrecomputer(engine, build_features, model_loader=load_model, store_dir=tmp_path)
+    assert precomputer.refresh(sqlite_engine) == ["e_commerce-v0001", "e_commerce-v0003"]
+    assert loaded == ["e_commerce-v0001"]  # the rejected v0002 is never loaded
+    assert len(engine.cache) == 0  # the offline batch does not fill the online cache
+
+    restarted = ExplanationEngine()
+    again = ExplanationPrecomputer(restarted, build_features, model_loader=load_model, store_dir=tmp_path)
+    assert again.refresh(sqlite_engine) == []
+    assert loaded == ["e_commerce-v0001"]
+    assert again.attached == {"e_commerce-v0001"}
+    assert not (tmp_path / "e_commerce-v0002.npz").exists()
@@ -0,0 +1,125 @@
+"""Tests for src/utils/prediction_logging.py."""
+
+import json
+import os
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+
+from src.adaptive.scheduler import MODELS_TABLE
+
+from src.utils.prediction_logging import PredictionLogger
+from src.utils.vector_codec import VectorCodec, with_feature_schema
+from src.xai.shap_explainer import Explanation
+
+
+def _count(engine, table):
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def _log_mixed(prediction_log):
+    for i in range(25):
+        prediction_log.log_prediction(model_id=1, user_id=f"u{i}", item_id="i1", prediction=0.5)
+    prediction_log.log_prediction(model_id=None, user_id="bad", item_id="i1", prediction=0.5)
+    for i in range(5):
+        prediction_log.log_interaction(user_id=f"u{i}", item_id="i1", interaction_type="click")
+
+
+def test_bad_row_is_dead_lettered_and_batch_written(sqlite_engine, tmp_path):
+    spill_dir = tmp_path / "spill"
+    with PredictionLogger(sqlite_engine, batch_size=100, flush_interval=0.05, spill_dir=spill_dir) as prediction_log:
+        _log_mixed(prediction_log)
+        prediction_log.flush(timeout=10)
+        metrics = prediction_log.metrics()
+
+    assert _count(sqlite_engine, "predictions") == 25
+    assert _count(sqlite_engine, "user_interactions") == 5
+    assert metrics["dead_lettered"] == 1
+    assert metrics["spilled"] == 0
+    assert not list(spill_dir.glob("*.jsonl"))
+
+    dead = [json.loads(line) for path in (spill_dir / "dead_letter").glob("*.jsonl") for line in open(path)]
+    assert [record["row"]["user_id"] for record in dead] == ["bad"]
+
+
+def test_outage_spills_then_replays_after_recovery(sqlite_engine, tmp_path):
+    spill_dir = tmp_path / "spill"
+    down = create_engine(f"sqlite:///{tmp_path / 'missing' / 'xae.db'}")  # directory does not exist
+
+    prediction_log = PredictionLogger(down, batch_size=10, flush_interval=0.05, spill_dir=spill_dir)
+    for i in range(30):
+        prediction_log.log_prediction(model_id=1, user_id=f"u{i}", prediction=0.1)
+    prediction_log.flush(timeout=10)
+    assert prediction_log.metrics()["spilled"] == 30
+    time.sleep(0.6)  # ~12 flush intervals of outage
+    metrics = prediction_log.metrics()
+    assert metrics["replayed"] == 0
+    assert metrics["failed_flushes"] <= 8  # replay backs off instead of retrying every flush
+
+    prediction_log.engine = sqlite_engine  # database is back
+    prediction_log.close(timeout=10)
+
+    assert _count(sqlite_engine, "predictions") == 30
+    assert prediction_log.metrics()["replayed"] == 30
+    assert not [p for p in spill_dir.iterdir() if p.is_file()]
+
+
+def test_schema_errors_are_dead_lettered_not_replayed(tmp_path):
+    spill_dir = tmp_path / "spill"
+    empty = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")  # reachable, but no tables
+
+    with PredictionLogger(empty, batch_size=10, flush_interval=0.05, spill_dir=spill_dir) as prediction_log:
+        for i in range(3):
+            prediction_log.log_prediction(model_id=1, user_id=f"u{i}", prediction=0.1)
+        prediction_log.flush(timeout=10)
+        metrics = prediction_log.metrics()
+
+    assert metrics["dead_lettered"] == 3
+    assert metrics["spilled"] == 0
+    assert not list(spill_dir.glob("*.jsonl"))
+    dead = [json.loads(line) for path in (spill_dir / "dead_letter").glob("*.jsonl") for line in open(path)]
+    assert all("no such table" in record["error"] for record in dead)
+
+
+def test_spill_file_of_crashed_process_is_replayed_at_startup(sqlite_engine, tmp_path):
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+    orphan_pid = os.getpid() + 100_000
+    with open(spill_dir / f"predictions-{orphan_pid}.jsonl", "w") as f:
+        for i in range(7):
+            f.write(json.dumps({"table": "predictions", "row": {"model_id": 1, "user_id": f"u{i}"}}) + "\n")
+    with open(spill_dir / f"predictions-{orphan_pid}.replay-1-1", "w") as f:  # replay interrupted by a crash
+        f.write(json.dumps({"table": "predictions", "row": {"model_id": 2, "user_id": "r"}}) + "\n")
+
+    with PredictionLogger(sqlite_engine, flush_interval=0.05, spill_dir=spill_dir) as prediction_log:
+        prediction_log.flush(timeout=10)
+
+    assert _count(sqlite_engine, "predictions") == 8
+    assert not [p for p in spill_dir.iterdir() if p.is_file()]
+
+
+def test_predictions_of_models_with_a_schema_are_packed(sqlite_engine, tmp_path):
+    features = ["price", "rating"]
+    with sqlite_engine.begin() as connection:
+        connection.execute(insert(MODELS_TABLE), [
+            {"id": 1, "name": "m", "version": "v1", "config": with_feature_schema({}, features)},
+            {"id": 2, "name": "m", "version": "v0", "config": {}},
+        ])
+    explanation = Explanation("v1", np.array([0.25, -0.5], dtype=np.float32), 0.375, features)
+
+    with PredictionLogger(sqlite_engine, flush_interval=0.05, spill_dir=tmp_path / "spill") as prediction_log:
+        prediction_log.log_prediction(model_id=1, user_id="u1", prediction=0.125,
+                                      features={"price": 10.0, "rating": 4.5}, explanation=explanation)
+        prediction_log.log_prediction(model_id=2, user_id="u2", prediction=0.5, features={"price": 1.0})
+
+    with sqlite_engine.connect() as connection:
+        rows = {row.model_id: row for row in connection.execute(text(
+            "SELECT model_id, features, explanation, features_blob, explanation_blob FROM predictions"
+        ))}
+    codec = VectorCodec(features)
+    assert rows[1].features is None and rows[1].explanation is None
+    assert codec.decode(rows[1].features_blob) == {"price": 10.0, "rating": 4.5}
+    assert codec.decode_explanation(rows[1].explanation_blob) == ({"price": 0.25, "rating": -0.5}, 0.375)
+    assert json.loads(rows[2].features) == {"price": 1.0} and rows[2].features_blob is None  # no schema
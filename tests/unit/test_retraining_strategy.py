@@ -0,0 +1,120 @@
+"""Tests for src/adaptive/retraining_strategy.py."""
+
+from datetime import datetime, timedelta
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.adaptive.drift_detection import DriftResult
+from src.adaptive.retraining_strategy import (
+    RetrainDecision,
+    RetrainingEngine,
+    TrainingData,
+    drift_magnitude,
+    recency_weights,
+)
+
+FEATURES = ["a", "b", "c"]
+PARAMS = {"objective": "regression", "learning_rate": 0.1, "num_leaves": 7, "verbose": -1, "seed": 0}
+
+
+def _data(n, shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 3)), columns=FEATURES)
+    y = X["a"] - 2 * X["b"] + shift * X["c"] + rng.normal(scale=0.1, size=n)
+    return TrainingData(X, y.to_numpy())
+
+
+@pytest.fixture(scope="module")
+def champion():
+    window = _data(2000)
+    return lgb.train(PARAMS, lgb.Dataset(window.X, label=window.y), num_boost_round=40)
+
+
+def _engine(**kwargs):
+    kwargs.setdefault("params", PARAMS)
+    return RetrainingEngine(num_boost_round=40, incremental_rounds=15, weight_recent=False, **kwargs)
+
+
+def _rmse(booster, data):
+    return float(np.sqrt(np.mean((booster.predict(data.X) - data.y) ** 2)))
+
+
+def test_decisions(champion):
+    engine = _engine(max_model_age_days=30)
+    assert engine.decide(champion).mode == "none"
+    assert engine.decide(None).mode == "full"
+    assert engine.decide(champion, drift=0.1).mode == "incremental"
+    assert engine.decide(champion, drift=0.5).mode == "full"
+    assert engine.decide(champion, model_age_days=31).mode == "incremental"
+    assert engine.decide(champion, performance=1.2, baseline_performance=1.0).mode == "incremental"
+    assert engine.decide(champion, performance=0.95, baseline_performance=1.0).mode == "none"
+
+    auc = _engine(metric="auc")
+    assert auc.decide(champion, performance=0.7, baseline_performance=0.8).mode == "incremental"
+    assert auc.decide(champion, performance=0.9, baseline_performance=0.8).mode == "none"
+
+    assert _engine(max_trees=50).decide(champion, drift=0.1).mode == "full"  # 40 + 15 > 50
+    assert _engine(incremental=False).decide(champion, drift=0.1).mode == "full"
+
+    results = [
+        DriftResult("price", "feature", "ks", 0.2, 0.001, 0.1, 0.5, 1000, 1000, True),
+        DriftResult("conversion_rate", "metric", "mann_whitney", 0.9, 0.0, 0.3, 0.1, 1000, 1000, True),
+    ]
+    assert drift_magnitude(results) == 0.2  # business metrics do not size the retrain
+
+
+def test_warm_start_extends_the_champion(champion):
+    engine = _engine()
+    shifted_new = _data(300, shift=1.5, seed=1)
+    holdout = _data(1000, shift=1.5, seed=2)
+    loads = []
+
+    def load_window():
+        loads.append(True)
+        return _data(2000, shift=1.5, seed=3)
+
+    decision = engine.decide(champion, drift=0.1)
+    warm = engine.retrain(decision, champion, new_data=shifted_new, full_data=load_window)
+    assert loads == []  # the window is only loaded for a full retrain
+    assert warm.mode == "incremental" and warm.n_rows == 300
+    assert warm.rounds_added == 15 and warm.num_trees == 55
+    # The champion's trees are kept as they were
+    np.testing.assert_allclose(warm.booster.predict(holdout.X, num_iteration=40), champion.predict(holdout.X))
+    assert _rmse(warm.booster, holdout) < _rmse(champion, holdout)
+
+    full = engine.retrain(RetrainDecision("full", ["drift"]), champion, full_data=load_window)
+    assert loads == [True]
+    assert full.mode == "full" and full.num_trees == 40 and full.n_rows == 2000
+    assert _rmse(full.booster, holdout) < _rmse(champion, holdout)
+
+    assert engine.retrain(RetrainDecision("none")) is None
+    with pytest.raises(ValueError):
+        engine.retrain(RetrainDecision("incremental"), champion, new_data=None)
+
+
+def test_warm_start_reorders_dataframe_columns(champion):
+    new = _data(300, seed=4)
+    reordered = TrainingData(new.X[["c", "a", "b"]], new.y)
+    engine = _engine()
+    first = engine.retrain(RetrainDecision("incremental"), champion, new_data=new).booster
+    second = engine.retrain(RetrainDecision("incremental"), champion, new_data=reordered).booster
+    np.testing.assert_allclose(first.predict(new.X), second.predict(new.X))
+
+
+def test_recency_weights():
+    now = datetime(2024, 6, 10)
+    timestamps = [now, now - timedelta(days=1), now - timedelta(days=10), now + timedelta(days=1)]
+    weights = recency_weights(timestamps, decay_factor=0.9, now=now)
+    np.testing.assert_allclose(weights, [1.0, 0.9, 0.9 ** 10, 1.0])
+
+    engine = RetrainingEngine.from_config({
+        "model": {"lightgbm": {"n_estimators": 25, "learning_rate": 0.05}},
+        "adaptive": {"retraining": {"incremental": True, "incremental_rounds": 5},
+                     "feedback_loop": {"enabled": True, "decay_factor": 0.8, "weight_recent": True}},
+    })
+    assert (engine.num_boost_round, engine.incremental_rounds, engine.max_trees) == (25, 5, 75)
+    data = TrainingData(np.zeros((2, 1)), np.zeros(2), pd.Series(timestamps[:2]))
+    np.testing.assert_allclose(engine.sample_weights(data), [1.0, 0.8])
@@ -0,0 +1,118 @@
+"""Tests for src/xai/shap_explainer.py."""
+
+import threading
+import time
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+import shap
+
+from src.xai.shap_explainer import ExplanationCache, ExplanationEngine
+
+FEATURES = ["price", "rating", "review_count"]
+
+
+@pytest.fixture(scope="module")
+def booster():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 3))
+    y = (X[:, 0] - X[:, 1] + rng.normal(scale=0.3, size=400) > 0).astype(int)
+    return lgb.train({"objective": "binary", "verbose": -1},
+                     lgb.Dataset(pd.DataFrame(X, columns=FEATURES), label=y), num_boost_round=15)
+
+
+class _CountingExplainer:
+    """Wraps a TreeExplainer and records the size of every ``shap_values`` call."""
+
+    def __init__(self, explainer):
+        self.explainer = explainer
+        self.expected_value = explainer.expected_value
+        self.calls = []
+
+    def shap_values(self, X):
+        self.calls.append(len(X))
+        return self.explainer.shap_values(X)
+
+
+def test_batched_values_match_tree_shap_and_are_additive(booster):
+    X = np.random.default_rng(1).normal(size=(20, 3))
+    engine = ExplanationEngine()
+    engine.register_model("v1", booster)
+
+    explanations = engine.explain_batch("v1", X)
+    reference = np.asarray(shap.TreeExplainer(booster).shap_values(X))
+    np.testing.assert_allclose([e.shap_values for e in explanations], reference.reshape(20, 3), atol=1e-5)
+
+    margin = booster.predict(X, raw_score=True)
+    totals = [e.shap_values.sum() + e.base_value for e in explanations]
+    np.testing.assert_allclose(totals, margin, atol=1e-4)
+    assert explanations[0].feature_names == FEATURES
+    assert engine.predict("v1", X) == pytest.approx(booster.predict(X))
+
+
+def test_concurrent_requests_share_one_shap_call(booster):
+    X = np.random.default_rng(2).normal(size=(16, 3))
+    engine = ExplanationEngine(max_batch_size=64, max_wait_ms=200)
+    engine.register_model("v1", booster)
+    counting = engine._explainers["v1"] = _CountingExplainer(engine._explainers["v1"])
+
+    barrier = threading.Barrier(len(X) + 1)
+    results = [None] * len(X)
+
+    def request(i):
+        barrier.wait()
+        results[i] = engine.explain("v1", X[i % 8], timeout=10)  # every vector twice
+
+    with engine:
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(X))]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+
+    assert sum(counting.calls) == 8  # duplicates within a batch are explained once
+    assert len(counting.calls) <= 2
+    for i, explanation in enumerate(results):
+        np.testing.assert_array_equal(explanation.shap_values, results[i % 8].shap_values)
+
+    again = engine.explain("v1", X[0])
+    assert again.cached and sum(counting.calls) == 8
+
+
+def test_unregister_evicts_and_failures_reach_the_future(booster):
+    engine = ExplanationEngine()
+    engine.register_model("v1", booster)
+    engine.explain_batch("v1", np.zeros((2, 3)))
+    assert len(engine.cache) == 1
+
+    engine.unregister_model("v1")
+    assert len(engine.cache) == 0
+    with pytest.raises(KeyError):
+        engine.submit("v1", np.zeros(3))
+
+    engine.register_model("v2", booster)
+    with engine:
+        with pytest.raises(lgb.basic.LightGBMError):
+            engine.explain("v2", np.zeros(5), timeout=10)  # wrong width
+
+
+def test_cache_lru_and_ttl():
+    cache = ExplanationCache(max_entries=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    time.sleep(0.06)
+    assert cache.get("a") is None and len(cache) == 1
+    assert cache.hit_rate == pytest.approx(3 / 5)
+
+    disabled = ExplanationEngine.from_config({"explainability": {"shap": {"cache_enabled": False}}})
+    assert disabled.cache is None
+    with pytest.raises(ValueError):
+        ExplanationEngine.from_config({"explainability": {"shap": {"explainer_type": "kernel"}}})
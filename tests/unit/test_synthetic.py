@@ -0,0 +1,39 @@
+"""Tests for src/data/synthetic.py."""
+
+import numpy as np
+import pytest
+
+from src.data.synthetic import SyntheticDataGenerator, SyntheticSpec
+
+
+def _timestamps(table):
+    return table.column("timestamp").to_numpy().astype("datetime64[ns]")
+
+
+def test_chunks_are_deterministic():
+    spec = SyntheticSpec(domain="finance", n_rows=5_000, chunk_size=2_000)
+    first = SyntheticDataGenerator(spec).generate_chunk(1)
+    second = SyntheticDataGenerator(spec).generate_chunk(1)
+    assert first.equals(second)
+    assert SyntheticDataGenerator(spec).generate_chunk(2).num_rows == 1_000
+
+
+def test_large_timelines_stay_inside_span():
+    spec = SyntheticSpec(domain="insurance", n_rows=100_000_000, chunk_size=200_000, n_customers=1_000)
+    generator = SyntheticDataGenerator(spec)
+    start = np.datetime64(spec.start, "ns")
+    end = start + np.timedelta64(spec.span_ns, "ns")
+
+    previous_max = start
+    for index in (0, 150, spec.n_chunks - 1):  # rows 0, 30M and the last chunk
+        timestamps = _timestamps(generator.generate_chunk(index))
+        assert timestamps.min() >= previous_max
+        assert timestamps.max() < end
+        previous_max = timestamps.max()
+
+
+def test_timeline_outside_datetime64_range_is_rejected():
+    with pytest.raises(ValueError):
+        SyntheticSpec(n_rows=1_000, start="2200-01-01", span_days=365 * 100)
+    with pytest.raises(ValueError):
+        SyntheticSpec(n_rows=10**12, span_days=1e-3)
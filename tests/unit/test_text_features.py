@@ -0,0 +1,53 @@
+"""Tests for src/data/text_features.py."""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.data.text_features import TextFeatureStage, load_shards
+
+WORDS = ["great", "bad", "cheap", "broken", "love", "fast", "slow", "gift", "return", "quality", "soft", "size"]
+
+
+@pytest.fixture
+def reviews(tmp_path):
+    rng = np.random.default_rng(0)
+    # Zipf-like word frequencies so the vocabulary cut is well defined
+    p = 1.0 / np.arange(1, len(WORDS) + 1)
+    texts = [" ".join(rng.choice(WORDS, size=6, p=p / p.sum())) for _ in range(600)]
+    path = tmp_path / "reviews.parquet"
+    pq.write_table(pa.table({"text": texts}), path, row_group_size=50)
+    return path, texts
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_vocabulary_mode_matches_in_memory_tfidf(tmp_path, reviews, jobs):
+    path, texts = reviews
+    stage = TextFeatureStage(mode="vocabulary", max_features=6, min_df=2, max_df=1.0,
+                             shard_rows=100, jobs=jobs, output_dir=tmp_path / f"out{jobs}")
+    X = load_shards(stage.fit_transform(path))
+
+    expected = TfidfVectorizer(max_features=6, min_df=2, max_df=1.0)
+    X_expected = expected.fit_transform(texts)
+    assert stage.vocabulary == expected.vocabulary_
+    np.testing.assert_allclose(X.toarray(), X_expected.toarray(), atol=1e-6)
+
+
+def test_pruned_merges_keep_the_frequent_terms(tmp_path, reviews):
+    path, texts = reviews
+    stage = TextFeatureStage(mode="vocabulary", max_features=3, min_df=1, shard_rows=50,
+                             vocabulary_buffer=4, output_dir=tmp_path / "out")
+    stage.fit_transform(path)
+    assert set(stage.vocabulary) == {"great", "bad", "cheap"}
+
+
+def test_transform_uses_fitted_state(tmp_path, reviews):
+    path, _ = reviews
+    stage = TextFeatureStage(mode="hashing", max_features=64, min_df=1, shard_rows=200, output_dir=tmp_path)
+    stage.fit_transform(path)
+    loaded = TextFeatureStage.load(tmp_path)
+    np.testing.assert_allclose(
+        loaded.transform(["great gift"]).toarray(), stage.transform(["great gift"]).toarray()
+    )
@@ -0,0 +1,103 @@
+"""Tests for src/xai/tiered_explainer.py and src/xai/explanation_accuracy.py."""
+
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from src.xai.explanation_accuracy import (
+    FidelityTracker,
+    cosine_similarity,
+    rank_correlation,
+    sign_agreement,
+    top_k_agreement,
+)
+from src.xai.tiered_explainer import SaabasExplainer, TieredExplainer
+
+
+def _booster(n_features=6, rounds=30, num_leaves=15, objective="binary", seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(1000, n_features))
+    signal = X[:, 0] - 2 * X[:, 1] + X[:, 2] * X[:, 3]
+    y = (signal > 0).astype(int) if objective == "binary" else signal
+    params = {"objective": objective, "num_leaves": num_leaves, "verbose": -1, "seed": seed}
+    return lgb.train(params, lgb.Dataset(X, label=y), num_boost_round=rounds), X
+
+
+@pytest.mark.parametrize("objective", ["binary", "regression"])
+def test_saabas_is_additive(objective):
+    booster, X = _booster(objective=objective)
+    saabas = SaabasExplainer(booster)
+    values = saabas.shap_values(X[:200])
+
+    assert values.shape == (200, 6)
+    np.testing.assert_allclose(values.sum(axis=1) + saabas.expected_value,
+                               booster.predict(X[:200], raw_score=True), atol=1e-6)
+
+
+def test_saabas_equals_tree_shap_on_stumps():
+    # Node values are hessian-weighted means, which match TreeSHAP's count cover for squared loss
+    booster, X = _booster(rounds=5, num_leaves=2, objective="regression")
+    explainer = TieredExplainer(booster, top_k=None, sample_rate=0)
+    np.testing.assert_allclose(explainer.fast(X[:100]), explainer.exact(X[:100]), atol=1e-6)
+
+
+def test_views_and_truncation():
+    booster, X = _booster()
+    explainer = TieredExplainer(booster, fast_mode="pred_contrib", top_k=2, metric_k=2, sample_rate=0)
+
+    fast, mode = explainer.explain(X[:50], view="end_user")
+    exact, exact_mode = explainer.explain(X[:50], view="compliance")
+    assert (mode, exact_mode) == ("pred_contrib", "exact")
+    assert ((fast != 0).sum(axis=1) <= 2).all()
+
+    # pred_contrib is exact TreeSHAP before truncation
+    full = TieredExplainer(booster, fast_mode="pred_contrib", top_k=None, sample_rate=0)
+    np.testing.assert_allclose(full.fast(X[:50]), exact, atol=1e-5)
+    kept = np.argsort(-np.abs(exact), axis=1)[:, :2]
+    np.testing.assert_allclose(np.take_along_axis(fast, kept, axis=1), np.take_along_axis(exact, kept, axis=1),
+                               atol=1e-5)
+    assert explainer.evaluate(X[:50])["top_k_agreement"] == pytest.approx(1.0)
+
+    with pytest.raises(ValueError):
+        TieredExplainer(booster, fast_mode="approximate")
+
+
+def test_falls_back_to_exact_and_recovers():
+    booster, X = _booster()
+    explainer = TieredExplainer(booster, top_k=1, threshold=0.99, metric_k=3, min_samples=50,
+                                window_size=100, sample_rate=0)
+
+    explainer.check(X[:100])  # top-1 truncation cannot match the exact top-3
+    assert explainer.degraded
+    assert explainer.explain(X[:5], view="end_user")[1] == "exact"
+    assert len(explainer.tracker) == 0
+
+    explainer.threshold = 0.0
+    explainer.check(X[:100])
+    assert not explainer.degraded
+    assert explainer.explain(X[:5])[1] == "saabas"
+
+
+def test_background_sampler_scores_fast_rows():
+    booster, X = _booster()
+    explainer = TieredExplainer.from_config(
+        {"explainability": {"fidelity": {"sample_rate": 1.0, "min_samples": 10_000}}}, booster
+    )
+    explainer.explain(X[:40])
+    explainer.close(timeout=30)
+    assert explainer.tracker.total == 40
+    assert 0.0 < explainer.fidelity <= 1.0
+
+
+def test_fidelity_metrics():
+    exact = np.array([[3.0, -2.0, 1.0, 0.0]])
+    assert top_k_agreement(np.array([[3.0, 0.5, 1.0, 2.0]]), exact, k=2)[0] == 0.5
+    assert sign_agreement(np.array([[1.0, 2.0, 1.0, 0.0]]), exact, k=2)[0] == 0.5
+    assert rank_correlation(exact * 2, exact)[0] == pytest.approx(1.0)
+    assert cosine_similarity(-exact, exact)[0] == pytest.approx(-1.0)
+    assert cosine_similarity(np.zeros((1, 4)), np.zeros((1, 4)))[0] == 1.0
+
+    tracker = FidelityTracker(window_size=3)
+    tracker.update(np.array([1.0, 1.0, 0.0, 0.0]))
+    assert len(tracker) == 3 and tracker.total == 4
+    assert tracker.mean == pytest.approx(1 / 3)
@@ -0,0 +1,124 @@
+"""Tests for src/models/tuning.py and the override merge in src/utils/config.py."""
+
+import numpy as np
+import pytest
+import yaml
+
+from src.models.tuning import ASHATuner, TuningResult, Trial, sample_params, write_override
+from src.utils import config as config_module
+from src.utils.config import get_setting, load_config, merge_config
+
+BASE_PARAMS = {"objective": "regression", "metric": "l2", "n_estimators": 500, "n_jobs": -1}
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 4))
+    return X, X[:, 0] - 2 * X[:, 1] + rng.normal(scale=0.3, size=2000)
+
+
+def _tuner(work_dir, **kwargs):
+    kwargs.setdefault("base_params", BASE_PARAMS)
+    kwargs.setdefault("early_stopping_rounds", 1000)  # no trial converges, so promotion alone stops them
+    return ASHATuner(n_trials=9, min_rounds=5, max_rounds=45, eta=3, n_workers=1, cpu_budget=1,
+                     work_dir=work_dir, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def result(tmp_path_factory, data):
+    X, y = data
+    return _tuner(tmp_path_factory.mktemp("tuning")).tune(X, y)
+
+
+def test_asha_promotes_the_best_of_each_rung(tmp_path, result):
+    tuner = _tuner(tmp_path)
+    assert tuner.rungs == [5, 15, 45]
+    assert "n_estimators" not in tuner.base_params and "n_jobs" not in tuner.base_params
+
+    frame = result.to_frame()
+    assert len(frame) == 9
+    assert (frame["rounds"] == [tuner.rungs[r] for r in frame["rung"]]).all()
+    assert (frame["rung"] == 2).sum() >= 1
+    # Only a third of a rung advances, and promoted trials train more trees and score better
+    assert (frame["rung"] >= 1).sum() <= 9 // 3 + 1
+    assert frame.loc[frame["rung"] == 2, "score"].min() < frame.loc[frame["rung"] == 0, "score"].min()
+    assert result.rounds_trained < result.full_budget_rounds / 2
+    assert result.full_budget_rounds == 9 * 45
+
+    best = frame.loc[frame["score"].idxmin()]
+    assert result.best_score == best["score"]
+    assert result.best_params["n_estimators"] == best["best_iteration"]
+    assert result.best_params["subsample_freq"] == 1 or result.best_params["subsample"] == 1.0
+    assert not list(tmp_path.glob("*.bin"))  # Dataset binaries are removed after the search
+
+
+def test_search_is_reproducible(tmp_path, data, result):
+    X, y = data
+    again = _tuner(tmp_path).tune(X, y)
+    np.testing.assert_array_equal(again.to_frame()["score"], result.to_frame()["score"])
+    assert again.best_params == result.best_params
+
+
+def test_failing_trials_are_never_promoted(tmp_path, data):
+    X, y = data
+    tuner = _tuner(tmp_path, search_space={"num_leaves": ("int", 1, 1)})  # LightGBM requires num_leaves > 1
+    with pytest.raises(RuntimeError, match="No tuning trial finished"):
+        tuner.tune(X, y)
+
+
+def test_sample_params_and_metric_direction():
+    rng = np.random.default_rng(0)
+    space = {"a": ("uniform", 0.5, 1.0), "b": ("log", 1e-3, 10.0), "c": ("int", 1, 3), "d": ("int_log", 15, 255)}
+    draws = [sample_params(space, rng) for _ in range(200)]
+    assert all(0.5 <= d["a"] <= 1.0 and 1e-3 <= d["b"] <= 10.0 for d in draws)
+    assert {d["c"] for d in draws} == {1, 2, 3}
+    assert all(isinstance(d["d"], int) and 15 <= d["d"] <= 255 for d in draws)
+    with pytest.raises(ValueError):
+        sample_params({"a": ("normal", 0, 1)}, rng)
+
+    auc = ASHATuner({"objective": "binary", "metric": "auc,binary_logloss"})
+    assert auc.metric == "auc" and auc._loss(0.9) < auc._loss(0.8)
+    assert ASHATuner(BASE_PARAMS)._loss(0.1) < ASHATuner(BASE_PARAMS)._loss(0.2)
+
+
+def test_from_config():
+    tuner = ASHATuner.from_config({
+        "model": {"lightgbm": BASE_PARAMS, "tuning": {"n_trials": 7, "eta": 2, "max_rounds": 100, "n_workers": None}},
+        "dataset": {"random_seed": 3},
+    }, cpu_budget=2)
+    assert (tuner.n_trials, tuner.eta, tuner.seed, tuner.n_workers) == (7, 2, 3, 2)
+    assert tuner.rungs == [25, 50, 100]
+
+
+# OVERRIDES
+
+def test_write_override_is_merged_on_load(tmp_path, monkeypatch):
+    domain_path = tmp_path / "e_commerce.yaml"
+    domain_path.write_text(yaml.safe_dump({"model": {"lightgbm": {"num_leaves": 31, "objective": "binary"}}}))
+    overrides_dir = tmp_path / "overrides"
+    monkeypatch.setattr(config_module, "OVERRIDES_DIR", overrides_dir)
+
+    overrides_dir.mkdir()
+    (overrides_dir / "e_commerce.yaml").write_text(yaml.safe_dump({"api": {"workers": 2}}))
+    trial = Trial(0, {"num_leaves": 63}, best_iteration=120)
+    tuned = TuningResult({"num_leaves": 63, "n_estimators": 120}, 0.25, "l2", trials=[trial])
+    path = write_override("e_commerce", tuned, overrides_dir=overrides_dir)
+
+    assert path == overrides_dir / "e_commerce.yaml"
+    assert path.read_text().startswith("# Written by src/models/tuning.py")
+    assert not list(overrides_dir.glob("*.tmp-*"))
+    config = load_config(domain_path)
+    assert config["model"]["lightgbm"] == {"num_leaves": 63, "objective": "binary", "n_estimators": 120}
+    assert config["api"]["workers"] == 2  # settings already in the override file are kept
+    assert load_config(domain_path, overrides=False)["model"]["lightgbm"]["num_leaves"] == 31
+
+
+def test_merge_config_and_get_setting():
+    base = {"a": {"b": 1, "c": 2}, "d": [1, 2]}
+    merged = merge_config(base, {"a": {"b": 3}, "d": [3]})
+    assert merged == {"a": {"b": 3, "c": 2}, "d": [3]}
+    assert base["a"]["b"] == 1  # the base config is not modified
+    assert get_setting(merged, "a.c") == 2
+    assert get_setting(merged, "a.x.y", "default") == "default"
+    assert get_setting(merged, "d.0") is None
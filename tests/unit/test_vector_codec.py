@@ -0,0 +1,69 @@
+"""Tests for src/utils/vector_codec.py."""
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import insert
+
+from src.adaptive.scheduler import MODELS_TABLE
+from src.utils.prediction_logging import TABLES
+from src.utils.vector_codec import VectorCodec, export_predictions, with_feature_schema
+
+FEATURES = ["price", "rating", "review_count"]
+
+
+def test_feature_round_trip():
+    codec = VectorCodec.from_model_config(with_feature_schema({}, FEATURES))
+    blob = codec.encode({"rating": 4.5, "price": 19.99})
+    assert len(blob) == 4 * len(FEATURES)
+
+    decoded = codec.decode(blob)
+    assert decoded["rating"] == 4.5
+    assert decoded["price"] == pytest.approx(19.99, rel=1e-6)
+    assert np.isnan(decoded["review_count"])
+    with pytest.raises(ValueError):
+        codec.encode({"unknown": 1.0})
+    with pytest.raises(ValueError):
+        codec.encode([1.0, 2.0])
+
+
+def test_explanation_round_trip_keeps_base_value():
+    codec = VectorCodec.from_model_config(with_feature_schema({}, FEATURES))
+    shap_values = np.array([0.25, -0.5, 0.125])
+    blob = codec.encode_explanation(shap_values, base_value=0.375)
+
+    values, base_value = codec.decode_explanation(blob)
+    assert list(values.values()) == shap_values.tolist()
+    assert base_value == 0.375
+    assert codec.decode_explanation(codec.encode_explanation(shap_values))[1] is None
+
+    matrix, base_values = codec.decode_explanations([blob, None])
+    assert matrix.shape == (2, len(FEATURES))
+    assert base_values[0] == 0.375 and np.isnan(base_values[1])
+
+
+def test_version_1_schema_decodes_without_base_value():
+    codec = VectorCodec.from_model_config({"feature_schema": {"version": 1, "features": FEATURES}})
+    blob = codec.encode_explanation([1.0, 2.0, 3.0], base_value=0.5)
+    assert len(blob) == 4 * len(FEATURES)
+    assert codec.decode_explanation(blob) == ({"price": 1.0, "rating": 2.0, "review_count": 3.0}, None)
+
+
+def test_export_writes_shap_base_value(tmp_path, sqlite_engine):
+    codec = VectorCodec(FEATURES)
+    with sqlite_engine.begin() as connection:
+        connection.execute(insert(MODELS_TABLE).values(
+            id=1, name="m", version="e_commerce-v0001", config=with_feature_schema({}, FEATURES)
+        ))
+        connection.execute(insert(TABLES["predictions"]), [
+            {"model_id": 1, "user_id": f"u{i}", "prediction": 0.5,
+             "features_blob": codec.encode([i, 4.0, 10.0]),
+             "explanation_blob": codec.encode_explanation([0.1, 0.2, -0.1], base_value=0.3)}
+            for i in range(5)
+        ])
+
+    (path,) = export_predictions(sqlite_engine, tmp_path, chunksize=2)
+    table = pq.read_table(path)
+    assert table.num_rows == 5
+    assert table.column("feature__price").to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert table.column("shap_base_value").to_pylist() == pytest.approx([0.3] * 5)